@@ -6,32 +6,65 @@ This library provides high-level interfaces for common media tasks including:
 - Adaptive video chunking for HLS streaming.
 - Visual overlays and compositing.
 - AI-powered video analysis (vulnerability, summary, subtitles).
-- Structural video validation and metadata extraction.
+- Structural video validation and metadata extraction (single cached ffprobe per asset).
 - Concurrent and sequential resolution transcoding.
+- asyncio variants of the ffmpeg-backed operations.
 """
 
 # Re-export key functions to provide a clean top-level API
 
-from .src.core.audio_extractor import get_audio_from_video, extract_audio, get_default_output_path, chunk_video_adaptive
-from .src.core.video_tools import merge_videos, composite_image_over_video, convert_video_resolutions, get_video_thumbnail, detect_video_vulnerability,crop_video, generate_video_summary, generate_subtitle, video_phash, convert_video_format
+from .src.core.audio_extractor import get_audio_from_video, extract_audio, extract_audio_ranges, extract_all_audio_tracks, iter_audio_frames, get_default_output_path, chunk_video_adaptive, package_hls_from_renditions
+from .src.core.video_tools import merge_videos, concat_videos, composite_image_over_video, composite_layers, convert_video_resolutions, get_video_thumbnail, select_thumbnail_time, generate_sprite_sheets, detect_video_vulnerability,crop_video, generate_video_summary, generate_subtitle, video_phash, convert_video_format
+from .src.core.overlay_assets import prepare_overlay_asset
+from .src.core.probe import probe, MediaInfo, configure_probe_cache
 from .src.utils.validation import validate_video_file, validate_ffmpeg
+from .src.utils.progress import ProgressEvent, iter_ffmpeg_progress
+from .src.utils.journal import JobJournal
+from .src.core.async_tools import (
+    set_async_concurrency, run_ffmpeg_async, probe_async, convert_video_format_async, get_video_thumbnail_async,
+    crop_video_async, chunk_video_adaptive_async, extract_audio_async, video_phash_async
+)
 
 __version__ = "1.0.0"
 __author__ = "clipmind Team"
 __all__ = [
     "get_audio_from_video", 
     "extract_audio", 
+    "extract_audio_ranges",
+    "extract_all_audio_tracks",
+    "iter_audio_frames",
     "get_default_output_path",
     "validate_video_file",
     "validate_ffmpeg",
     "merge_videos",
+    "concat_videos",
     "composite_image_over_video",
+    "composite_layers",
+    "prepare_overlay_asset",
     "convert_video_resolutions",
     "get_video_thumbnail",
+    "select_thumbnail_time",
+    "generate_sprite_sheets",
     "crop_video",
     "chunk_video_adaptive",
+    "package_hls_from_renditions",
     "detect_video_vulnerability",
     "generate_video_summary",
     "generate_subtitle","video_phash",
-    "convert_video_format"
+    "convert_video_format",
+    "probe",
+    "MediaInfo",
+    "configure_probe_cache",
+    "ProgressEvent",
+    "iter_ffmpeg_progress",
+    "JobJournal",
+    "set_async_concurrency",
+    "run_ffmpeg_async",
+    "probe_async",
+    "convert_video_format_async",
+    "get_video_thumbnail_async",
+    "crop_video_async",
+    "chunk_video_adaptive_async",
+    "extract_audio_async",
+    "video_phash_async"
 ]
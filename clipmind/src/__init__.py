@@ -2,7 +2,8 @@
 from .core.audio_extractor import get_audio_from_video
 from .utils.language import print_urdu
 from .utils.redis import configure_redis
+from .utils.scheduler import configure_scheduler
 
 __version__ = "1.0.0"
 __author__ = "clipmind Team"
-__all__ = ["get_audio_from_video", "print_urdu", "configure_redis"]
\ No newline at end of file
+__all__ = ["get_audio_from_video", "print_urdu", "configure_redis", "configure_scheduler"]
\ No newline at end of file
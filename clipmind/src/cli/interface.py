@@ -21,6 +21,7 @@ Examples:
   clipmind -i video.mp4                    # Extract to video.mp3
   clipmind -i video.mp4 -o audio.wav       # Extract to audio.wav
   clipmind -i video.mkv -f mp3             # Extract to video.mp3
+  clipmind -i movie.mkv --all-tracks       # Extract every audio track (copied, language-tagged)
         """
     )
 
@@ -29,8 +30,11 @@ Examples:
     # Optional argument: Destination audio path
     parser.add_argument('-o', '--output', help='Output audio file path (optional)')
     # Optional argument: Target audio codec/extension
-    parser.add_argument('-f', '--format', choices=['mp3', 'wav'], default='mp3',
-                       help='Output audio format (default: mp3)')
+    parser.add_argument('-f', '--format', choices=['mp3', 'm4a', 'aac', 'opus', 'flac', 'wav'], default=None,
+                       help='Output audio format (default: mp3; with --all-tracks each track keeps its codec)')
+    # Optional flag: one output per audio stream instead of the default mapping
+    parser.add_argument('--all-tracks', action='store_true',
+                       help='Extract every audio track; -o is then the output directory')
 
     return parser.parse_args()
 
@@ -50,7 +54,8 @@ def show_usage_instructions():
     # Breakdown of flags for quick reference
     print("  -i, --input   Input video file path (required)")
     print("  -o, --output  Output audio file path (optional)")
-    print("  -f, --format  Output format: mp3 or wav (default: mp3)")
+    print("  -f, --format  Output format: mp3, m4a, aac, opus, flac or wav (default: mp3)")
+    print("  --all-tracks  Extract every audio track into the output directory")
     print()
     print("Example: clipmind -i video.mp4 -o audio.mp3")
 
@@ -91,16 +96,22 @@ def main():
     The main CLI entry point. Orchestrates argument parsing and high-level logic.
     """
     # Import here to avoid circular dependencies if CLI is executed directly
-    from ..core.audio_extractor import get_audio_from_video
+    from ..core.audio_extractor import get_audio_from_video, extract_all_audio_tracks
     
     # Process inputs from sys.argv
     args = parse_arguments()
     
+    if args.all_tracks:
+        tracks = extract_all_audio_tracks(args.input, args.output, args.format)
+        for track in tracks:
+            print(f"Extracted track {track['index']} ({track['language']}) to: {track['path']}")
+        sys.exit(0 if tracks else 1)
+    
     # Delegate core logic to the library functions
     success = get_audio_from_video(
         args.input, 
         args.output, 
-        args.format
+        args.format or 'mp3'
     )
     
     # Exit with appropriate status codes based on success/failure
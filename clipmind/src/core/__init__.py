@@ -2,6 +2,11 @@
 Core processing engine for the clipmind package.
 Contains low-level and mid-level tools for audio extraction, video manipulation, and transcoding.
 """
-from .audio_extractor import get_audio_from_video, extract_audio, get_default_output_path
-from .video_tools import merge_videos, composite_image_over_video, convert_video_resolutions, get_video_thumbnail, crop_video, video_phash
-__all__ = ["get_audio_from_video", "extract_audio", "get_default_output_path", "merge_videos", "composite_image_over_video",  "convert_video_resolutions", "get_video_thumbnail", "crop_video", "video_phash"]
+from .audio_extractor import get_audio_from_video, extract_audio, extract_audio_ranges, extract_all_audio_tracks, iter_audio_frames, get_default_output_path, package_hls_from_renditions
+from .video_tools import merge_videos, concat_videos, composite_image_over_video, composite_layers, convert_video_resolutions, get_video_thumbnail, select_thumbnail_time, generate_sprite_sheets, crop_video, video_phash
+from .overlay_assets import prepare_overlay_asset
+from .probe import probe, MediaInfo, StreamInfo, ProbeError, configure_probe_cache, keyframe_times
+from .ladder import plan_ladder, LadderPlan, RenditionResults
+from .manifests import parse_media_playlist, write_dash_manifest
+from .async_tools import run_ffmpeg_async, probe_async, set_async_concurrency
+__all__ = ["get_audio_from_video", "extract_audio", "extract_audio_ranges", "extract_all_audio_tracks", "iter_audio_frames", "get_default_output_path", "package_hls_from_renditions", "merge_videos", "concat_videos", "composite_image_over_video", "composite_layers", "prepare_overlay_asset",  "convert_video_resolutions", "get_video_thumbnail", "select_thumbnail_time", "generate_sprite_sheets", "crop_video", "video_phash", "probe", "MediaInfo", "StreamInfo", "ProbeError", "configure_probe_cache", "keyframe_times", "plan_ladder", "LadderPlan", "RenditionResults", "parse_media_playlist", "write_dash_manifest", "run_ffmpeg_async", "probe_async", "set_async_concurrency"]
@@ -0,0 +1,452 @@
+"""
+asyncio variants of clipmind's subprocess-backed operations.
+Every function here spawns ffmpeg/ffprobe with asyncio.create_subprocess_exec instead
+of blocking a thread, shares an optional process-wide concurrency limit, and kills
+its child process when the awaiting task is cancelled. Encodes also take their share
+of the CPU budget from the same scheduler as the synchronous API.
+"""
+import asyncio
+import os
+import subprocess
+import weakref
+from contextlib import asynccontextmanager
+
+import ffmpeg
+import numpy as np
+
+from ..utils.progress import with_progress_args, feed_progress_line
+from ..utils.scheduler import get_scheduler
+from ..utils.validation import validate_ffmpeg
+from ..utils.resolution import RESOLUTION_PROFILES
+from .probe import MediaInfo, cached_probe, probe_command, record_probe_output
+from .video_tools import (
+    _convert_format_command, _report_conversion_failure, _default_thumbnail_path, _random_shot_time,
+    _thumbnail_command, _prepare_crop, _crop_command, _phash_timestamps, _phash_frame_command,
+    _phash_frame_bits,
+)
+from .audio_extractor import (
+    _extract_audio_command, _resolve_hls_output_dir, _hls_variant_command, _hls_variant_info,
+    _write_master_playlist,
+)
+
+# Maximum number of child processes started by this module at once (None = unlimited)
+_concurrency_limit = None
+# One semaphore per event loop, since asyncio primitives are bound to a loop
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def set_async_concurrency(limit=None):
+    """
+    Limits how many ffmpeg/ffprobe processes the async API runs at the same time.
+    The limit is shared by every call in the process; extra calls wait their turn.
+
+    Args:
+        limit (int, optional): Maximum concurrent child processes. None removes the limit.
+    """
+    global _concurrency_limit
+    _concurrency_limit = None if limit is None else max(1, int(limit))
+    _semaphores.clear()
+
+
+@asynccontextmanager
+async def _process_slot():
+    """Waits for a free slot under the shared concurrency limit."""
+    if _concurrency_limit is None:
+        yield
+        return
+
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(_concurrency_limit)
+        _semaphores[loop] = semaphore
+
+    async with semaphore:
+        yield
+
+
+@asynccontextmanager
+async def _scheduler_job(slots=1):
+    """
+    asyncio counterpart of FFmpegScheduler.job(). The blocking acquire runs in the
+    default executor so waiting for a slot never stalls the event loop.
+
+    Yields:
+        int: The number of threads the job may use.
+    """
+    scheduler = get_scheduler()
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(None, scheduler.acquire, slots)
+    try:
+        threads = await asyncio.shield(future)
+    except asyncio.CancelledError:
+        # The executor thread keeps waiting; hand the slots back as soon as it gets them
+        future.add_done_callback(
+            lambda f: f.cancelled() or f.exception() is not None or scheduler.release(slots)
+        )
+        raise
+
+    try:
+        yield threads
+    finally:
+        scheduler.release(slots)
+
+
+async def _reap(process):
+    """Kills a child process that is still running (e.g. after cancellation) and waits for it."""
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+
+
+async def run_ffmpeg_async(cmd, on_progress=None, check=True):
+    """
+    Runs an ffmpeg command without blocking the event loop, reporting progress as it goes.
+    Cancelling the awaiting task kills the ffmpeg process.
+
+    Args:
+        cmd (list): Full ffmpeg command line, starting with the executable.
+                    Must not write its own output to stdout.
+        on_progress (callable, optional): Called with a ProgressEvent for each progress report.
+        check (bool): If True, raises CalledProcessError on a non-zero exit code.
+
+    Returns:
+        subprocess.CompletedProcess: With stderr captured as bytes.
+    """
+    async with _process_slot():
+        process = await asyncio.create_subprocess_exec(
+            *with_progress_args(cmd),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        stderr_task = asyncio.ensure_future(process.stderr.read())
+        try:
+            fields = {}
+            async for line in process.stdout:
+                event = feed_progress_line(fields, line)
+                if event is not None and on_progress is not None:
+                    on_progress(event)
+            stderr = await stderr_task
+            returncode = await process.wait()
+        finally:
+            stderr_task.cancel()
+            await _reap(process)
+
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, output=b"", stderr=stderr)
+    return subprocess.CompletedProcess(cmd, returncode, b"", stderr)
+
+
+async def probe_async(path, store=None, timeout=None, use_cache=True):
+    """
+    asyncio variant of probe(); shares its LRU and Redis caches.
+
+    Args:
+        path (str/Path): Local path or URL of the media file.
+        store (RedisStore, optional): Redis-backed cache to consult and populate.
+        timeout (float, optional): Seconds to wait for ffprobe before giving up.
+        use_cache (bool): If False, always runs ffprobe and refreshes the cache.
+
+    Returns:
+        MediaInfo: The parsed metadata.
+
+    Raises:
+        ProbeError: If ffprobe reports the file as unreadable.
+        asyncio.TimeoutError: If ffprobe exceeds the timeout.
+    """
+    path = str(path)
+
+    if use_cache:
+        info = cached_probe(path, store)
+        if info is not None:
+            return info
+
+    async with _process_slot():
+        process = await asyncio.create_subprocess_exec(
+            *probe_command(path),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        finally:
+            await _reap(process)
+
+    return record_probe_output(
+        path, process.returncode,
+        stdout.decode("utf-8", "replace"), stderr.decode("utf-8", "replace"), store
+    )
+
+
+async def _probe_source(path):
+    """
+    Probes a source for the stream-copy decisions of the command builders.
+    An unreadable source yields an empty MediaInfo, which (like a failed probe in the
+    synchronous path) simply disables stream copy.
+    """
+    try:
+        return await probe_async(path)
+    except Exception:
+        return MediaInfo(str(path), {})
+
+
+async def convert_video_format_async(input_path, output_path, video_codec=None, audio_codec=None, on_progress=None):
+    """
+    asyncio variant of convert_video_format.
+
+    Args:
+        input_path (str): The source file path.
+        output_path (str): The target file path with the desired extension (e.g., .webm, .mkv).
+        video_codec (str, optional): Specific video encoder name.
+        audio_codec (str, optional): Specific audio encoder name.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+
+    Returns:
+        bool: True if conversion was successful, False otherwise.
+    """
+    if not os.path.exists(input_path):
+        print(f"Error: Conversion input {input_path} not found.")
+        return False
+
+    # Normalize empty inputs
+    video_codec = video_codec or None
+    audio_codec = audio_codec or None
+
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)) or ".", exist_ok=True)
+
+        # Probe without blocking the loop; the builder would otherwise run ffprobe synchronously
+        info = await _probe_source(input_path)
+        cmd, video_codec = _convert_format_command(input_path, output_path, video_codec, audio_codec, info)
+
+        # Execute the process within a share of the CPU budget
+        async with _scheduler_job() as threads:
+            if video_codec != "copy":
+                cmd.extend(get_scheduler().thread_args(video_codec, threads))
+            cmd.append(output_path)
+            await run_ffmpeg_async(cmd, on_progress=on_progress)
+        return True
+
+    except subprocess.CalledProcessError as e:
+        _report_conversion_failure(e.stderr, output_path)
+        return False
+    except Exception as e:
+        print(f"General conversion failure: {e}")
+        return False
+
+
+async def get_video_thumbnail_async(video_path, shot_at=None, output_path="", resolution=None, quality=2, on_progress=None):
+    """
+    asyncio variant of get_video_thumbnail.
+
+    Args:
+        video_path (str): The video source file.
+        shot_at (float, optional): The time offset (seconds). If None, a random frame is picked.
+        output_path (str, optional): Target image path. Defaults to [video_name]_thumb.jpg.
+        resolution (str, optional): Scaling constraint. e.g. '320' or '320:240'.
+        quality (int, optional): JPEG quality level (1 to 31, lower is better quality).
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+
+    Returns:
+        str: Path to the generated thumbnail, or empty string on failure.
+    """
+    if not output_path:
+        output_path = _default_thumbnail_path(video_path)
+
+    if shot_at is None:
+        try:
+            duration = (await probe_async(video_path)).duration
+        except Exception:
+            duration = 0.0
+        shot_at = _random_shot_time(duration)
+
+    try:
+        await run_ffmpeg_async(_thumbnail_command(video_path, shot_at, output_path, resolution, quality), on_progress=on_progress)
+        return output_path
+    except subprocess.CalledProcessError:
+        return ""
+
+
+async def crop_video_async(video_path, x=0, y=0, width=640, height=480, output_path="", on_progress=None):
+    """
+    asyncio variant of crop_video.
+
+    Args:
+        video_path (str): Path to the input video.
+        x (int): Horizontal starting position (left).
+        y (int): Vertical starting position (top).
+        width (int): Target width of the cropped area.
+        height (int): Target height of the cropped area.
+        output_path (str, optional): Path for the resulting file.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+
+    Returns:
+        str: Path to the cropped video file.
+    """
+    output_path = _prepare_crop(video_path, width, height, output_path)
+
+    try:
+        async with _scheduler_job() as threads:
+            cmd = _crop_command(video_path, x, y, width, height, output_path, threads)
+            await run_ffmpeg_async(cmd, on_progress=on_progress)
+    except subprocess.CalledProcessError as e:
+        # Same failure type as the synchronous crop_video
+        raise ffmpeg.Error("ffmpeg", e.stdout, e.stderr)
+
+    return output_path
+
+
+async def extract_audio_async(video_path, output_path, audio_format='mp3', start=None, end=None, on_progress=None):
+    """
+    asyncio variant of extract_audio.
+
+    Args:
+        video_path (str): The absolute or relative path to the source video file.
+        output_path (str): The path where the extracted audio file will be saved.
+        audio_format (str): Desired audio format. Defaults to 'mp3'.
+        start (float/str, optional): Start time for extraction.
+        end (float/str, optional): End time for extraction.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+
+    Returns:
+        bool: True if the ffmpeg command executed successfully, False otherwise.
+    """
+    try:
+        # Probe without blocking the loop; the copy check would otherwise run ffprobe synchronously
+        info = await _probe_source(video_path)
+        async with _scheduler_job() as threads:
+            cmd = _extract_audio_command(video_path, output_path, audio_format, start, end, threads, info)
+            await run_ffmpeg_async(cmd, on_progress=on_progress)
+        return True
+    except subprocess.CalledProcessError:
+        return False
+    except Exception:
+        return False
+
+
+async def chunk_video_adaptive_async(video_path, output_dir=None, resolutions=None, segment_duration=10, on_progress=None):
+    """
+    asyncio variant of chunk_video_adaptive. Variants are encoded concurrently, each
+    one holding a slot of the shared CPU-budget scheduler (and the async concurrency
+    limit, if set); if one fails the others are cancelled.
+
+    Args:
+        video_path (str): Source path or URL of the video to be processed.
+        output_dir (str, optional): Target directory for output files.
+        resolutions (list, optional): List of target resolutions. Defaults to ['360p', '720p', '1080p'].
+        segment_duration (int): Target length of each HLS segment in seconds. Defaults to 10.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+
+    Returns:
+        dict or False: Metadata about generated manifests and segments, or False on failure.
+    """
+    try:
+        if not validate_ffmpeg():
+            return False
+
+        video_path_str = str(video_path)
+        output_dir = _resolve_hls_output_dir(video_path_str, output_dir)
+
+        if resolutions is None:
+            resolutions = ['360p', '720p', '1080p']
+        for res in resolutions:
+            if res not in RESOLUTION_PROFILES:
+                return False
+
+        async def encode_variant(res_key, res_dir):
+            # Wait for a scheduler slot so concurrent variants stay within the CPU budget
+            async with _scheduler_job() as threads:
+                cmd = _hls_variant_command(video_path_str, res_dir, res_key, RESOLUTION_PROFILES[res_key], segment_duration, threads)
+                await run_ffmpeg_async(cmd, on_progress=on_progress)
+
+        tasks = []
+        for res_key in resolutions:
+            res_dir = output_dir / res_key
+            res_dir.mkdir(exist_ok=True)
+            tasks.append(asyncio.ensure_future(encode_variant(res_key, res_dir)))
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Stop the remaining encodes (and their processes) before propagating
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        variants = {res_key: _hls_variant_info(output_dir / res_key) for res_key in resolutions}
+
+        master_manifest = output_dir / "master.m3u8"
+        _write_master_playlist(master_manifest, resolutions, variants)
+
+        return {
+            'master_manifest': master_manifest,
+            'output_dir': output_dir,
+            'variants': variants
+        }
+
+    except subprocess.CalledProcessError:
+        return False
+    except Exception:
+        return False
+
+
+async def _read_phash_frame(video_path, t, hash_size):
+    """Pipes one grayscale frame into memory and returns its hash bits, or None on failure."""
+    frame_size = hash_size * (hash_size + 1)
+    async with _process_slot():
+        process = await asyncio.create_subprocess_exec(
+            *_phash_frame_command(video_path, t, hash_size),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        try:
+            try:
+                raw = await process.stdout.readexactly(frame_size)
+            except asyncio.IncompleteReadError:
+                return None
+            await process.wait()
+        finally:
+            await _reap(process)
+
+    return _phash_frame_bits(raw, hash_size)
+
+
+async def video_phash_async(video_path, hash_size=16, num_frames=5):
+    """
+    asyncio variant of video_phash. Sample frames are extracted concurrently.
+
+    Args:
+        video_path (str): The video to be hashed.
+        hash_size (int): Dimensions for the internal grayscale frame (e.g., 16x16).
+        num_frames (int): Number of frames to sample across the video duration.
+
+    Returns:
+        numpy.ndarray: A concatenated binary hash representing the entire video.
+    """
+    video_path = str(video_path)
+    empty = np.zeros(hash_size * hash_size * num_frames, dtype=np.uint8)
+
+    try:
+        duration = (await probe_async(video_path)).duration
+    except Exception:
+        return empty
+
+    if duration <= 0:
+        return empty
+
+    frames = await asyncio.gather(*(
+        _read_phash_frame(video_path, t, hash_size) for t in _phash_timestamps(duration, num_frames)
+    ))
+    hashes = [bits for bits in frames if bits is not None]
+
+    if not hashes:
+        return empty
+
+    return np.concatenate(hashes)
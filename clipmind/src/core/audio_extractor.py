@@ -1,60 +1,413 @@
 import ffmpeg
+import subprocess
+import threading
+import numpy as np
 from pathlib import Path
 
 
 from ..utils.validation import validate_video_file, validate_ffmpeg
 from ..cli.interface import validate_and_get_output_path
 from ..utils.resolution import RESOLUTION_PROFILES
+from ..utils.scheduler import get_scheduler
+from ..utils.progress import run_ffmpeg
+from ..utils.capabilities import get_ffmpeg_capabilities
+from .ladder import plan_ladder, parse_kbps
+from .probe import probe
+from .manifests import read_media_playlist, write_media_playlist, write_dash_manifest
 
+# Directory (and rendition name) of the shared audio group in single-process HLS output
+HLS_AUDIO_GROUP = "audio"
 
-def extract_audio(video_path, output_path, audio_format='mp3', start=None, end=None):
+# HLS segment containers and the file extension of their media segments
+HLS_SEGMENT_EXTENSIONS = {"mpegts": ".ts", "fmp4": ".m4s"}
+
+# Base name of the one media file per variant written in single-file (byte-range) mode
+HLS_SINGLE_FILE_NAME = "media"
+
+# Source codecs (ffprobe names) each audio format can hold as-is, i.e. by stream copy
+AUDIO_FORMAT_CODECS = {
+    "mp3": {"mp3"},
+    "m4a": {"aac", "alac"},
+    "aac": {"aac"},
+    "opus": {"opus"},
+    "flac": {"flac"},
+    "wav": {"pcm_s16le", "pcm_s24le", "pcm_s32le", "pcm_f32le", "pcm_u8"},
+}
+
+# Encoders used when the source codec cannot be copied, in order of preference
+AUDIO_FORMAT_ENCODERS = {
+    "mp3": ("libmp3lame", "mp3"),
+    "m4a": ("aac",),
+    "aac": ("aac",),
+    "opus": ("libopus", "opus"),
+    "flac": ("flac",),
+    "wav": ("pcm_s16le",),
+}
+
+# File extension that holds each source codec as-is; anything else goes into Matroska audio
+NATIVE_AUDIO_EXTENSIONS = {
+    "mp3": "mp3",
+    "aac": "m4a",
+    "alac": "m4a",
+    "opus": "opus",
+    "flac": "flac",
+    "pcm_s16le": "wav",
+    "pcm_s24le": "wav",
+}
+
+# Raw PCM formats of ffmpeg by the NumPy dtype they decode into (little-endian)
+PCM_SAMPLE_FORMATS = {
+    "int16": "s16le",
+    "int32": "s32le",
+    "float32": "f32le",
+    "float64": "f64le",
+    "uint8": "u8",
+}
+
+
+def extract_audio(video_path, output_path, audio_format='mp3', start=None, end=None, on_progress=None):
     """
     Internal helper to execute the actual audio extraction using ffmpeg.
     
     Args:
         video_path (str): The absolute or relative path to the source video file.
         output_path (str): The path where the extracted audio file will be saved.
-        audio_format (str): Desired audio format (currently supports 'mp3' and 'wav').
+        audio_format (str): Desired audio format ('mp3', 'm4a', 'aac', 'opus', 'flac' or 'wav').
+                           The source track is stream-copied when the format can hold it.
                            Defaults to 'mp3'.
         start (float/str, optional): Start time for extraction (e.g., 10.5 or "00:00:10").
         end (float/str, optional): End time for extraction (e.g., 20.0 or "00:00:20").
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
 
     Returns:
         bool: True if the ffmpeg command executed successfully, False otherwise.
     """
     try:
-        # Determine the appropriate codec based on requested format
-        # Use 'mp3' for MP3 files and 'pcm_s16le' for WAV/Lossless
-        audio_codec = 'mp3' if audio_format.lower() == 'mp3' else 'pcm_s16le'
-
-        # Build input parameters for cutting the video if start/end times are provided
-        input_kwargs = {}
-        if start is not None:
-            input_kwargs['ss'] = start
-        if end is not None:
-            input_kwargs['to'] = end
-
-        # Initialize the ffmpeg input stream
-        stream = ffmpeg.input(str(video_path), **input_kwargs)
-        
-        # Configure output stream with specified codec and quiet logging
-        stream = ffmpeg.output(stream, str(output_path), acodec=audio_codec, loglevel='quiet')
+        with get_scheduler().job() as threads:
+            cmd = _extract_audio_command(video_path, output_path, audio_format, start, end, threads)
 
-        # Execute the conversion process
-        ffmpeg.run(stream, overwrite_output=True, quiet=True)
+            # Execute the conversion process
+            run_ffmpeg(cmd, on_progress=on_progress)
 
         return True
 
     except ImportError:
         # Handle cases where ffmpeg-python is not installed correctly
         return False
-    except ffmpeg.Error as e:
+    except subprocess.CalledProcessError as e:
         # Catch ffmpeg-specific errors during processing
         return False
     except Exception as e:
         # Catch any other unexpected errors
         return False
 
+def _extract_audio_command(video_path, output_path, audio_format='mp3', start=None, end=None, threads=None, info=None):
+    """
+    Builds the ffmpeg command used by extract_audio.
+    info is the already-probed source; if None it is probed here (blocking), so async
+    callers pass the result of probe_async.
+    """
+    # Copy fast path: a track the target format already holds is remuxed, not re-encoded
+    audio_codec = 'copy' if _can_copy_audio(video_path, audio_format, info) else _audio_codec(audio_format)
+
+    # Build input parameters for cutting the video if start/end times are provided
+    input_kwargs = {}
+    if start is not None:
+        input_kwargs['ss'] = start
+    if end is not None:
+        input_kwargs['to'] = end
+
+    # Initialize the ffmpeg input stream, keeping only its first audio track (-map 0:a:0),
+    # the one the copy check looked at; multi-track output is extract_all_audio_tracks' job
+    stream = ffmpeg.input(str(video_path), **input_kwargs)['a:0']
+
+    # Configure output stream with specified codec and quiet logging
+    stream = ffmpeg.output(stream, str(output_path), acodec=audio_codec, loglevel='quiet',
+                           **get_scheduler().thread_kwargs(None, threads))
+    return ffmpeg.compile(stream, overwrite_output=True)
+
+def extract_all_audio_tracks(video_path, output_dir=None, audio_format=None, on_progress=None):
+    """
+    Writes every audio stream of a file (e.g. each language of an MKV) in one ffmpeg pass.
+    The input is demuxed once and each stream is mapped to its own output, named
+    '<stem>_<track>_<language>.<ext>' (e.g. 'movie_1_eng.m4a'; 'und' if untagged).
+
+    Args:
+        video_path (str): Path to the source video file.
+        output_dir (str, optional): Directory for the tracks. Defaults to the video's directory.
+        audio_format (str, optional): Target format for every track (see extract_audio). If None,
+                                      each track is stream-copied into a container native to its codec.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+
+    Returns:
+        list: One dict per track with 'index' (stream index), 'language', 'codec', 'path' and
+              'copied' (True if stream-copied), or an empty list on failure.
+    """
+    try:
+        source = probe(video_path)
+    except Exception as e:
+        print(f"Could not read audio tracks of {video_path}: {e}")
+        return []
+
+    if not source.audio_streams:
+        print(f"No audio tracks found in {video_path}")
+        return []
+
+    video_path = Path(video_path)
+    output_dir = Path(output_dir) if output_dir else video_path.parent
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    tracks = []
+    for number, stream in enumerate(source.audio_streams, start=1):
+        # Language tags are free-form metadata; keep them file-name safe
+        language = "".join(c for c in (stream.language or "und") if c.isalnum()) or "und"
+        if audio_format is None:
+            extension = NATIVE_AUDIO_EXTENSIONS.get(stream.codec_name, "mka")
+            copied = True
+        else:
+            extension = audio_format.lower()
+            copied = stream.codec_name in AUDIO_FORMAT_CODECS.get(extension, ())
+        tracks.append({
+            'index': stream.index,
+            'language': language,
+            'codec': stream.codec_name,
+            'path': str(output_dir / f"{video_path.stem}_{number}_{language}.{extension}"),
+            'copied': copied,
+        })
+
+    try:
+        with get_scheduler().job() as threads:
+            cmd = _extract_all_audio_tracks_command(video_path, tracks, audio_format, threads)
+            run_ffmpeg(cmd, on_progress=on_progress)
+    except subprocess.CalledProcessError as e:
+        print(f"Audio track extraction failed: {e.stderr.decode(errors='replace').strip()}")
+        return []
+    except Exception as e:
+        print(f"Audio track extraction failed: {e}")
+        return []
+
+    return tracks
+
+def _extract_all_audio_tracks_command(video_path, tracks, audio_format=None, threads=None):
+    """Builds the single-demux ffmpeg command used by extract_all_audio_tracks."""
+    cmd = ["ffmpeg", "-y", "-loglevel", "error", "-i", str(video_path)]
+    encoder = _audio_codec(audio_format) if audio_format else None
+    thread_args = get_scheduler().thread_args(None, threads)
+    for track in tracks:
+        cmd.extend(["-map", f"0:{track['index']}"])
+        if track['copied']:
+            cmd.extend(["-c:a", "copy"])
+        else:
+            cmd.extend(["-c:a", encoder, *thread_args])
+        cmd.append(track['path'])
+    return cmd
+
+def iter_audio_frames(video_path, sample_rate=16000, channels=1, dtype="float32", frame_size=16000, start=None, end=None):
+    """
+    Decodes a video's audio track and yields it as fixed-size NumPy frames, without temp files.
+    ffmpeg writes raw PCM to a pipe, which is read with readinto into one preallocated
+    buffer, so memory stays constant however long the input is.
+
+    Args:
+        video_path (str): Path or URL of the source video file.
+        sample_rate (int): Output sample rate in Hz. Defaults to 16000 (typical for ASR).
+        channels (int): Number of output channels (downmixed or upmixed by ffmpeg). Defaults to 1.
+        dtype (str): Sample type: 'int16', 'int32', 'float32', 'float64' or 'uint8'. Defaults to 'float32'.
+        frame_size (int): Samples per channel in each yielded frame. Defaults to one second at 16 kHz.
+        start (float/str, optional): Start time of the decoded range.
+        end (float/str, optional): End time of the decoded range.
+
+    Yields:
+        numpy.ndarray: Arrays of shape (frame_size, channels); the last one may be shorter.
+                       The same buffer is reused for every frame, so copy a frame to keep it.
+
+    Raises:
+        ValueError: If dtype is not supported.
+        subprocess.CalledProcessError: If ffmpeg fails to decode the input.
+    """
+    name = np.dtype(dtype).name
+    if name not in PCM_SAMPLE_FORMATS:
+        raise ValueError(f"Unsupported PCM dtype '{dtype}'. Expected one of {tuple(PCM_SAMPLE_FORMATS)}.")
+
+    cmd = _pcm_pipe_command(video_path, sample_rate, channels, PCM_SAMPLE_FORMATS[name], start, end)
+    process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    # Drain stderr on a background thread so ffmpeg can never block on a full pipe
+    stderr_chunks = []
+    drain = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+    drain.start()
+
+    buffer = np.empty((frame_size, channels), dtype=np.dtype(name).newbyteorder("<"))
+    view = memoryview(buffer).cast("B")
+    sample_bytes = buffer.itemsize * channels
+    finished = False
+    try:
+        while True:
+            # readinto may return short reads on a pipe; fill the whole frame before yielding
+            filled = 0
+            while filled < len(view):
+                count = process.stdout.readinto(view[filled:])
+                if not count:
+                    break
+                filled += count
+
+            samples = filled // sample_bytes
+            if samples == len(buffer):
+                yield buffer
+                continue
+            if samples:
+                yield buffer[:samples]
+            break
+        finished = True
+    finally:
+        if not finished:
+            # Consumer stopped early (or raised): stop decoding
+            process.kill()
+        process.stdout.close()
+        returncode = process.wait()
+        drain.join()
+
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, output=b"", stderr=b"".join(stderr_chunks))
+
+def _pcm_pipe_command(video_path, sample_rate, channels, sample_format, start=None, end=None):
+    """Builds the ffmpeg command that decodes the first audio track to raw PCM on stdout."""
+    cmd = ["ffmpeg", "-nostdin", "-loglevel", "error"]
+    if start is not None:
+        cmd.extend(["-ss", str(start)])
+    if end is not None:
+        cmd.extend(["-to", str(end)])
+    cmd.extend([
+        "-i", str(video_path),
+        "-map", "0:a:0",
+        "-vn",
+        "-ac", str(channels),
+        "-ar", str(sample_rate),
+        "-f", sample_format,
+        # Audio decoding is cheap, so the job only gets the default thread share
+        *get_scheduler().thread_args(),
+        "pipe:1",
+    ])
+    return cmd
+
+def _audio_codec(audio_format):
+    """Determines the encoder for a requested audio format."""
+    # Unknown formats keep the historical lossless default
+    candidates = AUDIO_FORMAT_ENCODERS.get(audio_format.lower(), ("pcm_s16le",))
+    has_encoder = get_ffmpeg_capabilities().has_encoder
+    for encoder in candidates:
+        if has_encoder(encoder):
+            return encoder
+    # Let ffmpeg report the missing encoder
+    return candidates[0]
+
+def _can_copy_audio(video_path, audio_format, info=None):
+    """Checks if the first audio track of the source (probed unless info is given) can be stream-copied into audio_format."""
+    source = info
+    if source is None:
+        try:
+            source = probe(video_path)
+        except Exception:
+            return False
+    return source.audio is not None and source.audio.codec_name in AUDIO_FORMAT_CODECS.get(audio_format.lower(), ())
+
+def _to_seconds(value):
+    """Converts a timestamp (seconds or '[HH:]MM:SS[.ms]') into seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    seconds = 0.0
+    for part in str(value).strip().split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+def extract_audio_ranges(video_path, ranges, audio_format='mp3', on_progress=None):
+    """
+    Extracts several time ranges of a video's audio with a single ffmpeg process.
+    The input is opened, seeked and demuxed once; the decoded track is fanned out with
+    'asplit' and each branch is cut with 'atrim' into its own mapped output.
+
+    Args:
+        video_path (str): Path to the source video file.
+        ranges (list): (start, end, output_path) tuples. Times are seconds or "HH:MM:SS"
+                       strings; a start of None means the beginning, an end of None the end.
+        audio_format (str): Audio format of every output (see extract_audio). Ranges are cut
+                            by a filter graph, so they are always re-encoded. Defaults to 'mp3'.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+
+    Returns:
+        list: One bool per range, in the order given, True if that output was written.
+    """
+    results = [False] * len(ranges)
+
+    # Validate the ranges up front so one bad entry does not fail the whole pass
+    valid = []
+    for index, (start, end, output_path) in enumerate(ranges):
+        try:
+            start_s = _to_seconds(start) if start is not None else 0.0
+            end_s = _to_seconds(end) if end is not None else None
+        except ValueError:
+            print(f"Invalid time range {start!r}-{end!r} for {output_path}")
+            continue
+        if start_s < 0 or (end_s is not None and end_s <= start_s):
+            print(f"Invalid time range {start!r}-{end!r} for {output_path}")
+            continue
+        valid.append((index, start_s, end_s, str(output_path)))
+
+    if not valid:
+        return results
+
+    try:
+        with get_scheduler().job() as threads:
+            cmd = _extract_audio_ranges_command(video_path, valid, audio_format, threads)
+            run_ffmpeg(cmd, on_progress=on_progress)
+    except subprocess.CalledProcessError:
+        # A single unwritable output aborts the whole process, so retry the ranges
+        # one by one to find out which of them can be produced
+        print("Multi-range extraction failed, retrying ranges individually")
+        for index, start_s, end_s, output_path in valid:
+            results[index] = extract_audio(video_path, output_path, audio_format, start_s, end_s, on_progress)
+        return results
+    except Exception as e:
+        print(f"Multi-range extraction failed: {e}")
+        return results
+
+    for index, _, _, output_path in valid:
+        # A range past the end of the source produces no (or an empty) file
+        output = Path(output_path)
+        results[index] = output.exists() and output.stat().st_size > 0
+    return results
+
+def _extract_audio_ranges_command(video_path, ranges, audio_format='mp3', threads=None):
+    """Builds the single-pass ffmpeg command used by extract_audio_ranges."""
+    # Seek the input to the earliest start and stop reading after the latest end
+    base = min(start for _, start, _, _ in ranges)
+    ends = [end for _, _, end, _ in ranges]
+    input_args = ["-ss", f"{base:.3f}"] if base > 0 else []
+    if None not in ends:
+        input_args += ["-t", f"{max(ends) - base:.3f}"]
+
+    # After the input seek timestamps start at zero, so trims are relative to 'base'
+    labels = "".join(f"[s{i}]" for i in range(len(ranges)))
+    graph = [f"[0:a:0]asplit={len(ranges)}{labels}"]
+    for i, (_, start, end, _) in enumerate(ranges):
+        trim = f"atrim=start={start - base:.3f}"
+        if end is not None:
+            trim += f":end={end - base:.3f}"
+        graph.append(f"[s{i}]{trim},asetpts=PTS-STARTPTS[a{i}]")
+
+    cmd = [
+        "ffmpeg", "-y",
+        "-loglevel", "error",
+        *input_args,
+        "-i", str(video_path),
+        "-filter_complex", ";".join(graph),
+    ]
+    audio_codec = _audio_codec(audio_format)
+    thread_args = get_scheduler().thread_args(None, threads)
+    for i, (_, _, _, output_path) in enumerate(ranges):
+        cmd.extend(["-map", f"[a{i}]", "-c:a", audio_codec, *thread_args, output_path])
+    return cmd
+
 def get_default_output_path(video_path, audio_format='mp3'):
     """
     Generates a default output path for the audio file based on the video filename.
@@ -72,16 +425,17 @@ def get_default_output_path(video_path, audio_format='mp3'):
     return video_path.parent / output_filename
 
 
-def get_audio_from_video(video_path, output_path=None, audio_format='mp3', start=None, end=None):
+def get_audio_from_video(video_path, output_path=None, audio_format='mp3', start=None, end=None, on_progress=None):
     """
     High-level library entry point to extract audio from a video file with validation.
     
     Args:
         video_path (str): Path to the input video file.
         output_path (str, optional): Custom path for the output file. If None, uses default.
-        audio_format (str): Target format, either 'mp3' or 'wav'. Defaults to 'mp3'.
+        audio_format (str): Target format ('mp3', 'm4a', 'aac', 'opus', 'flac' or 'wav'). Defaults to 'mp3'.
         start (float/str, optional): Start timestamp for the audio segment.
         end (float/str, optional): End timestamp for the audio segment.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
         
     Returns:
         bool: True if extraction was successful and validated, False otherwise.
@@ -98,9 +452,11 @@ def get_audio_from_video(video_path, output_path=None, audio_format='mp3', start
     output_path = validate_and_get_output_path(video_path, output_path, audio_format)
     
     # Proceed with the actual extraction process
-    return extract_audio(video_path, str(output_path), audio_format, start, end)
+    return extract_audio(video_path, str(output_path), audio_format, start, end, on_progress)
 
-def chunk_video_adaptive(video_path, output_dir=None, resolutions=None, segment_duration=10):
+def chunk_video_adaptive(video_path, output_dir=None, resolutions=None, segment_duration=10, on_progress=None, ladder_policy=None, single_process=False,
+                         progressive=False, on_segment=None, on_master=None, segment_type="mpegts", dash=False, single_file=False,
+                         journal=None):
     """
     Segments a video into HLS chunks at multiple resolutions for adaptive bitrate streaming.
     Supports both local files and network URLs.
@@ -112,10 +468,48 @@ def chunk_video_adaptive(video_path, output_dir=None, resolutions=None, segment_
         resolutions (list, optional): List of target resolutions (e.g., ['360p', '720p']). 
                                      Defaults to ['360p', '720p', '1080p'].
         segment_duration (int): Target length of each HLS segment in seconds. Defaults to 10.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+        ladder_policy (str, optional): 'drop' skips variants taller than the source and 'clamp'
+                                       replaces them with one at the source height. Either way
+                                       bitrates are capped at the source bitrate. Defaults to None.
+        single_process (bool): If True, one ffmpeg process decodes the source once, scales it
+                               for every variant through a 'split' filter graph and encodes the
+                               audio a single time into a shared audio rendition group.
+                               Defaults to False (one full encode per variant).
+        progressive (bool): If True, writes EVENT playlists and publishes output while encoding:
+                            the master playlist is written before the first segment and every
+                            segment is reported as soon as it is complete, so playback can start
+                            after about one segment. Implies single_process. Defaults to False.
+        on_segment (callable, optional): Progressive mode only. Called as
+                                         on_segment(variant, segment_path, playlist_path) for each
+                                         finished segment; 'variant' is a resolution key or 'audio'.
+        on_master (callable, optional): Progressive mode only. Called with the master playlist
+                                        path once it has been written.
+        segment_type (str): 'mpegts' writes .ts segments. 'fmp4' writes CMAF segments (.m4s)
+                            with one 'init_<variant>.mp4' init segment per variant, which DASH
+                            players can also consume. Defaults to 'mpegts'.
+        dash (bool): If True, also writes 'manifest.mpd' referencing the same fMP4 segments
+                     (implies segment_type='fmp4'). Combine with single_process so audio is a
+                     separate rendition, as most DASH players expect. Defaults to False.
+        single_file (bool): If True, each variant is written as one 'media.ts' / 'media.m4s' file
+                            whose segments are addressed with EXT-X-BYTERANGE ('single_file' HLS
+                            flag), instead of one file per segment. Cannot be combined with
+                            progressive. Defaults to False.
+        journal (JobJournal, optional): Records finished variants and segments so a restarted
+                                        job skips them and an interrupted variant resumes at its
+                                        last complete segment (keyframes are forced on segment
+                                        boundaries). Only supported in the default per-variant
+                                        mode; combined with single_process, progressive or
+                                        single_file the call fails instead of re-encoding.
         
     Returns:
         dict or False: A dictionary metadata about generated manifests and segments on success,
-                      or False if processing failed.
+                      or False if processing failed. 'skipped' lists variants left out by the
+                      ladder policy. In single-process mode 'audio' describes the shared audio
+                      rendition (None for silent sources). 'dash_manifest' is the MPD path, or
+                      None when no MPD was written. In single-file mode every variant lists its
+                      'media_file' and 'byte_ranges' ((offset, length) per segment) instead of
+                      'segment_count'.
     """
     try:
         # Check for ffmpeg availability
@@ -124,15 +518,7 @@ def chunk_video_adaptive(video_path, output_dir=None, resolutions=None, segment_
         
         # Resolve output directory naming
         video_path_str = str(video_path)
-        if output_dir is None:
-            # Clean up URL parameters if present to get a clean base filename
-            base_name = Path(video_path_str.split('?')[0]).stem or 'video'
-            output_dir = Path(f"{base_name}_chunks")
-        else:
-            output_dir = Path(output_dir)
-        
-        # Create output root directory
-        output_dir.mkdir(parents=True, exist_ok=True)
+        output_dir = _resolve_hls_output_dir(video_path_str, output_dir)
         
         # Initialize default resolutions if none provided
         if resolutions is None:
@@ -143,75 +529,581 @@ def chunk_video_adaptive(video_path, output_dir=None, resolutions=None, segment_
             if res not in RESOLUTION_PROFILES:
                 return False
         
+        # Drop or clamp variants the source cannot fill
+        resolutions, profiles, skipped = _plan_hls_profiles(video_path_str, resolutions, ladder_policy)
+        
+        # DASH can only describe fragmented MP4 segments
+        if dash:
+            segment_type = "fmp4"
+        if segment_type not in HLS_SEGMENT_EXTENSIONS:
+            return False
+        
+        # Progressive publishing hands out finished files, which a growing single file never is
+        if single_file and progressive:
+            print("single_file cannot be combined with progressive output.")
+            return False
+        
+        # Segment-level resume needs one playlist per process and one file per segment
+        if journal is not None and (single_process or progressive or single_file):
+            print("journal is only supported for per-variant output with one file per segment.")
+            return False
+        
+        if single_process or progressive:
+            return _chunk_video_single_process(
+                video_path_str, output_dir, resolutions, profiles, segment_duration, on_progress, skipped,
+                progressive, on_segment, on_master, segment_type, dash, single_file
+            )
+        
         variants = {}
         
         # Iterate through each resolution to generate specific HLS variants
         for res_key in resolutions:
-            profile = RESOLUTION_PROFILES[res_key]
-            
             # Organize each resolution into its own subdirectory
             res_dir = output_dir / res_key
             res_dir.mkdir(exist_ok=True)
             
-            manifest_path = res_dir / "playlist.m3u8"
-            segment_pattern = str(res_dir / "segment_%03d.ts")
-            
-            # Setup the processing stream for this specific resolution
-            stream = ffmpeg.input(video_path_str)
-            
-            # Apply scaling filters to match target resolution
-            stream = ffmpeg.filter(stream, 'scale', profile['width'], profile['height'])
-            
-            # Configure HLS output parameters
-            stream = ffmpeg.output(
-                stream,
-                str(manifest_path),
-                format='hls',
-                start_number=0,
-                hls_time=segment_duration,
-                hls_playlist_type='vod',
-                hls_segment_filename=segment_pattern,
-                hls_base_url=f"{res_key}/",  # Relative path for sub-playlists
-                vcodec='h264',               # Use industry standard H.264
-                acodec='aac',                # High quality AAC audio
-                video_bitrate=profile['video_bitrate'],
-                audio_bitrate=profile['audio_bitrate'],
-                preset='fast',               # Balance between speed and efficiency
-                pix_fmt='yuv420p',
-                loglevel='quiet'
+            _encode_hls_variant(
+                video_path_str, res_dir, res_key, profiles[res_key], segment_duration,
+                segment_type, single_file, on_progress, journal
             )
             
-            # Run the ffmpeg process
-            ffmpeg.run(stream, overwrite_output=True, quiet=True)
-            
-            # Verify and count segments for this variant
-            segments = list(res_dir.glob("segment_*.ts"))
-            
-            variants[res_key] = {
-                'manifest': manifest_path,
-                'segments_dir': res_dir,
-                'segment_count': len(segments)
-            }
+            variants[res_key] = _hls_variant_info(res_dir, single_file)
         
         # Create the top-level master manifest linking all variants together
         master_manifest = output_dir / "master.m3u8"
-        _write_master_playlist(master_manifest, resolutions, variants)
+        _write_master_playlist(master_manifest, resolutions, variants, profiles)
+        
+        # Describe the very same segments for DASH clients
+        dash_manifest = write_dash_manifest(output_dir / "manifest.mpd", output_dir, resolutions, profiles) if dash else None
         
         return {
             'master_manifest': master_manifest,
             'output_dir': output_dir,
-            'variants': variants
+            'variants': variants,
+            'skipped': skipped,
+            'dash_manifest': dash_manifest
         }
         
     except ImportError:
         return False
-    except ffmpeg.Error:
+    except subprocess.CalledProcessError:
+        return False
+    except Exception:
+        return False
+
+
+def package_hls_from_renditions(renditions, output_dir, segment_duration=10, segment_type="mpegts", dash=False, on_progress=None):
+    """
+    Packages already-encoded renditions (e.g. the '{name}_{res}p.mp4' files written by
+    convert_video_resolutions_concurrent) into HLS by stream copy, without re-encoding.
+    Each file is probed for its resolution and bitrate, segmented with '-c copy' and
+    referenced from a master playlist, so the cost is bounded by I/O.
+    
+    Segments can only start on existing keyframes, so for seamless switching the
+    renditions should share keyframe positions (e.g. a fixed GOP or forced keyframes).
+    
+    Args:
+        renditions (list or dict): Rendition file paths, or a dict mapping variant names to paths.
+                                   List entries are named after their height (e.g. '720p').
+        output_dir (str): Target directory for the playlists and segments.
+        segment_duration (int): Target length of each segment in seconds. Defaults to 10.
+        segment_type (str): 'mpegts' or 'fmp4', as in chunk_video_adaptive. Defaults to 'mpegts'.
+        dash (bool): If True, also writes 'manifest.mpd' (implies segment_type='fmp4').
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+        
+    Returns:
+        dict or False: Same layout as chunk_video_adaptive ('master_manifest', 'output_dir',
+                       'variants', 'dash_manifest'), or False if any rendition failed.
+    """
+    try:
+        if not validate_ffmpeg():
+            return False
+        
+        if dash:
+            segment_type = "fmp4"
+        if segment_type not in HLS_SEGMENT_EXTENSIONS:
+            return False
+        
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Unnamed renditions are named after their height once probed
+        items = renditions.items() if isinstance(renditions, dict) else [(None, path) for path in renditions]
+        
+        # Probe every rendition and derive the master playlist attributes from it
+        profiles = {}
+        sources = {}
+        for key, path in items:
+            info = probe(path)
+            if info.video is None:
+                print(f"Cannot package {path}: no video stream.")
+                return False
+            
+            name = f"{info.height}p" if key is None else str(key)
+            # Identical heights (e.g. two bitrates at 720p) get a numeric suffix
+            base_name, suffix = name, 2
+            while name in profiles:
+                name = f"{base_name}_{suffix}"
+                suffix += 1
+            
+            profiles[name] = {
+                'width': info.width,
+                'height': info.height,
+                'bandwidth': _rendition_bandwidth(info),
+            }
+            sources[name] = str(path)
+        
+        # Lowest rendition first, as players pick the first entry to start with
+        resolutions = sorted(profiles, key=lambda k: (profiles[k]['height'], profiles[k]['bandwidth']))
+        
+        variants = {}
+        for name in resolutions:
+            res_dir = output_dir / name
+            res_dir.mkdir(exist_ok=True)
+            run_ffmpeg(_hls_copy_command(sources[name], res_dir, name, segment_duration, segment_type), on_progress=on_progress)
+            variants[name] = _hls_variant_info(res_dir)
+        
+        master_manifest = output_dir / "master.m3u8"
+        _write_master_playlist(master_manifest, resolutions, variants, profiles)
+        
+        dash_manifest = write_dash_manifest(output_dir / "manifest.mpd", output_dir, resolutions, profiles) if dash else None
+        
+        return {
+            'master_manifest': master_manifest,
+            'output_dir': output_dir,
+            'variants': variants,
+            'dash_manifest': dash_manifest
+        }
+        
+    except subprocess.CalledProcessError:
         return False
     except Exception:
         return False
 
 
-def _write_master_playlist(master_path, resolutions, variants):
+def _rendition_bandwidth(info):
+    """Estimates the BANDWIDTH attribute (bit/s) of a finished rendition, with 10% headroom for peaks."""
+    bit_rate = info.bit_rate or sum(s.bit_rate or 0 for s in info.streams)
+    if not bit_rate and info.size and info.duration:
+        bit_rate = info.size * 8 / info.duration
+    return int(bit_rate * 1.1)
+
+
+def _hls_copy_command(path, res_dir, name, segment_duration, segment_type="mpegts"):
+    """Builds the ffmpeg command that segments one encoded rendition by stream copy."""
+    cmd = [
+        "ffmpeg", "-y",
+        "-loglevel", "error",
+        "-i", path,
+        "-map", "0:v:0",
+        "-map", "0:a:0?",
+        "-c", "copy",                   # Remux only; cuts land on the existing keyframes
+        "-f", "hls",
+        "-start_number", "0",
+        "-hls_time", str(segment_duration),
+        "-hls_playlist_type", "vod",
+    ]
+    if segment_type == "fmp4":
+        cmd.extend(["-hls_segment_type", "fmp4", "-hls_fmp4_init_filename", f"init_{name}.mp4"])
+    cmd.extend([
+        "-hls_segment_filename", str(res_dir / f"segment_%03d{HLS_SEGMENT_EXTENSIONS[segment_type]}"),
+        str(res_dir / "playlist.m3u8"),
+    ])
+    return cmd
+
+
+def _encode_hls_variant(video_path_str, res_dir, res_key, profile, segment_duration, segment_type="mpegts", single_file=False,
+                        on_progress=None, journal=None):
+    """
+    Encodes one HLS variant, skipping or resuming it according to the job journal.
+    While encoding, every progress report records the segments ffmpeg has closed so far.
+    """
+    unit = f"variant:{res_key}"
+    segments_unit = f"segments:{res_key}"
+    playlist_path = res_dir / "playlist.m3u8"
+    
+    if journal is not None and journal.is_done(unit) and playlist_path.exists():
+        return
+    
+    # Segments finished by an interrupted run, up to the first one missing on disk
+    done = []
+    if journal is not None:
+        for uri, duration in journal.get(segments_unit, []):
+            if not (res_dir / Path(uri).name).exists():
+                break
+            done.append((uri, duration))
+    
+    start_number = len(done)
+    start_time = sum(duration for _, duration in done)
+    if start_number:
+        print(f"Resuming {res_key} at segment {start_number} ({start_time:.1f}s).")
+        # Drop the stale playlist and everything after the last complete segment
+        if playlist_path.exists():
+            playlist_path.unlink()
+        for path in res_dir.glob("segment_*"):
+            index = path.stem.split("_")[-1]
+            if index.isdigit() and int(index) >= start_number:
+                path.unlink()
+    
+    report = on_progress
+    if journal is not None:
+        recorded = start_number
+        
+        # Closed segments are listed in the playlist ffmpeg renames into place after each one
+        # ('temp_file'); only complete #EXTINF/URI pairs are parsed, so no truncated entry
+        # can reach the journal
+        def report(event):
+            nonlocal recorded
+            playlist = read_media_playlist(playlist_path)
+            if playlist is not None and start_number + len(playlist['segments']) > recorded:
+                segments = done + [(uri, duration) for uri, duration, _ in playlist['segments']]
+                journal.mark_done(segments_unit, segments)
+                recorded = len(segments)
+            if on_progress is not None:
+                on_progress(event)
+    
+    # Each variant encode waits for its share of the CPU budget
+    with get_scheduler().job() as threads:
+        cmd = _hls_variant_command(
+            video_path_str, res_dir, res_key, profile, segment_duration, threads, segment_type, single_file,
+            start_number, start_time, journal is not None
+        )
+        
+        # Run the ffmpeg process
+        run_ffmpeg(cmd, on_progress=report)
+    
+    if start_number:
+        # The resumed run only listed its own segments; stitch the full playlist back together
+        playlist = read_media_playlist(playlist_path) or {'init': None, 'segments': []}
+        segments = done + [(uri, duration) for uri, duration, _ in playlist['segments']]
+        write_media_playlist(playlist_path, segments, playlist['init'])
+    
+    if journal is not None:
+        journal.mark_done(unit)
+        journal.discard(segments_unit)
+
+
+def _plan_hls_profiles(video_path_str, resolutions, ladder_policy=None):
+    """
+    Applies a ladder policy to HLS resolution keys.
+    
+    Returns:
+        tuple: (resolution keys, profiles by key, skipped keys). Without a policy the
+               keys are unchanged and the profiles come straight from RESOLUTION_PROFILES.
+    """
+    profiles = {res_key: RESOLUTION_PROFILES[res_key] for res_key in resolutions}
+    if ladder_policy is None:
+        return list(resolutions), profiles, []
+    
+    rungs = [(key, profiles[key]['height'], profiles[key]['video_bitrate']) for key in resolutions]
+    plan = plan_ladder(video_path_str, rungs, ladder_policy)
+    
+    keys = []
+    planned = {}
+    for key, height, bitrate in plan.rungs:
+        if key is None:
+            # Clamped rung: take the source height and its aspect ratio, with even dimensions
+            key = f"{height}p"
+            # Only skipped variants can be clamped; start from the smallest of them
+            base = RESOLUTION_PROFILES[min(plan.skipped, key=lambda k: RESOLUTION_PROFILES[k]['height'])]
+            width = round(plan.source_width * height / plan.source_height / 2) * 2 if plan.source_height else base['width']
+            profile = dict(base, width=width, height=height)
+        else:
+            profile = dict(profiles[key])
+        
+        # Scale the advertised bandwidth with the capped video bitrate
+        audio_kbps = parse_kbps(profile['audio_bitrate'])
+        ratio = (parse_kbps(bitrate) + audio_kbps) / (parse_kbps(profile['video_bitrate']) + audio_kbps)
+        profile['bandwidth'] = int(profile['bandwidth'] * ratio)
+        profile['video_bitrate'] = bitrate
+        
+        keys.append(key)
+        planned[key] = profile
+    
+    return keys, planned, plan.skipped
+
+
+def _chunk_video_single_process(video_path_str, output_dir, resolutions, profiles, segment_duration, on_progress=None, skipped=(),
+                                progressive=False, on_segment=None, on_master=None, segment_type="mpegts", dash=False, single_file=False):
+    """
+    Encodes every HLS variant from one ffmpeg process (see chunk_video_adaptive).
+    
+    Returns:
+        dict: Same layout as chunk_video_adaptive, plus 'audio'.
+    """
+    # Silent sources cannot feed an audio group; unprobeable ones are assumed to have audio
+    try:
+        with_audio = probe(video_path_str).audio is not None
+    except Exception:
+        with_audio = True
+    
+    for res_key in resolutions:
+        (output_dir / res_key).mkdir(exist_ok=True)
+    if with_audio:
+        (output_dir / HLS_AUDIO_GROUP).mkdir(exist_ok=True)
+    
+    master_manifest = output_dir / "master.m3u8"
+    audio_group = HLS_AUDIO_GROUP if with_audio else None
+    report = on_progress
+    
+    if progressive:
+        # The master only references playlist paths, so it can be published before any segment
+        _write_master_playlist(master_manifest, resolutions, {}, profiles, audio_group)
+        if on_master is not None:
+            on_master(master_manifest)
+        
+        names = list(resolutions) + ([HLS_AUDIO_GROUP] if with_audio else [])
+        published = {name: -1 for name in names}
+        
+        # Every ffmpeg progress report (about twice a second) doubles as a playlist poll
+        def report(event):
+            _publish_new_segments(output_dir, published, on_segment)
+            if on_progress is not None:
+                on_progress(event)
+    
+    scheduler = get_scheduler()
+    
+    # One process runs every video encoder, so it reserves one slot per variant
+    with scheduler.job(slots=len(resolutions)) as threads:
+        cmd = _hls_ladder_command(
+            video_path_str, output_dir, resolutions, profiles, segment_duration,
+            max(1, threads // len(resolutions)), with_audio, "event" if progressive else "vod", segment_type, single_file
+        )
+        run_ffmpeg(cmd, on_progress=report)
+    
+    if progressive:
+        # The final segments are only listed once ffmpeg closes the playlists
+        _publish_new_segments(output_dir, published, on_segment)
+    
+    variants = {res_key: _hls_variant_info(output_dir / res_key, single_file) for res_key in resolutions}
+    audio = _hls_variant_info(output_dir / HLS_AUDIO_GROUP, single_file) if with_audio else None
+    
+    if not progressive:
+        _write_master_playlist(master_manifest, resolutions, variants, profiles, audio_group)
+    
+    dash_manifest = None
+    if dash:
+        audio_bandwidth = parse_kbps(_shared_audio_bitrate(resolutions, profiles)) * 1000
+        dash_manifest = write_dash_manifest(output_dir / "manifest.mpd", output_dir, resolutions, profiles, audio_group, audio_bandwidth)
+    
+    return {
+        'master_manifest': master_manifest,
+        'output_dir': output_dir,
+        'variants': variants,
+        'audio': audio,
+        'skipped': list(skipped),
+        'dash_manifest': dash_manifest
+    }
+
+
+def _publish_new_segments(output_dir, published, on_segment=None):
+    """
+    Reports segments that appeared in the variant playlists since the last call.
+    ffmpeg only lists a segment once it is closed, so every listed segment is complete.
+    
+    Args:
+        output_dir (Path): HLS output root containing one directory per variant.
+        published (dict): Number of segments already reported per variant, or -1 before the
+                          first poll; updated in place.
+        on_segment (callable, optional): Called as on_segment(variant, segment_path, playlist_path).
+                                         fMP4 init segments are reported before the first segment.
+    """
+    for name, count in published.items():
+        playlist_path = output_dir / name / "playlist.m3u8"
+        # Not written yet; with 'temp_file' ffmpeg renames finished playlists into place,
+        # and the reader drops any unterminated last line should a partial one slip through
+        playlist = read_media_playlist(playlist_path)
+        if playlist is None:
+            continue
+        
+        segments = [uri for uri, _, _ in playlist['segments']]
+        if not segments:
+            continue
+        
+        if count < 0:
+            count = 0
+            if playlist['init'] and on_segment is not None:
+                on_segment(name, output_dir / name / Path(playlist['init']).name, playlist_path)
+        
+        for uri in segments[count:]:
+            if on_segment is not None:
+                on_segment(name, output_dir / name / uri, playlist_path)
+        published[name] = max(count, len(segments))
+
+
+def _shared_audio_bitrate(resolutions, profiles):
+    """Bitrate of the shared audio rendition: the best audio quality of any variant."""
+    return max((profiles[k]['audio_bitrate'] for k in resolutions), key=parse_kbps)
+
+
+def _hls_ladder_command(video_path_str, output_dir, resolutions, profiles, segment_duration, threads=None, with_audio=True, playlist_type="vod",
+                        segment_type="mpegts", single_file=False):
+    """
+    Builds the single ffmpeg command that produces every HLS variant at once.
+    The source is decoded once, split into one scaler per variant and muxed by a single
+    HLS muxer; '-var_stream_map' routes each stream to its own '<name>/playlist.m3u8'.
+    """
+    count = len(resolutions)
+    
+    # Decode once, then fan the frames out to one scaler per variant
+    split_labels = "".join(f"[s{i}]" for i in range(count))
+    graph = [f"[0:v:0]split={count}{split_labels}"]
+    for i, res_key in enumerate(resolutions):
+        profile = profiles[res_key]
+        graph.append(f"[s{i}]scale={profile['width']}:{profile['height']}[v{i}]")
+    
+    cmd = [
+        "ffmpeg", "-y",
+        "-loglevel", "error",
+        "-i", video_path_str,
+        "-filter_complex", ";".join(graph),
+    ]
+    
+    stream_map = []
+    for i, res_key in enumerate(resolutions):
+        cmd.extend([
+            "-map", f"[v{i}]",
+            f"-c:v:{i}", "h264",                            # Same codec as the per-variant mode
+            f"-b:v:{i}", profiles[res_key]['video_bitrate'],
+        ])
+        stream_map.append(f"v:{i},agroup:{HLS_AUDIO_GROUP},name:{res_key}" if with_audio else f"v:{i},name:{res_key}")
+    
+    if with_audio:
+        # Audio is encoded once at the best requested quality and shared by every variant
+        cmd.extend(["-map", "0:a:0", "-c:a", "aac", "-b:a", _shared_audio_bitrate(resolutions, profiles)])
+        stream_map.append(f"a:0,agroup:{HLS_AUDIO_GROUP},name:{HLS_AUDIO_GROUP}")
+    
+    cmd.extend([
+        "-preset", "fast",
+        "-pix_fmt", "yuv420p",
+        # Keyframes on segment boundaries keep every variant switchable at each segment
+        "-force_key_frames", f"expr:gte(t,n_forced*{segment_duration})",
+        *get_scheduler().thread_args("h264", threads),
+        "-f", "hls",
+        "-start_number", "0",
+        "-hls_time", str(segment_duration),
+        "-hls_playlist_type", playlist_type,
+    ])
+    if segment_type == "fmp4":
+        # Init segments land next to each variant playlist as 'init_<variant>.mp4'
+        cmd.extend(["-hls_segment_type", "fmp4", "-hls_fmp4_init_filename", "init_%v.mp4"])
+    if single_file:
+        # One media file per variant; the init segment (fMP4) is stored at its start
+        cmd.extend(["-hls_flags", "single_file"])
+    else:
+        # Segments and playlists are written as '.tmp' and renamed when complete, so a poll
+        # never sees a half-written playlist or a listed segment that is still growing
+        cmd.extend(["-hls_flags", "temp_file"])
+    cmd.extend([
+        "-hls_segment_filename", str(output_dir / "%v" / _hls_segment_filename(segment_type, single_file)),
+        "-var_stream_map", " ".join(stream_map),
+        str(output_dir / "%v" / "playlist.m3u8"),
+    ])
+    return cmd
+
+
+def _resolve_hls_output_dir(video_path_str, output_dir=None):
+    """Resolves (and creates) the HLS output root, defaulting to '<video_name>_chunks'."""
+    if output_dir is None:
+        # Clean up URL parameters if present to get a clean base filename
+        base_name = Path(video_path_str.split('?')[0]).stem or 'video'
+        output_dir = Path(f"{base_name}_chunks")
+    else:
+        output_dir = Path(output_dir)
+    
+    # Create output root directory
+    output_dir.mkdir(parents=True, exist_ok=True)
+    return output_dir
+
+
+def _hls_segment_filename(segment_type="mpegts", single_file=False):
+    """File name (or numbered pattern) of a variant's media segments."""
+    extension = HLS_SEGMENT_EXTENSIONS[segment_type]
+    return f"{HLS_SINGLE_FILE_NAME}{extension}" if single_file else f"segment_%03d{extension}"
+
+
+def _hls_variant_command(video_path_str, res_dir, res_key, profile, segment_duration, threads=None, segment_type="mpegts", single_file=False,
+                         start_number=0, start_time=0.0, force_keyframes=False):
+    """
+    Builds the ffmpeg command that encodes and segments one HLS variant.
+    A non-zero start_number/start_time continues an interrupted variant: the input is
+    seeked to start_time and output timestamps are shifted so the segments line up.
+    """
+    manifest_path = res_dir / "playlist.m3u8"
+    segment_pattern = str(res_dir / _hls_segment_filename(segment_type, single_file))
+    
+    # CMAF output needs an init segment next to the playlist
+    segment_kwargs = {}
+    if segment_type == "fmp4":
+        segment_kwargs = {'hls_segment_type': 'fmp4', 'hls_fmp4_init_filename': f"init_{res_key}.mp4"}
+    if single_file:
+        segment_kwargs['hls_flags'] = 'single_file'
+    else:
+        # Playlists and segments are renamed into place once complete, so progress polls
+        # never read a half-written playlist
+        segment_kwargs['hls_flags'] = 'temp_file'
+    if force_keyframes:
+        # Cuts land exactly on segment multiples, so a resumed run continues seamlessly
+        segment_kwargs['force_key_frames'] = f"expr:gte(t,n_forced*{segment_duration})"
+    if start_time:
+        segment_kwargs['output_ts_offset'] = f"{start_time:.6f}"
+    
+    # Setup the processing stream for this specific resolution
+    stream = ffmpeg.input(video_path_str, **({'ss': f"{start_time:.6f}"} if start_time else {}))
+    
+    # Apply scaling filters to match target resolution
+    stream = ffmpeg.filter(stream, 'scale', profile['width'], profile['height'])
+    
+    # Configure HLS output parameters
+    stream = ffmpeg.output(
+        stream,
+        str(manifest_path),
+        format='hls',
+        start_number=start_number,
+        hls_time=segment_duration,
+        hls_playlist_type='vod',
+        hls_segment_filename=segment_pattern,
+        hls_base_url=f"{res_key}/",  # Relative path for sub-playlists
+        vcodec='h264',               # Use industry standard H.264
+        acodec='aac',                # High quality AAC audio
+        video_bitrate=profile['video_bitrate'],
+        audio_bitrate=profile['audio_bitrate'],
+        preset='fast',               # Balance between speed and efficiency
+        pix_fmt='yuv420p',
+        loglevel='quiet',
+        **segment_kwargs,
+        **get_scheduler().thread_kwargs('h264', threads)
+    )
+    return ffmpeg.compile(stream, overwrite_output=True)
+
+
+def _hls_variant_info(res_dir, single_file=False):
+    """Collects the metadata of a finished variant from its directory."""
+    if single_file:
+        # Segments are byte ranges of one file, so report their offsets rather than a count
+        playlist = read_media_playlist(res_dir / "playlist.m3u8") or {'segments': [], 'init_range': None}
+        media_files = [p for p in res_dir.glob(f"{HLS_SINGLE_FILE_NAME}.*") if p.suffix in (".ts", ".m4s")]
+        return {
+            'manifest': res_dir / "playlist.m3u8",
+            'segments_dir': res_dir,
+            'media_file': media_files[0] if media_files else None,
+            'init_range': playlist['init_range'],
+            'byte_ranges': [byte_range for _, _, byte_range in playlist['segments'] if byte_range]
+        }
+    
+    # Verify and count segments for this variant (MPEG-TS or fMP4)
+    segments = [p for p in res_dir.glob("segment_*") if p.suffix in (".ts", ".m4s")]
+    init_segments = list(res_dir.glob("init_*.mp4"))
+    
+    return {
+        'manifest': res_dir / "playlist.m3u8",
+        'segments_dir': res_dir,
+        'segment_count': len(segments),
+        'init_segment': init_segments[0] if init_segments else None
+    }
+
+
+def _write_master_playlist(master_path, resolutions, variants, profiles=None, audio_group=None):
     """
     Generates a master M3U8 HLS playlist that references all resolution variants.
     
@@ -219,11 +1111,22 @@ def _write_master_playlist(master_path, resolutions, variants):
         master_path (Path): Path to the master manifest file.
         resolutions (list): List of resolution identifiers.
         variants (dict): Dictionary containing details about generated variants.
+        profiles (dict, optional): Profiles by resolution identifier. Defaults to RESOLUTION_PROFILES.
+        audio_group (str, optional): Directory of a shared audio rendition that every
+                                     variant references instead of carrying its own audio.
     """
+    profiles = profiles or RESOLUTION_PROFILES
     lines = ["#EXTM3U"] # M3U Header
     
+    if audio_group:
+        # Declare the shared audio rendition once; variants point at it via AUDIO=
+        lines.append(
+            f"#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID=\"{audio_group}\",NAME=\"{audio_group}\","
+            f"DEFAULT=YES,AUTOSELECT=YES,URI=\"{audio_group}/playlist.m3u8\""
+        )
+    
     for res_key in resolutions:
-        profile = RESOLUTION_PROFILES[res_key]
+        profile = profiles[res_key]
         # Calculate relative path to the specific variant playlist
         variant_path = f"{res_key}/playlist.m3u8"
         
@@ -233,6 +1136,7 @@ def _write_master_playlist(master_path, resolutions, variants):
             f"BANDWIDTH={profile['bandwidth']},"
             f"RESOLUTION={profile['width']}x{profile['height']},"
             f"NAME=\"{res_key}\""
+            + (f",AUDIO=\"{audio_group}\"" if audio_group else "")
         )
         # Add the path to the variant itself
         lines.append(variant_path)
@@ -241,7 +1145,7 @@ def _write_master_playlist(master_path, resolutions, variants):
     master_path.write_text('\n'.join(lines) + '\n')
 
 
-def chunk_video_single(video_path, output_dir=None, resolution='720p', segment_duration=10):
+def chunk_video_single(video_path, output_dir=None, resolution='720p', segment_duration=10, on_progress=None):
     """
     A simplified version of adaptive chunking that processes only a single resolution.
     
@@ -250,6 +1154,7 @@ def chunk_video_single(video_path, output_dir=None, resolution='720p', segment_d
         output_dir (str, optional): Target directory for output.
         resolution (str): The desired resolution key (e.g., '1080p'). Defaults to '720p'.
         segment_duration (int): Duration for segments in seconds. Defaults to 10.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
         
     Returns:
         dict or False: Metadata for the single variant on success, False on failure.
@@ -259,7 +1164,8 @@ def chunk_video_single(video_path, output_dir=None, resolution='720p', segment_d
         video_path=video_path,
         output_dir=output_dir,
         resolutions=[resolution],
-        segment_duration=segment_duration
+        segment_duration=segment_duration,
+        on_progress=on_progress
     )
     
     if result:
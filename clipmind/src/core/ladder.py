@@ -0,0 +1,151 @@
+"""
+Source-aware pruning of resolution ladders.
+Reads the height, bitrate and frame rate of the source once (via the cached probe)
+and removes renditions that would only be upscaled copies of it, or clamps them to
+the source height. Every kept rung has its bitrate capped at what the source carries;
+scaling bitrates down for low frame rates is available as an explicit opt-in.
+"""
+from .probe import probe
+
+# Supported values for the 'ladder_policy' argument of the transcoding functions
+LADDER_POLICIES = ("drop", "clamp")
+
+# Bitrate tables assume ~30 fps; with scale_for_fps, slower sources get proportionally fewer bits
+REFERENCE_FPS = 30.0
+# Never scale a bitrate below this fraction for low frame rates
+MIN_FPS_FACTOR = 0.5
+
+
+class LadderPlan:
+    """
+    Result of planning a ladder against a source.
+
+    'rungs' holds (name, height, video_bitrate) tuples in the requested order. The
+    name of a rung that was clamped to the source height is None, so callers can
+    name it after its new height. 'skipped' lists the names of dropped rungs.
+    """
+    __slots__ = ("rungs", "skipped", "source_width", "source_height", "source_bitrate", "source_fps")
+
+    def __init__(self, rungs, skipped=(), source_width=None, source_height=None, source_bitrate=None, source_fps=None):
+        self.rungs = list(rungs)
+        self.skipped = list(skipped)
+        self.source_width = source_width        # Pixels, None if unknown
+        self.source_height = source_height      # Pixels, None if unknown
+        self.source_bitrate = source_bitrate    # Video kbit/s, None if unknown
+        self.source_fps = source_fps            # Frames per second, None if unknown
+
+    def __repr__(self):
+        return f"LadderPlan(rungs={self.rungs}, skipped={self.skipped}, source_height={self.source_height})"
+
+
+class RenditionResults(dict):
+    """
+    Outputs of a ladder encode: maps each encoded height (int) to its output path, or None
+    if that rendition failed. 'skipped' lists the requested heights a ladder policy left
+    out, so the mapping itself only ever holds heights.
+    """
+
+    def __init__(self, results=(), skipped=()):
+        super().__init__(results)
+        self.skipped = list(skipped)
+
+    def __repr__(self):
+        return f"RenditionResults({dict.__repr__(self)}, skipped={self.skipped})"
+
+
+def parse_kbps(bitrate):
+    """Converts bitrate strings such as '2500k' or '5M' (or plain bit/s numbers) into kbit/s."""
+    value = str(bitrate).strip().lower()
+    if value.endswith("k"):
+        return float(value[:-1])
+    if value.endswith("m"):
+        return float(value[:-1]) * 1000
+    return float(value) / 1000
+
+
+def _source_video_kbps(info):
+    """Video bitrate of the source in kbit/s, estimated from the container if the stream has none."""
+    if info.video.bit_rate:
+        return info.video.bit_rate / 1000
+    if info.bit_rate:
+        # Container bitrate includes audio; subtract what the audio streams declare
+        audio = sum(s.bit_rate or 0 for s in info.audio_streams)
+        return max(info.bit_rate - audio, 0) / 1000 or None
+    return None
+
+
+def cap_bitrate(bitrate, source_kbps=None, source_fps=None):
+    """
+    Caps a rung's bitrate at the source bitrate, optionally scaling it down for low frame rates.
+
+    Args:
+        bitrate (str): The rung's nominal bitrate (e.g., '2500k').
+        source_kbps (float, optional): Video bitrate of the source in kbit/s.
+        source_fps (float, optional): Frame rate of the source. Only when given is the bitrate
+                                      scaled by source_fps / REFERENCE_FPS (never below
+                                      MIN_FPS_FACTOR). Defaults to None (no scaling).
+
+    Returns:
+        str: The effective bitrate, formatted like '1800k'.
+    """
+    kbps = parse_kbps(bitrate)
+    if source_fps:
+        kbps *= max(MIN_FPS_FACTOR, min(1.0, source_fps / REFERENCE_FPS))
+    if source_kbps:
+        kbps = min(kbps, source_kbps)
+    return f"{max(int(kbps), 1)}k"
+
+
+def plan_ladder(input_file, rungs, policy="drop", scale_for_fps=False):
+    """
+    Prunes a ladder so no rung is taller than the source.
+
+    Args:
+        input_file (str): Source path or URL, probed for height, bitrate and frame rate.
+        rungs (list): (name, height, video_bitrate) tuples as requested by the caller.
+        policy (str): 'drop' removes rungs above the source height. 'clamp' replaces
+                      them with a single rung at the source height (unless one exists).
+        scale_for_fps (bool): If True, bitrates are also scaled down for sources below
+                              REFERENCE_FPS (e.g. 24/25 fps). Defaults to False.
+
+    Returns:
+        LadderPlan: The rungs to encode and the names of the skipped ones. If the source
+                    cannot be probed, the ladder is returned unchanged.
+    """
+    if policy not in LADDER_POLICIES:
+        raise ValueError(f"Unknown ladder policy '{policy}'. Expected one of {LADDER_POLICIES}.")
+
+    try:
+        info = probe(input_file)
+    except Exception as e:
+        print(f"Ladder policy ignored, source could not be probed: {e}")
+        return LadderPlan(rungs)
+
+    if info.video is None or not info.height:
+        return LadderPlan(rungs)
+
+    # Encoders need even dimensions, so a clamped rung uses the nearest even height
+    source_height = info.height - info.height % 2
+    source_kbps = _source_video_kbps(info)
+    source_fps = info.video.frame_rate
+    # Frame-rate scaling is opt-in; by default only the source bitrate caps a rung
+    scaling_fps = source_fps if scale_for_fps else None
+
+    planned = []
+    skipped = []
+    clamped = None
+    for name, height, bitrate in rungs:
+        if height <= source_height:
+            planned.append((name, height, cap_bitrate(bitrate, source_kbps, scaling_fps)))
+            continue
+
+        skipped.append(name)
+        print(f"Skipping {height}p rendition: source is only {info.height}p.")
+        # Clamp keeps the lowest of the oversized rungs' bitrates for the source-height rung
+        if policy == "clamp" and (clamped is None or parse_kbps(bitrate) < parse_kbps(clamped[2])):
+            clamped = (None, source_height, bitrate)
+
+    if clamped is not None and all(height != source_height for _, height, _ in planned):
+        planned.append((None, source_height, cap_bitrate(clamped[2], source_kbps, scaling_fps)))
+
+    return LadderPlan(planned, skipped, info.width, info.height, source_kbps, source_fps)
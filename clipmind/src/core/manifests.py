@@ -0,0 +1,246 @@
+"""
+Reading HLS media playlists and writing DASH manifests for clipmind's HLS output.
+With fMP4 (CMAF) segments the same init and media segments can be described by both
+an HLS master playlist and a DASH MPD, so each rendition is encoded and stored once.
+"""
+from pathlib import Path
+
+from .probe import probe
+
+# Attribute values of the MPD root element
+DASH_NAMESPACE = "urn:mpeg:dash:schema:mpd:2011"
+DASH_PROFILE = "urn:mpeg:dash:profile:isoff-main:2011"
+
+# RFC 6381 profile/constraint bytes for the H.264 profiles ffprobe reports
+H264_PROFILE_CODES = {
+    "Constrained Baseline": "42E0",
+    "Baseline": "4200",
+    "Main": "4D40",
+    "High": "6400",
+}
+
+
+def parse_media_playlist(text):
+    """
+    Parses an HLS media playlist.
+
+    Args:
+        text (str): Contents of a variant playlist (.m3u8).
+
+    Returns:
+        dict: 'init' (URI of the EXT-X-MAP init segment or None), 'init_range' ((offset, length)
+              of the init segment inside a single-file variant, or None), 'segments' (list of
+              (uri, duration, byte_range) tuples in playback order, byte_range being
+              (offset, length) or None) and 'ended' (True once EXT-X-ENDLIST is present).
+    """
+    init = None
+    init_range = None
+    segments = []
+    ended = False
+    duration = 0.0
+    byte_range = None
+    next_offset = 0
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith("#EXT-X-MAP:"):
+            # e.g. #EXT-X-MAP:URI="init_360p.mp4"
+            # or #EXT-X-MAP:URI="media.m4s",BYTERANGE="812@0" for single-file variants
+            for attribute in line[len("#EXT-X-MAP:"):].split(","):
+                key, _, value = attribute.partition("=")
+                if key.strip() == "URI":
+                    init = value.strip().strip('"')
+                elif key.strip() == "BYTERANGE":
+                    init_range = _parse_byte_range(value.strip().strip('"'), 0)
+        elif line.startswith("#EXTINF:"):
+            # e.g. #EXTINF:10.010000,
+            try:
+                duration = float(line[len("#EXTINF:"):].split(",", 1)[0])
+            except ValueError:
+                duration = 0.0
+        elif line.startswith("#EXT-X-BYTERANGE:"):
+            # e.g. #EXT-X-BYTERANGE:75232@0; without '@' the range follows the previous one
+            byte_range = _parse_byte_range(line[len("#EXT-X-BYTERANGE:"):], next_offset)
+            next_offset = sum(byte_range)
+        elif line == "#EXT-X-ENDLIST":
+            ended = True
+        elif not line.startswith("#"):
+            segments.append((line, duration, byte_range))
+            duration = 0.0
+            byte_range = None
+
+    return {'init': init, 'init_range': init_range, 'segments': segments, 'ended': ended}
+
+
+def _parse_byte_range(value, default_offset):
+    """Parses '<length>[@<offset>]' into an (offset, length) tuple."""
+    length, _, offset = value.partition("@")
+    return (int(offset) if offset else default_offset, int(length))
+
+
+def read_media_playlist(playlist_path):
+    """
+    Reads and parses an HLS media playlist from disk.
+    A playlist may be read while ffmpeg is still writing it, so a trailing line without
+    its newline is ignored rather than parsed as a truncated tag or URI.
+
+    Returns:
+        dict or None: The result of parse_media_playlist, or None if the file cannot be read.
+    """
+    try:
+        text = Path(playlist_path).read_text()
+    except OSError:
+        return None
+    return parse_media_playlist(text[:text.rfind("\n") + 1])
+
+
+def write_media_playlist(playlist_path, segments, init=None, ended=True, playlist_type="VOD"):
+    """
+    Writes an HLS media playlist for segments stored next to it.
+    Used to stitch the playlist of a resumed variant back together.
+
+    Args:
+        playlist_path (Path): Destination of the playlist.
+        segments (list): (uri, duration) or (uri, duration, byte_range) tuples in playback order.
+        init (str, optional): URI of the fMP4 init segment.
+        ended (bool): If True, appends EXT-X-ENDLIST.
+        playlist_type (str): Value of EXT-X-PLAYLIST-TYPE ('VOD' or 'EVENT').
+    """
+    durations = [segment[1] for segment in segments]
+    lines = [
+        "#EXTM3U",
+        # fMP4 segments (EXT-X-MAP) need protocol version 7
+        f"#EXT-X-VERSION:{7 if init else 3}",
+        f"#EXT-X-TARGETDURATION:{int(max(durations, default=0) + 0.999)}",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+        f"#EXT-X-PLAYLIST-TYPE:{playlist_type}",
+    ]
+    if init:
+        lines.append(f'#EXT-X-MAP:URI="{init}"')
+    for segment in segments:
+        lines.append(f"#EXTINF:{segment[1]:.6f},")
+        lines.append(segment[0])
+    if ended:
+        lines.append("#EXT-X-ENDLIST")
+
+    playlist_path = Path(playlist_path)
+    tmp_path = playlist_path.with_name(f"{playlist_path.name}.tmp")
+    tmp_path.write_text("\n".join(lines) + "\n")
+    tmp_path.replace(playlist_path)
+
+
+def _codec_string(stream):
+    """Builds the RFC 6381 'codecs' value for a probed stream, or None if unknown."""
+    if stream.codec_name == "h264" and stream.profile in H264_PROFILE_CODES and stream.level:
+        return f"avc1.{H264_PROFILE_CODES[stream.profile]}{stream.level:02X}"
+    if stream.codec_name == "aac":
+        # AAC-LC, which is what ffmpeg's native encoder produces
+        return "mp4a.40.2"
+    return None
+
+
+def _representation_codecs(init_path):
+    """Reads the codecs of a rendition from its init segment (None if it cannot be probed)."""
+    try:
+        info = probe(init_path)
+    except Exception:
+        return None
+    codecs = [_codec_string(s) for s in info.streams]
+    return ",".join(c for c in codecs if c) or None
+
+
+def _range_attribute(name, byte_range):
+    """Formats an (offset, length) tuple as a DASH byte-range attribute (inclusive end)."""
+    if byte_range is None:
+        return ""
+    offset, length = byte_range
+    return f' {name}="{offset}-{offset + length - 1}"'
+
+
+def _segment_list(name, playlist):
+    """Builds the SegmentList lines for one rendition, with paths relative to the MPD."""
+    lines = ['      <SegmentList timescale="1000">']
+    if playlist['init']:
+        lines.append(
+            f'        <Initialization sourceURL="{name}/{Path(playlist["init"]).name}"'
+            f'{_range_attribute("range", playlist["init_range"])}/>'
+        )
+    lines.append('        <SegmentTimeline>')
+    for _, duration, _ in playlist['segments']:
+        lines.append(f'          <S d="{int(round(duration * 1000))}"/>')
+    lines.append('        </SegmentTimeline>')
+    for uri, _, byte_range in playlist['segments']:
+        # Single-file variants address every segment as a byte range of the same file
+        lines.append(f'        <SegmentURL media="{name}/{Path(uri).name}"{_range_attribute("mediaRange", byte_range)}/>')
+    lines.append('      </SegmentList>')
+    return lines
+
+
+def write_dash_manifest(mpd_path, output_dir, resolutions, profiles, audio_group=None, audio_bandwidth=128000):
+    """
+    Writes a static DASH MPD that references the fMP4 segments of an HLS output.
+    Segment durations are taken from the variant playlists, so the MPD and the HLS
+    manifests always describe exactly the same files.
+
+    Args:
+        mpd_path (Path): Destination of the manifest (usually inside output_dir).
+        output_dir (Path): HLS output root with one '<variant>/playlist.m3u8' per rendition.
+        resolutions (list): Variant names (resolution keys) in ladder order.
+        profiles (dict): Resolution profiles by variant name (width, height, bandwidth).
+        audio_group (str, optional): Name of a shared audio rendition directory. Without it
+                                     the video renditions are expected to carry their own audio.
+        audio_bandwidth (int): Bandwidth of the shared audio rendition in bit/s.
+
+    Returns:
+        Path or None: The manifest path, or None if a playlist is missing or not fMP4.
+    """
+    output_dir = Path(output_dir)
+    playlists = {}
+    for name in list(resolutions) + ([audio_group] if audio_group else []):
+        playlist = read_media_playlist(output_dir / name / "playlist.m3u8")
+        # DASH needs an init segment; MPEG-TS output cannot be described
+        if playlist is None or not playlist['init'] or not playlist['segments']:
+            return None
+        playlists[name] = playlist
+
+    duration = sum(d for _, d, _ in playlists[resolutions[0]]['segments'])
+
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<MPD xmlns="{DASH_NAMESPACE}" profiles="{DASH_PROFILE}" type="static" '
+        f'mediaPresentationDuration="PT{duration:.3f}S" minBufferTime="PT2S">',
+        '  <Period id="0" start="PT0S">',
+        '    <AdaptationSet id="0" contentType="video" mimeType="video/mp4" segmentAlignment="true">',
+    ]
+    for name in resolutions:
+        profile = profiles[name]
+        playlist = playlists[name]
+        codecs = _representation_codecs(output_dir / name / Path(playlist['init']).name)
+        lines.append(
+            f'      <Representation id="{name}" bandwidth="{profile["bandwidth"]}" '
+            f'width="{profile["width"]}" height="{profile["height"]}"'
+            + (f' codecs="{codecs}"' if codecs else '') + '>'
+        )
+        lines.extend("  " + line for line in _segment_list(name, playlist))
+        lines.append('      </Representation>')
+    lines.append('    </AdaptationSet>')
+
+    if audio_group:
+        playlist = playlists[audio_group]
+        codecs = _representation_codecs(output_dir / audio_group / Path(playlist['init']).name)
+        lines.append('    <AdaptationSet id="1" contentType="audio" mimeType="audio/mp4" segmentAlignment="true">')
+        lines.append(
+            f'      <Representation id="{audio_group}" bandwidth="{int(audio_bandwidth)}"'
+            + (f' codecs="{codecs}"' if codecs else '') + '>'
+        )
+        lines.extend("  " + line for line in _segment_list(audio_group, playlist))
+        lines.append('      </Representation>')
+        lines.append('    </AdaptationSet>')
+
+    lines.extend(['  </Period>', '</MPD>'])
+
+    mpd_path = Path(mpd_path)
+    mpd_path.write_text("\n".join(lines) + "\n")
+    return mpd_path
@@ -0,0 +1,178 @@
+"""
+Cache of preprocessed overlay images.
+Watermarks and logos are scaled to their target size once, with their opacity baked
+into the alpha channel, and stored as PNG under the clipmind cache directory keyed by
+a hash of the image content and the parameters. Overlay graphs then read a ready-made
+still once instead of looping the source image and running format/colorchannelmixer
+on every frame of every video. Animated images (GIF, APNG, animated WebP) are never
+cached, since a single still would freeze them on their first frame.
+"""
+import hashlib
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from ..utils.cache import get_cache_dir
+
+# Bumped whenever the preprocessing changes, so stale assets are not reused
+ASSET_VERSION = 1
+
+# Content hashes by (path, size, mtime), so a hot watermark is only read once per process
+_content_hashes = {}
+_hash_lock = threading.Lock()
+
+
+def _content_hash(image_path):
+    """SHA-1 of an image file, memoised on its path, size and mtime."""
+    real_path = os.path.realpath(image_path)
+    stat = os.stat(real_path)
+    key = (real_path, stat.st_size, stat.st_mtime_ns)
+    with _hash_lock:
+        digest = _content_hashes.get(key)
+    if digest is None:
+        with open(real_path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        with _hash_lock:
+            _content_hashes[key] = digest
+    return digest
+
+
+def _gif_frame_count(data):
+    """Counts the image descriptors of a GIF by walking its block structure."""
+    if len(data) < 13:
+        return 0
+    pos = 13
+    if data[10] & 0x80:
+        # Global colour table of 3 * 2^(N+1) bytes
+        pos += 3 * (2 << (data[10] & 0x07))
+    frames = 0
+    while pos < len(data):
+        block = data[pos]
+        if block == 0x3B:       # Trailer
+            break
+        if block == 0x21:       # Extension: label, then data sub-blocks
+            pos += 2
+        elif block == 0x2C:     # Image descriptor, optional local colour table, LZW code size
+            frames += 1
+            if frames > 1:
+                return frames
+            if pos + 10 > len(data):
+                break
+            flags = data[pos + 9]
+            pos += 10
+            if flags & 0x80:
+                pos += 3 * (2 << (flags & 0x07))
+            pos += 1
+        else:
+            break
+        # Skip the data sub-blocks up to the zero-length terminator
+        while pos < len(data) and data[pos]:
+            pos += data[pos] + 1
+        pos += 1
+    return frames
+
+
+def is_animated_image(image_path):
+    """
+    Tells whether an image file holds more than one frame (animated GIF, APNG or WebP).
+
+    Args:
+        image_path (str): Path to the image.
+
+    Returns:
+        bool: True for animated images, False for stills and unknown formats.
+    """
+    with open(image_path, "rb") as f:
+        data = f.read()
+    if data.startswith((b"GIF87a", b"GIF89a")):
+        return _gif_frame_count(data) > 1
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        # APNG declares its animation control chunk before the first image data
+        idat = data.find(b"IDAT")
+        actl = data.find(b"acTL")
+        return actl != -1 and (idat == -1 or actl < idat)
+    if data[:4] == b"RIFF" and data[8:16] == b"WEBPVP8X" and len(data) > 20:
+        # Extended WebP header: bit 1 of the feature flags marks an animation
+        return bool(data[20] & 0x02)
+    return False
+
+
+def _target_size(width, height, size):
+    """Resolves the output size, keeping the aspect ratio when one side is None."""
+    target_w, target_h = size
+    if target_w is None and target_h is None:
+        return width, height
+    if target_w is None:
+        target_w = max(1, round(width * target_h / height))
+    elif target_h is None:
+        target_h = max(1, round(height * target_w / width))
+    return int(target_w), int(target_h)
+
+
+def prepare_overlay_asset(image_path, size=None, opacity=1.0, cache_dir=None):
+    """
+    Returns a cached overlay PNG scaled to size with the opacity applied to its alpha channel.
+
+    Args:
+        image_path (str): Source image (PNG/JPG, with or without alpha).
+        size (tuple, optional): Target (width, height) in pixels; either may be None to keep
+                                the aspect ratio. Defaults to the image's own size.
+        opacity (float): Transparency to bake in (0.0 to 1.0). Defaults to 1.0.
+        cache_dir (str, optional): Directory of the cached assets. Defaults to the
+                                   'overlays' folder of the clipmind cache.
+
+    Returns:
+        str: Path of the preprocessed RGBA PNG.
+
+    Raises:
+        FileNotFoundError: If the image does not exist.
+        ValueError: If the image is animated or cannot be decoded.
+        OSError: If the cache directory cannot be written.
+    """
+    if not os.path.exists(image_path):
+        raise FileNotFoundError(f"Overlay image not found: {image_path}")
+    if is_animated_image(image_path):
+        raise ValueError(f"Animated overlay images are not cached: {image_path}")
+
+    size = tuple(size) if size else (None, None)
+    opacity = min(max(float(opacity), 0.0), 1.0)
+    key = hashlib.sha1(
+        f"{ASSET_VERSION}|{_content_hash(image_path)}|{size[0]}x{size[1]}|{opacity:.4f}".encode("utf-8")
+    ).hexdigest()
+
+    directory = cache_dir or get_cache_dir("overlays")
+    os.makedirs(directory, exist_ok=True)
+    asset_path = os.path.join(directory, f"{key}.png")
+    if os.path.exists(asset_path):
+        return asset_path
+
+    image = cv2.imread(str(image_path), cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise ValueError(f"Could not decode overlay image: {image_path}")
+
+    # Normalise to 8-bit BGRA
+    if image.dtype == np.uint16:
+        image = (image >> 8).astype(np.uint8)
+    if image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGRA)
+    elif image.shape[2] == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+
+    height, width = image.shape[:2]
+    target_w, target_h = _target_size(width, height, size)
+    if (target_w, target_h) != (width, height):
+        # Area averaging for downscales avoids aliasing in thin logo strokes
+        shrinking = target_w * target_h < width * height
+        image = cv2.resize(image, (target_w, target_h), interpolation=cv2.INTER_AREA if shrinking else cv2.INTER_CUBIC)
+
+    if opacity < 1.0:
+        image[:, :, 3] = (image[:, :, 3].astype(np.float32) * opacity + 0.5).astype(np.uint8)
+
+    # Write under a temporary name so concurrent workers never read a partial PNG
+    tmp_path = os.path.join(directory, f"{key}.{os.getpid()}.{threading.get_ident()}.tmp.png")
+    if not cv2.imwrite(tmp_path, image):
+        raise ValueError(f"Could not write overlay asset for {image_path}")
+    os.replace(tmp_path, asset_path)
+    return asset_path
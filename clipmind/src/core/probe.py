@@ -0,0 +1,390 @@
+"""
+Single-call media probing for clipmind.
+Runs ffprobe once per asset with '-show_format -show_streams' and exposes the
+result as a typed MediaInfo object. Results are kept in an in-process LRU cache
+keyed by path, size and mtime, optionally backed by a RedisStore, so a pipeline
+pays for one probe per asset no matter how many steps need its metadata.
+"""
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+DEFAULT_CACHE_SIZE = 256
+# Seconds read on either side of a window when listing keyframes (longer than typical GOPs)
+KEYFRAME_SCAN_MARGIN = 30.0
+
+_cache: "OrderedDict[str, MediaInfo]" = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_size = DEFAULT_CACHE_SIZE
+_default_store = None
+
+
+class ProbeError(RuntimeError):
+    """Raised when ffprobe cannot read the structure of a media file."""
+
+
+def _parse_rate(value) -> Optional[float]:
+    """Converts ffprobe rationals such as '30000/1001' into floats."""
+    if not value:
+        return None
+    try:
+        if "/" in str(value):
+            num, den = str(value).split("/", 1)
+            return float(num) / float(den) if float(den) else None
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _parse_int(value) -> Optional[int]:
+    """Converts ffprobe numeric strings into ints, tolerating 'N/A'."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_float(value) -> Optional[float]:
+    """Converts ffprobe numeric strings into floats, tolerating 'N/A'."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class StreamInfo:
+    """
+    Metadata for one elementary stream (video, audio, subtitle, ...) of a media file.
+    """
+    __slots__ = (
+        "index", "codec_type", "codec_name", "profile", "level", "width", "height",
+        "pix_fmt", "frame_rate", "frame_rate_fraction", "time_base", "bit_rate", "sample_rate", "channels",
+        "channel_layout", "language", "is_default", "is_attached_pic", "tags",
+    )
+
+    def __init__(self, data: Dict[str, Any]) -> None:
+        tags = data.get("tags") or {}
+        disposition = data.get("disposition") or {}
+
+        self.index: int = int(data.get("index", 0))
+        self.codec_type: str = data.get("codec_type", "")
+        self.codec_name: str = data.get("codec_name", "")
+        self.profile: Optional[str] = data.get("profile")
+        self.level: Optional[int] = _parse_int(data.get("level"))
+        self.width: int = _parse_int(data.get("width")) or 0
+        self.height: int = _parse_int(data.get("height")) or 0
+        self.pix_fmt: Optional[str] = data.get("pix_fmt")
+        # Prefer the average rate; r_frame_rate can be a field rate for interlaced content
+        rate_key = "avg_frame_rate" if _parse_rate(data.get("avg_frame_rate")) else "r_frame_rate"
+        self.frame_rate: Optional[float] = _parse_rate(data.get(rate_key))
+        # The same rate as ffprobe's exact fraction (e.g. '30000/1001'), for filters and signatures
+        self.frame_rate_fraction: Optional[str] = data.get(rate_key) if self.frame_rate else None
+        self.time_base: Optional[str] = data.get("time_base")
+        self.bit_rate: Optional[int] = _parse_int(data.get("bit_rate"))
+        self.sample_rate: Optional[int] = _parse_int(data.get("sample_rate"))
+        self.channels: Optional[int] = _parse_int(data.get("channels"))
+        self.channel_layout: Optional[str] = data.get("channel_layout")
+        self.language: Optional[str] = tags.get("language")
+        self.is_default: bool = bool(disposition.get("default"))
+        self.is_attached_pic: bool = bool(disposition.get("attached_pic"))
+        self.tags: Dict[str, str] = dict(tags)
+
+    def __repr__(self) -> str:
+        return f"StreamInfo(index={self.index}, codec_type={self.codec_type!r}, codec_name={self.codec_name!r})"
+
+
+class MediaInfo:
+    """
+    Container-level metadata plus every stream of a probed media file.
+    """
+    __slots__ = ("path", "format_name", "duration", "size", "bit_rate", "start_time", "streams", "tags", "warnings")
+
+    def __init__(self, path: str, data: Dict[str, Any], warnings: str = "") -> None:
+        fmt = data.get("format") or {}
+
+        self.path: str = path
+        self.format_name: str = fmt.get("format_name", "")
+        self.duration: float = _parse_float(fmt.get("duration")) or 0.0
+        self.size: Optional[int] = _parse_int(fmt.get("size"))
+        self.bit_rate: Optional[int] = _parse_int(fmt.get("bit_rate"))
+        self.start_time: float = _parse_float(fmt.get("start_time")) or 0.0
+        self.streams: List[StreamInfo] = [StreamInfo(s) for s in data.get("streams", [])]
+        self.tags: Dict[str, str] = dict(fmt.get("tags") or {})
+        # Non-fatal ffprobe diagnostics (e.g. 'Invalid data found ...')
+        self.warnings: str = warnings
+
+    @property
+    def video_streams(self) -> List[StreamInfo]:
+        """All video streams, excluding attached pictures such as cover art."""
+        return [s for s in self.streams if s.codec_type == "video" and not s.is_attached_pic]
+
+    @property
+    def audio_streams(self) -> List[StreamInfo]:
+        """All audio streams in file order."""
+        return [s for s in self.streams if s.codec_type == "audio"]
+
+    @property
+    def video(self) -> Optional[StreamInfo]:
+        """The first video stream, or None for audio-only files."""
+        streams = self.video_streams
+        return streams[0] if streams else None
+
+    @property
+    def audio(self) -> Optional[StreamInfo]:
+        """The first audio stream, or None for silent files."""
+        streams = self.audio_streams
+        return streams[0] if streams else None
+
+    @property
+    def width(self) -> int:
+        """Width of the first video stream in pixels (0 if there is none)."""
+        return self.video.width if self.video else 0
+
+    @property
+    def height(self) -> int:
+        """Height of the first video stream in pixels (0 if there is none)."""
+        return self.video.height if self.video else 0
+
+    def __repr__(self) -> str:
+        return f"MediaInfo(path={self.path!r}, format_name={self.format_name!r}, duration={self.duration}, streams={len(self.streams)})"
+
+
+def configure_probe_cache(store=None, maxsize: Optional[int] = None) -> None:
+    """
+    Configures the shared probe cache.
+
+    Args:
+        store (RedisStore, optional): Second-level cache shared between processes and hosts.
+                                      Pass None to disable the Redis layer.
+        maxsize (int, optional): Number of entries kept in the in-process LRU cache.
+    """
+    global _default_store, _cache_size
+    _default_store = store
+    if maxsize is not None:
+        with _cache_lock:
+            _cache_size = max(0, int(maxsize))
+            while len(_cache) > _cache_size:
+                _cache.popitem(last=False)
+
+
+def clear_probe_cache() -> None:
+    """Drops every entry from the in-process probe cache."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _cache_key(path: str) -> Optional[str]:
+    """
+    Builds a content key from the resolved path, size and mtime.
+    Returns None for URLs and other inputs that cannot be stat'ed.
+    """
+    try:
+        real_path = os.path.realpath(path)
+        stat = os.stat(real_path)
+    except (OSError, ValueError):
+        return None
+    return f"{real_path}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def _store_key(key: str) -> str:
+    """Redis key for a cache key, hashed to keep it short and safe."""
+    return "probe:" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def _cache_get(key: Optional[str], store) -> Optional[MediaInfo]:
+    """Looks a key up in the LRU cache, then in the Redis store."""
+    if key is None:
+        return None
+
+    with _cache_lock:
+        info = _cache.get(key)
+        if info is not None:
+            _cache.move_to_end(key)
+            return info
+
+    if store is not None:
+        try:
+            cached = store.get(_store_key(key))
+        except Exception:
+            cached = None
+        if cached:
+            info = MediaInfo(cached["path"], cached["data"], cached.get("warnings", ""))
+            _cache_put(key, info, None)
+            return info
+
+    return None
+
+
+def _cache_put(key: Optional[str], info: MediaInfo, store, data: Optional[Dict[str, Any]] = None) -> None:
+    """Records a probe result in the LRU cache and, if given raw data, in the Redis store."""
+    if key is None:
+        return
+
+    with _cache_lock:
+        if _cache_size > 0:
+            _cache[key] = info
+            _cache.move_to_end(key)
+            while len(_cache) > _cache_size:
+                _cache.popitem(last=False)
+
+    if store is not None and data is not None:
+        try:
+            store.set(_store_key(key), {"path": info.path, "data": data, "warnings": info.warnings})
+        except Exception:
+            # The Redis layer is an optimisation only; never fail a probe because of it
+            pass
+
+
+def probe_command(path) -> List[str]:
+    """
+    ffprobe invocation that reads format and stream metadata in one pass.
+    Lets callers run ffprobe their own way (e.g. asynchronously) and hand the
+    output to record_probe_output.
+
+    Args:
+        path (str/Path): Local path or URL of the media file.
+
+    Returns:
+        list: The full command line, starting with the executable.
+    """
+    return [
+        "ffprobe",
+        "-v", "error",       # Only report real problems on stderr
+        "-show_format",      # Container-level details (duration, bitrate, ...)
+        "-show_streams",     # Every elementary stream
+        "-of", "json",       # Parseable output
+        str(path)
+    ]
+
+
+def cached_probe(path, store=None) -> Optional[MediaInfo]:
+    """
+    Looks a file up in the probe caches without running ffprobe.
+
+    Args:
+        path (str/Path): Local path or URL of the media file.
+        store (RedisStore, optional): Redis-backed cache to consult.
+                                      Defaults to the store set via configure_probe_cache.
+
+    Returns:
+        MediaInfo: The cached metadata, or None on a cache miss.
+    """
+    store = store if store is not None else _default_store
+    return _cache_get(_cache_key(str(path)), store)
+
+
+def record_probe_output(path, returncode: int, stdout: str, stderr: str, store=None) -> MediaInfo:
+    """
+    Turns the output of a probe_command run into a MediaInfo and caches it.
+
+    Args:
+        path (str/Path): The file that was probed.
+        returncode (int): ffprobe exit code.
+        stdout (str): ffprobe standard output (JSON).
+        stderr (str): ffprobe standard error.
+        store (RedisStore, optional): Redis-backed cache to populate.
+                                      Defaults to the store set via configure_probe_cache.
+
+    Returns:
+        MediaInfo: The parsed metadata.
+
+    Raises:
+        ProbeError: If ffprobe exited with an error.
+        json.JSONDecodeError: If ffprobe output is garbled.
+    """
+    path = str(path)
+    store = store if store is not None else _default_store
+    if returncode != 0:
+        raise ProbeError(stderr.strip() or "Unknown binary parsing error.")
+
+    data = json.loads(stdout)
+    info = MediaInfo(path, data, stderr.strip())
+    _cache_put(_cache_key(path), info, store, data)
+    return info
+
+
+def probe(path, store=None, timeout: Optional[float] = None, use_cache: bool = True) -> MediaInfo:
+    """
+    Reads the format and stream metadata of a media file with a single ffprobe call.
+
+    Args:
+        path (str/Path): Local path or URL of the media file.
+        store (RedisStore, optional): Redis-backed cache to consult and populate.
+                                      Defaults to the store set via configure_probe_cache.
+        timeout (float, optional): Seconds to wait for ffprobe before giving up.
+        use_cache (bool): If False, always runs ffprobe and refreshes the cache.
+
+    Returns:
+        MediaInfo: The parsed metadata.
+
+    Raises:
+        ProbeError: If ffprobe reports the file as unreadable.
+        json.JSONDecodeError: If ffprobe output cannot be parsed.
+        subprocess.TimeoutExpired: If ffprobe exceeds the timeout.
+    """
+    path = str(path)
+
+    if use_cache:
+        info = cached_probe(path, store)
+        if info is not None:
+            return info
+
+    result = subprocess.run(
+        probe_command(path),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        timeout=timeout
+    )
+    return record_probe_output(path, result.returncode, result.stdout, result.stderr, store)
+
+
+def keyframe_times(path, start: Optional[float] = None, end: Optional[float] = None, timeout: Optional[float] = None) -> List[float]:
+    """
+    Lists the keyframe timestamps of the first video stream without decoding.
+    Only packet flags are read, and with start/end only the packets around that
+    window, so the cost does not grow with the length of the file.
+
+    Times are relative to the container start_time, the same clock ffmpeg uses
+    for -ss, -t and filter timestamps, so they can be used as cut points directly.
+
+    Args:
+        path (str/Path): Local path or URL of the media file.
+        start (float, optional): Seconds; keyframes well before this may be skipped.
+        end (float, optional): Seconds; reading stops shortly after this.
+        timeout (float, optional): Seconds to wait for ffprobe before giving up.
+
+    Returns:
+        list: Sorted keyframe presentation times in seconds from the start of the file.
+
+    Raises:
+        ProbeError: If ffprobe cannot read the file.
+    """
+    # Packet timestamps and read intervals are absolute; streams often start above zero
+    origin = probe(path, timeout=timeout).start_time
+
+    cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0"]
+    if start is not None or end is not None:
+        # ffprobe seeks to the keyframe before the interval start, so one GOP of margin is enough
+        interval_start = "" if start is None else f"{max(start - KEYFRAME_SCAN_MARGIN, 0) + origin:.3f}"
+        interval_end = "" if end is None else f"{end + KEYFRAME_SCAN_MARGIN + origin:.3f}"
+        cmd.extend(["-read_intervals", f"{interval_start}%{interval_end}"])
+    cmd.append(str(path))
+
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=timeout)
+    if result.returncode != 0:
+        raise ProbeError(result.stderr.strip() or f"ffprobe exited with code {result.returncode}")
+
+    times = set()
+    for line in result.stdout.splitlines():
+        # e.g. '12.345000,K__' ('N/A' for packets without a timestamp)
+        pts_time, _, flags = line.strip().partition(",")
+        if flags.startswith("K"):
+            number = _parse_float(pts_time)
+            if number is not None:
+                times.add(round(number - origin, 6))
+    return sorted(times)
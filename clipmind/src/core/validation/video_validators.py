@@ -2,10 +2,12 @@ import subprocess
 import os
 import json
 
+from ..probe import probe, ProbeError
+
 def validate_video(video_path: str = ""):
     """
     Extends basic file validation by performing deep analysis of the video's internal structure.
-    Uses ffprobe to detect corruption, invalid streams, or potentially malicious file headers.
+    Uses the shared ffprobe cache to detect corruption, invalid streams, or potentially malicious file headers.
     
     Args:
         video_path (str): The absolute or relative path to the video file.
@@ -26,63 +28,34 @@ def validate_video(video_path: str = ""):
     if os.path.getsize(video_path) == 0:
         return False, "Validation failed: File is zero bytes (corrupt)."
         
-    # Prepare probe command to extract JSON metadata about the stream
-    cmd = [
-        'ffprobe',
-        '-v', 'error',          # Suppress decorative output
-        '-show_streams',        # Extract stream-level details
-        '-select_streams', 'v', # Focus specifically on video streams
-        '-of', 'json',          # Format output as parseable JSON
-        video_path
-    ]
-
     try:
-        # Run ffprobe with a conservative timeout to prevent hangs on malformed files
-        result = subprocess.run(
-            cmd, 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE, 
-            text=True,
-            timeout=15
-        )
+        # Probe once (or reuse a cached probe) with a conservative timeout to prevent hangs
+        info = probe(video_path, timeout=15)
+
+        # A valid video must contain at least one visual stream channel
+        video_stream = info.video
+        if video_stream is None:
+            return False, "Security warning: No video stream detected. File may be mislabeled or malicious."
         
-        # Non-zero exit code usually indicates severe corruption or incompatible format
-        if result.returncode != 0:
-            error_msg = result.stderr.strip()
-            if not error_msg:
-                error_msg = "Unknown binary parsing error."
-            return False, f"Structural validation failed: {error_msg}"
-            
-        try:
-            # Parse the probe results
-            data = json.loads(result.stdout)
-            streams = data.get('streams', [])
+        # Check for essential metadata that should always be present in valid files
+        if not video_stream.codec_name:
+            return False, "Validation failed: Missing or invalid codec identifiers."
             
-            # A valid video must contain at least one visual stream channel
-            if not streams:
-                return False, "Security warning: No video stream detected. File may be mislabeled or malicious."
-            
-            video_stream = streams[0]
-            codec_name = video_stream.get('codec_name', '')
-            width = video_stream.get('width', 0)
-            
-            # Check for essential metadata that should always be present in valid files
-            if not codec_name:
-                return False, "Validation failed: Missing or invalid codec identifiers."
-                
-            if width == 0:
-                return False, "Validation failed: Corrupted video resolution metadata."
-
-        except json.JSONDecodeError:
-            # Handle cases where ffprobe output itself is garbled (extremely rare)
-            return False, "Validation failed: Internal structure is unreadable."
+        if video_stream.width == 0:
+            return False, "Validation failed: Corrupted video resolution metadata."
             
         # Catch warnings that don't trigger non-zero exit codes but indicate partial corruption
-        if result.stderr and "Invalid data" in result.stderr:
-             return False, f"Integrity warning: File contains corrupted segments. {result.stderr[:100]}"
+        if info.warnings and "Invalid data" in info.warnings:
+             return False, f"Integrity warning: File contains corrupted segments. {info.warnings[:100]}"
 
         return True, "Video file passed all structural and integrity checks."
 
+    except ProbeError as e:
+        # Non-zero exit code usually indicates severe corruption or incompatible format
+        return False, f"Structural validation failed: {e}"
+    except json.JSONDecodeError:
+        # Handle cases where ffprobe output itself is garbled (extremely rare)
+        return False, "Validation failed: Internal structure is unreadable."
     except subprocess.TimeoutExpired:
         # Protect against "zip bombs" or infinite-loop media headers
         return False, "Validation timeout: File header may be malformed or excessively complex."
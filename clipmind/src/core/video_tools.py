@@ -8,7 +8,16 @@ from pathlib import Path
 import subprocess
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import random
+import threading
+import math
+import shutil
 from ..utils.ai_utils import VULNERABILITY_PROMPT, VIDEO_SUMMARIZATION_PROMPT, SUBTITLE_GENERATION_PROMPT
+from ..utils.scheduler import get_scheduler
+from ..utils.capabilities import get_ffmpeg_capabilities
+from ..utils.progress import run_ffmpeg
+from .probe import probe, keyframe_times
+from .ladder import plan_ladder, RenditionResults
+from .overlay_assets import prepare_overlay_asset
 import json
 import re
 
@@ -42,7 +51,7 @@ def get_preset_for_resolution(res):
         return "fast"
     # High resolutions use 'medium' to balance file size and quality
     return "medium"
-def process_single_resolution(input_file, res, output_dir, encoder="libx264"):
+def process_single_resolution(input_file, res, output_dir, encoder="libx264", on_progress=None, bitrate=None):
     """
     Internal helper function that performs the actual transcoding for a single resolution.
     
@@ -51,6 +60,8 @@ def process_single_resolution(input_file, res, output_dir, encoder="libx264"):
         res (int/str): The target resolution height (e.g., 720 or "720p").
         output_dir (str): The directory where the resulting video will be stored.
         encoder (str): The H.264 encoder to be used for the conversion. Defaults to "libx264".
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+        bitrate (str, optional): Target video bitrate overriding bitrate_map (e.g., a source-capped rate).
         
     Returns:
         str: The path to the newly generated video file.
@@ -59,39 +70,424 @@ def process_single_resolution(input_file, res, output_dir, encoder="libx264"):
     res_int = int(str(res).replace("p", ""))
     
     # Retrieve target bitrate and encoding preset
-    bitrate = bitrate_map.get(res_int, "1500k")
+    bitrate = bitrate or bitrate_map.get(res_int, "1500k")
     preset = get_preset_for_resolution(res_int)
     
     # Construct formatting for output filename
     filename = os.path.splitext(os.path.basename(input_file))[0]
     output_path = os.path.join(output_dir, f"{filename}_{res_int}p.mp4")
     
-    # Construct the raw ffmpeg command for maximum control
-    command = [
-        "ffmpeg",
-        "-y",                   # Overwrite output files without asking
-        "-i", input_file,       # Input file
-        "-map", "0:v:0",        # Map the first video stream
-        "-map", "0:a:0?",       # Map the first audio stream if it exists
-        "-vf", f"scale=-2:{res_int}", # Scale preserving aspect ratio (must be even)
-        "-c:v", encoder,        # Video codec
-        "-preset", preset,      # Encoding speed/quality preset
-        "-b:v", bitrate,        # Target video bitrate
-        "-movflags", "+faststart", # Move metadata to start for faster web playback
-        "-c:a", "copy",         # Copy audio directly without re-encoding
-        output_path             # Final output destination
-    ]
+    scheduler = get_scheduler()
     
     try:
-        # Run command synchronously and capture output for debugging
-        subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        # Wait for a share of the CPU budget before starting the encoder
+        with scheduler.job() as threads:
+            # Construct the raw ffmpeg command for maximum control
+            command = [
+                "ffmpeg",
+                "-y",                   # Overwrite output files without asking
+                "-i", input_file,       # Input file
+                "-map", "0:v:0",        # Map the first video stream
+                "-map", "0:a:0?",       # Map the first audio stream if it exists
+                "-vf", f"scale=-2:{res_int}", # Scale preserving aspect ratio (must be even)
+                "-c:v", encoder,        # Video codec
+                "-preset", preset,      # Encoding speed/quality preset
+                "-b:v", bitrate,        # Target video bitrate
+                *scheduler.thread_args(encoder, threads), # Encoder threads from the budget
+                "-movflags", "+faststart", # Move metadata to start for faster web playback
+                "-c:a", "copy",         # Copy audio directly without re-encoding
+                output_path             # Final output destination
+            ]
+            
+            # Run command synchronously and capture output for debugging
+            run_ffmpeg(command, on_progress=on_progress)
     except subprocess.CalledProcessError as e:
         # Log failure if the ffmpeg process exits with an error
         print(f"Failed to process {res_int}p: {e.stderr.decode()}")
+        # Remove the truncated output so a missing file always means a failed rendition
+        if os.path.exists(output_path):
+            os.remove(output_path)
     
     return output_path
 
-def convert_video_resolutions_concurrent(input_file, resolutions, output_dir="output", max_workers=None):
+def process_resolution_ladder(input_file, resolutions, output_dir, encoder="libx264", on_progress=None, bitrates=None):
+    """
+    Internal helper that transcodes a whole resolution ladder from a single decode.
+    The source is demuxed and decoded once and a 'split' filter fans the frames out
+    to one 'scale' branch per target height, each encoded to its own output file.
+    
+    If the combined ffmpeg process fails, every rendition is retried on its own via
+    process_single_resolution so that failures are isolated and reported per height.
+    
+    Args:
+        input_file (str): Absolute or relative path to the input video file.
+        resolutions (list): Target heights (e.g., [480, 720] or ["480p", "720p"]).
+        output_dir (str): The directory where the resulting videos will be stored.
+        encoder (str): The H.264 encoder to be used for the conversion. Defaults to "libx264".
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+        bitrates (dict, optional): Per-height video bitrates overriding bitrate_map.
+        
+    Returns:
+        dict: Maps each target height (int) to its output path, or None if that rendition failed.
+    """
+    bitrates = bitrates or {}
+
+    # Normalise heights and drop duplicates while keeping the requested order
+    heights = []
+    for res in resolutions:
+        res_int = int(str(res).replace("p", ""))
+        if res_int not in heights:
+            heights.append(res_int)
+
+    if not heights:
+        return {}
+
+    filename = os.path.splitext(os.path.basename(input_file))[0]
+    output_paths = {h: os.path.join(output_dir, f"{filename}_{h}p.mp4") for h in heights}
+
+    # Decode once, then split the frames into one scaler per rendition
+    split_labels = "".join(f"[s{i}]" for i in range(len(heights)))
+    graph = [f"[0:v:0]split={len(heights)}{split_labels}"]
+    for i, h in enumerate(heights):
+        graph.append(f"[s{i}]scale=-2:{h}[v{i}]")
+
+    scheduler = get_scheduler()
+
+    try:
+        # One process runs every encoder, so it reserves one slot per rendition
+        with scheduler.job(slots=len(heights)) as threads:
+            encoder_threads = max(1, threads // len(heights))
+
+            command = [
+                "ffmpeg",
+                "-y",                               # Overwrite output files without asking
+                "-i", input_file,                   # Single input, decoded a single time
+                "-filter_complex", ";".join(graph), # split -> scale branches
+            ]
+
+            # Every scaled branch becomes its own output with its own encoder settings
+            for i, h in enumerate(heights):
+                command.extend([
+                    "-map", f"[v{i}]",              # Scaled video branch for this rendition
+                    "-map", "0:a:0?",               # First audio stream if it exists
+                    "-c:v", encoder,
+                    "-preset", get_preset_for_resolution(h),
+                    "-b:v", bitrates.get(h) or bitrate_map.get(h, "1500k"),
+                    *scheduler.thread_args(encoder, encoder_threads),
+                    "-movflags", "+faststart",
+                    "-c:a", "copy",
+                    output_paths[h]
+                ])
+
+            run_ffmpeg(command, on_progress=on_progress)
+    except subprocess.CalledProcessError as e:
+        # One bad rendition aborts the whole graph, so fall back to isolated encodes
+        print(f"Single-decode ladder failed, retrying renditions individually: {e.stderr.decode()}")
+        for h in heights:
+            process_single_resolution(input_file, h, output_dir, encoder, on_progress, bitrates.get(h))
+
+    results = {}
+    for h, path in output_paths.items():
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            results[h] = path
+        else:
+            print(f"Failed to process {h}p: no output was produced.")
+            results[h] = None
+
+    return results
+
+# Shortest chunk worth splitting off; below this the per-process overhead dominates
+MIN_CHUNK_SECONDS = 10
+
+def split_video_at_keyframes(input_file, work_dir, segment_time, on_progress=None):
+    """
+    Splits the first video stream of a source into keyframe-aligned chunks by stream copy.
+    Each chunk starts on a keyframe and has its timestamps reset to zero, so it can be
+    encoded independently; every source frame lands in exactly one chunk.
+    
+    Args:
+        input_file (str): Path to the source video file.
+        work_dir (str): Directory where the chunk files are written.
+        segment_time (float): Target chunk length in seconds. Actual cuts happen at
+                              the first keyframe after each multiple of this value.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+        
+    Returns:
+        list: Sorted paths of the generated chunk files (empty on failure).
+    """
+    pattern = os.path.join(work_dir, "chunk_%05d.mkv")
+    command = [
+        "ffmpeg",
+        "-y",
+        "-i", input_file,
+        "-map", "0:v:0",                # Video only; audio is copied once at the end
+        "-c", "copy",                   # No decode, cuts can only land on keyframes
+        "-f", "segment",
+        "-segment_time", f"{segment_time:.3f}",
+        "-reset_timestamps", "1",       # Every chunk starts at t=0
+        "-avoid_negative_ts", "make_zero",  # B-frame delay must not leave chunks starting below zero
+        pattern
+    ]
+
+    try:
+        run_ffmpeg(command, on_progress=on_progress)
+    except subprocess.CalledProcessError as e:
+        print(f"Keyframe split failed: {e.stderr.decode()}")
+        return []
+
+    return sorted(str(p) for p in Path(work_dir).glob("chunk_*.mkv"))
+
+def _fps_mode_option():
+    """
+    Name of the option that sets frame timing ('passthrough', 'cfr', ...).
+    '-fps_mode' replaces '-vsync' (deprecated since ffmpeg 5.1); older builds only know '-vsync'.
+    """
+    return "fps_mode" if get_ffmpeg_capabilities().has_option("fps_mode") else "vsync"
+
+def encode_video_chunk(chunk_path, res, output_path, encoder="libx264", on_progress=None, bitrate=None):
+    """
+    Encodes one keyframe-aligned chunk to the target resolution (video only).
+    Frames are passed through without duplication or dropping so the encoded chunks
+    line up exactly when concatenated.
+    
+    Args:
+        chunk_path (str): Path to a chunk produced by split_video_at_keyframes.
+        res (int/str): The target resolution height (e.g., 720 or "720p").
+        output_path (str): Destination for the encoded chunk.
+        encoder (str): The H.264 encoder to be used. Defaults to "libx264".
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+        bitrate (str, optional): Target video bitrate overriding bitrate_map.
+        
+    Returns:
+        bool: True if the chunk was encoded successfully, False otherwise.
+    """
+    res_int = int(str(res).replace("p", ""))
+    bitrate = bitrate or bitrate_map.get(res_int, "1500k")
+    scheduler = get_scheduler()
+
+    try:
+        with scheduler.job() as threads:
+            command = [
+                "ffmpeg",
+                "-y",
+                "-i", chunk_path,
+                "-map", "0:v:0",
+                "-vf", f"scale=-2:{res_int}",
+                "-c:v", encoder,
+                "-preset", get_preset_for_resolution(res_int),
+                "-b:v", bitrate,
+                *scheduler.thread_args(encoder, threads),
+                f"-{_fps_mode_option()}", "passthrough",    # Keep the exact source frame count
+                "-an",
+                output_path
+            ]
+            run_ffmpeg(command, on_progress=on_progress)
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"Chunk encode failed for {os.path.basename(chunk_path)} at {res_int}p: {e.stderr.decode()}")
+        return False
+
+def concat_encoded_chunks(chunk_paths, audio_source, output_path, on_progress=None):
+    """
+    Joins encoded chunks losslessly with the concat demuxer and muxes the first audio
+    stream of the original source back in by stream copy.
+    
+    Args:
+        chunk_paths (list): Encoded chunk files in playback order.
+        audio_source (str): File whose first audio stream (if any) is copied into the output.
+        output_path (str): Destination of the joined video.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+        
+    Returns:
+        bool: True if the output was written successfully, False otherwise.
+    """
+    list_file_path = None
+    try:
+        # Temporary 'input list' file required by ffmpeg's concat demuxer
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
+            for chunk in chunk_paths:
+                escaped = str(Path(chunk).resolve()).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+            list_file_path = f.name
+
+        command = [
+            "ffmpeg",
+            "-y",
+            "-f", "concat", "-safe", "0", "-i", list_file_path,
+            "-i", audio_source,
+            "-map", "0:v:0",
+            "-map", "1:a:0?",
+            "-c", "copy",               # Pure remux: chunk timestamps are stitched by duration
+            "-movflags", "+faststart",
+            output_path
+        ]
+        run_ffmpeg(command, on_progress=on_progress)
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"Chunk concat failed for {output_path}: {e.stderr.decode()}")
+        return False
+    finally:
+        if list_file_path and os.path.exists(list_file_path):
+            os.remove(list_file_path)
+
+def count_video_frames(video_path):
+    """
+    Counts the packets of the first video stream by demuxing (no decode), which is the
+    frame count for every codec the chunked path produces.
+    
+    Args:
+        video_path (str): Path to the video file.
+        
+    Returns:
+        int or None: The frame count, or None if it could not be read.
+    """
+    command = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-count_packets",
+        "-show_entries", "stream=nb_read_packets",
+        "-of", "csv=p=0",
+        video_path,
+    ]
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        return None
+    try:
+        return int(result.stdout.strip().split(",")[0])
+    except ValueError:
+        return None
+
+def _chunked_output_matches(output_path, source_frames, source_duration, frame_rate):
+    """
+    Checks that a joined chunked encode has exactly the source's frames and, within two
+    frames, its duration; open GOPs and B-frame delay can otherwise double or lose frames
+    at chunk seams without any error from ffmpeg.
+    """
+    if source_frames is None:
+        # Nothing to compare against; the joined output is kept as it is
+        return True
+    if count_video_frames(output_path) != source_frames:
+        return False
+    try:
+        output_duration = probe(output_path, use_cache=False).duration
+    except Exception:
+        return False
+    return abs(output_duration - source_duration) <= max(2 / (frame_rate or 30), 0.05)
+
+def process_resolutions_chunked(input_file, resolutions, output_dir, encoder="libx264", chunks=None, on_progress=None, bitrates=None):
+    """
+    Internal helper that encodes long sources by splitting them into keyframe-aligned
+    chunks and encoding the chunks in parallel, instead of one ffmpeg per rendition.
+    The source is split once and the chunks are shared by every target resolution.
+    
+    Args:
+        input_file (str): Absolute or relative path to the input video file.
+        resolutions (list): Target heights (e.g., [480, 720] or ["480p", "720p"]).
+        output_dir (str): The directory where the resulting videos will be stored.
+        encoder (str): The H.264 encoder to be used. Defaults to "libx264".
+        chunks (int, optional): Number of chunks to split the source into.
+                                Defaults to the scheduler's concurrent job limit.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+                                          Chunks run in parallel, so it may be called from several
+                                          worker threads at once.
+        bitrates (dict, optional): Per-height video bitrates overriding bitrate_map.
+        
+    Every joined rendition is checked against the source frame count and duration; one
+    that does not match is encoded again in a single pass.
+    
+    Returns:
+        dict: Maps each target height (int) to its output path, or None if that rendition failed.
+    """
+    bitrates = bitrates or {}
+    heights = []
+    for res in resolutions:
+        res_int = int(str(res).replace("p", ""))
+        if res_int not in heights:
+            heights.append(res_int)
+
+    filename = os.path.splitext(os.path.basename(input_file))[0]
+    output_paths = {h: os.path.join(output_dir, f"{filename}_{h}p.mp4") for h in heights}
+
+    scheduler = get_scheduler()
+    duration = get_video_duration(input_file)
+    chunks = chunks or scheduler.max_jobs
+
+    # Short or unreadable sources gain nothing from splitting
+    if duration <= 0 or chunks <= 1 or duration < 2 * MIN_CHUNK_SECONDS:
+        return {h: _existing_or_none(process_single_resolution(input_file, h, output_dir, encoder, on_progress, bitrates.get(h))) for h in heights}
+
+    segment_time = max(MIN_CHUNK_SECONDS, duration / chunks)
+    work_dir = tempfile.mkdtemp(prefix=f".{filename}_chunks_", dir=output_dir)
+
+    try:
+        chunk_paths = split_video_at_keyframes(input_file, work_dir, segment_time, on_progress)
+        if not chunk_paths:
+            return {h: None for h in heights}
+
+        # Encode every (rendition, chunk) pair; the scheduler bounds real concurrency
+        encoded = {h: [os.path.join(work_dir, f"{h}p_{i:05d}.mp4") for i in range(len(chunk_paths))] for h in heights}
+        failed = set()
+        with ThreadPoolExecutor(max_workers=scheduler.max_jobs) as executor:
+            futures = {}
+            for h in heights:
+                for chunk, out in zip(chunk_paths, encoded[h]):
+                    futures[executor.submit(encode_video_chunk, chunk, h, out, encoder, on_progress, bitrates.get(h))] = h
+            for future in as_completed(futures):
+                try:
+                    if not future.result():
+                        failed.add(futures[future])
+                except Exception as e:
+                    print(f"Chunked processing error: {e}")
+                    failed.add(futures[future])
+
+        # Reference for the seam check, read once for every rendition
+        source_frames = count_video_frames(input_file)
+        try:
+            frame_rate = probe(input_file).video.frame_rate
+        except Exception:
+            frame_rate = None
+
+        results = {}
+        for h in heights:
+            if h not in failed and concat_encoded_chunks(encoded[h], input_file, output_paths[h], on_progress):
+                if _chunked_output_matches(output_paths[h], source_frames, duration, frame_rate):
+                    results[h] = output_paths[h]
+                    continue
+                print(f"Chunk seams of {h}p do not match the source; encoding it in a single pass.")
+                results[h] = _existing_or_none(process_single_resolution(input_file, h, output_dir, encoder, on_progress, bitrates.get(h)))
+            else:
+                print(f"Failed to process {h}p: chunked encode did not complete.")
+                results[h] = None
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def _existing_or_none(path):
+    """Returns the path if the file was produced, otherwise None."""
+    return path if path and os.path.exists(path) else None
+
+def _apply_ladder_policy(input_file, resolutions, ladder_policy):
+    """
+    Prunes requested heights against the source when a ladder policy is set.
+    
+    Returns:
+        tuple: (heights, bitrates, skipped) where bitrates maps each height to its
+               source-capped rate and skipped lists the requested heights the policy
+               left out, or (resolutions, None, []) unchanged if no policy was given.
+    """
+    if ladder_policy is None:
+        return resolutions, None, []
+
+    heights = []
+    for res in resolutions:
+        res_int = int(str(res).replace("p", ""))
+        if res_int not in heights:
+            heights.append(res_int)
+
+    plan = plan_ladder(input_file, [(h, h, bitrate_map.get(h, "1500k")) for h in heights], ladder_policy)
+    return [h for _, h, _ in plan.rungs], {h: bitrate for _, h, bitrate in plan.rungs}, plan.skipped
+
+def convert_video_resolutions_concurrent(input_file, resolutions, output_dir="output", max_workers=None, single_decode=False, chunked=False, on_progress=None, ladder_policy=None):
     """
     Efficiently transcode a single video into multiple resolutions using parallel threads.
     This significantly reduces total processing time on multi-core systems.
@@ -101,7 +497,27 @@ def convert_video_resolutions_concurrent(input_file, resolutions, output_dir="ou
         resolutions (list): A list of target heights (e.g., [480, 720, 1080]).
         output_dir (str): Target folder for the transcoded files. Defaults to "output".
         max_workers (int, optional): The maximum number of concurrent threads. 
-                                    Defaults to the number of CPUs available.
+                                    Defaults to the shared scheduler's job limit, which
+                                    splits the CPU budget between multithreaded encoders.
+        single_decode (bool): If True, decodes the source once and encodes every rendition
+                              from a shared 'split' filter graph in one ffmpeg process,
+                              instead of one full decode per resolution. Defaults to False.
+        chunked (bool): If True, splits the source at keyframes into chunks that are encoded
+                        in parallel and joined losslessly, so a single long source can use
+                        every core. Intended for long inputs. Defaults to False.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+                                          May be called from several worker threads at once.
+        ladder_policy (str, optional): 'drop' skips renditions taller than the source and
+                                       'clamp' replaces them with one at the source height.
+                                       Either way bitrates are capped at the source bitrate.
+                                       Defaults to None (encode every requested resolution).
+    
+    Returns:
+        RenditionResults or None: Maps each target height (int) to its output path, or None
+                      for renditions that failed. Its 'skipped' attribute lists the heights
+                      the ladder policy left out (every height, with an empty mapping, if the
+                      source is shorter than all of them under 'drop').
+                      None if the input file does not exist.
     """
     # Verify input existence before starting heavy operations
     if not os.path.exists(input_file):
@@ -114,19 +530,44 @@ def convert_video_resolutions_concurrent(input_file, resolutions, output_dir="ou
     # Use standard library encoder
     encoder = "libx264"
 
+    # Drop or clamp renditions the source cannot fill
+    resolutions, bitrates, skipped = _apply_ladder_policy(input_file, resolutions, ladder_policy)
+    bitrates = bitrates or {}
+    if not resolutions:
+        print("Every requested resolution is taller than the source; nothing to encode.")
+        return RenditionResults(skipped=skipped)
+
+    # A single process owns the decode, so there is nothing to parallelise here
+    if single_decode:
+        return RenditionResults(process_resolution_ladder(input_file, resolutions, output_dir, encoder, on_progress, bitrates), skipped)
+
+    # Parallelism comes from the chunks rather than from one job per resolution
+    if chunked:
+        return RenditionResults(process_resolutions_chunked(input_file, resolutions, output_dir, encoder, on_progress=on_progress, bitrates=bitrates), skipped)
+
+    # Size the pool from the CPU budget instead of one worker per core
+    if max_workers is None:
+        max_workers = get_scheduler().max_jobs
+
     # Manage parallel execution using a thread pool
-    futures = []
+    results = {}
+    futures = {}
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         # Schedule each resolution task
         for res in resolutions:
-            futures.append(executor.submit(process_single_resolution, input_file, res, output_dir, encoder))
+            res_int = int(str(res).replace("p", ""))
+            futures[executor.submit(process_single_resolution, input_file, res, output_dir, encoder, on_progress, bitrates.get(res_int))] = res_int
         
         # Wait for all tasks to complete and handle results/exceptions
         for future in as_completed(futures):
+            res_int = futures[future]
             try:
-                future.result() 
+                results[res_int] = _existing_or_none(future.result())
             except Exception as e:
                 print(f"Concurrent processing error: {e}")
+                results[res_int] = None
+
+    return RenditionResults(results, skipped)
 
 
 def get_available_video_encoder():
@@ -143,22 +584,13 @@ def get_available_video_encoder():
         str or None: The name of the best available encoder, or None if FFmpeg is missing.
     """
     try:
-        # Query FFmpeg for its list of supported encoders
-        result = subprocess.run(
-            ["ffmpeg", "-encoders"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        encoders = result.stdout
+        # Read the cached capability registry instead of spawning 'ffmpeg -encoders'
+        caps = get_ffmpeg_capabilities()
 
         # Select the best one from our priority list
-        if "libx264" in encoders:
-            return "libx264"
-        if "libopenh264" in encoders:
-            return "libopenh264"
-        if "h264_vaapi" in encoders:
-            return "h264_vaapi"
+        for encoder in ("libx264", "libopenh264", "h264_vaapi"):
+            if caps.has_encoder(encoder):
+                return encoder
 
     except Exception:
         # Silently fail if ffmpeg command itself fails (e.g., not installed)
@@ -167,66 +599,267 @@ def get_available_video_encoder():
     return None
 
 
-def merge_videos(video1_path: Optional[str] = None, video2_path: Optional[str] = None, output_path: Optional[str] = None) -> bool:
+# Software encoders that can reproduce each source codec, in order of preference
+CODEC_VIDEO_ENCODERS = {
+    "h264": ("libx264", "libopenh264"),
+    "hevc": ("libx265",),
+    "vp8": ("libvpx",),
+    "vp9": ("libvpx-vp9",),
+    "av1": ("libsvtav1", "libaom-av1"),
+    "mpeg4": ("mpeg4",),
+    "mpeg2video": ("mpeg2video",),
+}
+CODEC_AUDIO_ENCODERS = {
+    "aac": ("aac",),
+    "mp3": ("libmp3lame",),
+    "opus": ("libopus", "opus"),
+    "vorbis": ("libvorbis", "vorbis"),
+    "ac3": ("ac3",),
+    "eac3": ("eac3",),
+    "flac": ("flac",),
+    "pcm_s16le": ("pcm_s16le",),
+}
+
+def merge_videos(video1_path: Optional[str] = None, video2_path: Optional[str] = None, output_path: Optional[str] = None, on_progress=None,
+                 conform: bool = True) -> bool:
     """
     Concatenates two video files into a single continuous video.
     Uses FFmpeg's concat demuxer for near-instant processing via stream copying.
+    If the two files are not compatible, the second is re-encoded to match the first
+    (see concat_videos), which can take as long as a transcode of it; pass
+    conform=False to fail fast instead, as earlier versions did.
     
     Args:
         video1_path (str): File path for the first video segment.
         video2_path (str): File path for the second video segment.
         output_path (str): Desired output path for the merged video.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+        conform (bool): If False, incompatible inputs are rejected instead of re-encoded.
+                        Defaults to True.
         
     Returns:
         bool: True if the videos were merged successfully, False otherwise.
     """
-    list_file_path = None
+    # Basic input validation
+    if video1_path is None or video2_path is None or output_path is None:
+        return False
+
+    return concat_videos([video1_path, video2_path], output_path, target=0, on_progress=on_progress, conform=conform)
+
+def concat_videos(video_paths, output_path, target=None, on_progress=None, conform=True) -> bool:
+    """
+    Concatenates any number of videos, re-encoding only the inputs that do not match.
+    Every input is probed and consecutive inputs with the same stream parameters
+    (codec, resolution, pixel format, frame rate, timebase, audio codec, sample rate and
+    channels) form a run. Runs matching the target profile are stream-copied; every other
+    run is conformed to it in a single encode. The pieces are then joined by the concat
+    demuxer, whose list is streamed to ffmpeg through a pipe.
+
+    A container keeps a single out-of-band copy of the codec parameter sets, so mixing
+    copied and re-encoded pieces needs care. For H.264 every piece carries its SPS/PPS
+    in-band (the concat demuxer converts MP4 input to Annex B) and MP4 outputs are tagged
+    avc3, which allows that. For other codecs, as soon as one run needs conforming every
+    run is encoded with the same settings.
     
+    Args:
+        video_paths (list): Input paths in playback order (e.g. intro, body, outro).
+        output_path (str): Desired output path for the merged video.
+        target (int, optional): Index of the input whose profile the output keeps. Defaults to
+                                the profile covering the longest total duration.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+        conform (bool): If False, inputs that do not all share the target profile are rejected
+                        (returns False) instead of re-encoded. Defaults to True.
+        
+    Returns:
+        bool: True if the videos were merged successfully, False otherwise.
+
+    Raises:
+        ValueError: If target is not the index of one of the inputs.
+    """
+    if not video_paths or output_path is None:
+        print("At least one input and an output path are required for concatenation.")
+        return False
+    if target is not None and (isinstance(target, bool) or not isinstance(target, int)
+                               or not 0 <= target < len(video_paths)):
+        raise ValueError(f"target must be the index of an input (0 to {len(video_paths) - 1}), got {target!r}")
+
+    paths = [Path(p).resolve() for p in video_paths]
+    for path in paths:
+        if not path.exists():
+            print(f"Concatenation input not found: {path}")
+            return False
+
     try:
-        # Basic input validation
-        if video1_path is None or video2_path is None or output_path is None:
-            raise ValueError("All paths (video1, video2, output) must be provided")
+        infos = [probe(str(path)) for path in paths]
+    except Exception as e:
+        print(f"Could not probe concatenation inputs: {e}")
+        return False
+    if any(info.video is None for info in infos):
+        print("Concatenation inputs must all contain a video stream.")
+        return False
 
-        v1 = Path(video1_path)
-        v2 = Path(video2_path)
-        out = Path(output_path)
+    signatures = [_concat_signature(info) for info in infos]
+    target_signature = signatures[target] if target is not None else _dominant_signature(signatures, infos)
 
-        # File presence checks
-        if not v1.exists():
-            raise FileNotFoundError(f"Video 1 not found: {v1}")
-        if not v2.exists():
-            raise FileNotFoundError(f"Video 2 not found: {v2}")
+    # Group consecutive inputs with the same parameters into runs
+    runs = []
+    for path, signature in zip(paths, signatures):
+        if runs and runs[-1][0] == signature:
+            runs[-1][1].append(path)
+        else:
+            runs.append((signature, [path]))
 
-        # Create a temporary 'input list' file required by ffmpeg's concat demuxer
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-            # We use .resolve() to ensure absolute paths for FFmpeg
-            f.write(f"file '{v1.resolve()}'\n")
-            f.write(f"file '{v2.resolve()}'\n")
-            list_file_path = f.name
+    needs_conform = any(signature != target_signature for signature, _ in runs)
+    if needs_conform and not conform:
+        print("Concatenation inputs do not share the same stream parameters; nothing was written (conform=False).")
+        return False
+    # Copied and re-encoded pieces only mix when their parameter sets travel in-band
+    inband = needs_conform and target_signature[0][0] == "h264"
 
+    work_dir = tempfile.mkdtemp(prefix="clipmind_concat_")
+    extension = os.path.splitext(str(output_path))[1] or ".mp4"
+    try:
+        pieces = []
+        for number, (signature, run_paths) in enumerate(runs):
+            if signature == target_signature and (inband or not needs_conform):
+                # Compatible inputs keep the near-instant copy path
+                pieces.extend(run_paths)
+                continue
+
+            print(f"Re-encoding {len(run_paths)} input(s) starting at {run_paths[0].name}")
+            conformed = Path(work_dir) / f"run_{number:03d}{extension}"
+            cmd = _conform_run_command(target_signature, conformed, extension, signature[-1] is not None)
+            if cmd is None:
+                return False
+            with get_scheduler().job() as threads:
+                cmd[-1:-1] = get_scheduler().thread_args(cmd[cmd.index("-c:v") + 1], threads)
+                run_ffmpeg(cmd, on_progress=on_progress, input=_concat_list(run_paths))
+            pieces.append(conformed)
+
+        os.makedirs(os.path.dirname(os.path.abspath(str(output_path))) or ".", exist_ok=True)
         # Execute concatenation using stream copy (no re-encoding = fast)
-        (
-            ffmpeg
-            .input(list_file_path, format='concat', safe=0)
-            .output(str(out), c='copy')
-            .overwrite_output()
-            .run(quiet=True, capture_stdout=True, capture_stderr=True)
-        )
-
+        command = [
+            "ffmpeg", "-y",
+            "-loglevel", "error",
+            *_CONCAT_PIPE_INPUT,
+            "-map", "0:v:0",
+            "-map", "0:a:0?",
+            "-c", "copy",
+            str(output_path),
+        ]
+        if inband and extension.lower() in (".mp4", ".m4v", ".mov"):
+            # avc1 would tie every sample to the first piece's SPS/PPS
+            command[-1:-1] = ["-tag:v", "avc3"]
+        run_ffmpeg(command, on_progress=on_progress, input=_concat_list(pieces))
         return True
 
-    except ffmpeg.Error as e:
+    except subprocess.CalledProcessError as e:
         # FFmpeg specific failures
+        print(f"Concatenation failed: {e.stderr.decode(errors='replace').strip()}")
         return False
     except Exception as e:
         # General logic failures
+        print(f"Concatenation failed: {e}")
         return False
     finally:
-        # Ensure temporary input list is always deleted from disk
-        if list_file_path and os.path.exists(list_file_path):
-            os.remove(list_file_path)
+        # Conformed runs are only needed until the final concat
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+# Input flags that make the concat demuxer read its list from stdin
+_CONCAT_PIPE_INPUT = ["-f", "concat", "-safe", "0", "-protocol_whitelist", "file,pipe", "-i", "pipe:0"]
+
+def _concat_list(paths):
+    """Builds a concat demuxer list for absolute paths (quotes escaped)."""
+    lines = []
+    for path in paths:
+        escaped = str(path).replace("'", "'\\''")
+        lines.append(f"file '{escaped}'")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+def _concat_signature(info):
+    """Stream parameters two inputs must share to be joined by stream copy."""
+    video = info.video
+    audio = info.audio
+    video_key = (
+        video.codec_name, video.profile, video.width, video.height, video.pix_fmt,
+        video.frame_rate_fraction, video.time_base,
+    )
+    audio_key = (audio.codec_name, audio.sample_rate, audio.channels, audio.channel_layout) if audio else None
+    return video_key, audio_key
+
+def _dominant_signature(signatures, infos):
+    """The signature covering the longest total duration (the earliest one on ties)."""
+    totals = {}
+    for signature, info in zip(signatures, infos):
+        totals[signature] = totals.get(signature, 0.0) + (info.duration or 0.0)
+    return max(signatures, key=lambda signature: totals[signature])
+
+def _first_encoder(candidates):
+    """The first of the given encoders the local ffmpeg provides, or None."""
+    has_encoder = get_ffmpeg_capabilities().has_encoder
+    return next((encoder for encoder in candidates if has_encoder(encoder)), None)
+
+def _conform_run_command(target_signature, output_path, extension, has_audio):
+    """
+    Builds the command that re-encodes one run of inputs (concat list on stdin) to the
+    target profile. Thread flags are inserted before the output path by the caller.
+
+    Returns:
+        list or None: The command, or None if no encoder can produce the target codecs.
+    """
+    (codec, profile, width, height, pix_fmt, frame_rate, time_base), audio = target_signature
+
+    video_encoder = _first_encoder(CODEC_VIDEO_ENCODERS.get(codec, ()))
+    if video_encoder is None:
+        print(f"No encoder available to conform inputs to '{codec}'.")
+        return None
 
-def convert_video_resolutions(input_file, resolutions, output_dir="output"):
+    cmd = ["ffmpeg", "-y", "-loglevel", "error", *_CONCAT_PIPE_INPUT]
+    if audio is not None and not has_audio:
+        # Silent inputs get a silent track so every piece has the same streams
+        layout = audio[3] or ("mono" if audio[2] == 1 else "stereo")
+        cmd.extend(["-f", "lavfi", "-i", f"anullsrc=r={audio[1]}:cl={layout}"])
+
+    # Letterbox into the target frame instead of distorting the picture
+    filters = [
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease",
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2",
+        "setsar=1",
+    ]
+    if frame_rate:
+        # The exact fraction; a rounded decimal drifts against 30000/1001-style rates
+        filters.append(f"fps={frame_rate}")
+    if pix_fmt:
+        filters.append(f"format={pix_fmt}")
+    cmd.extend(["-map", "0:v:0", "-vf", ",".join(filters), "-c:v", video_encoder])
+
+    if codec == "h264" and profile in ("Baseline", "Main", "High") and video_encoder == "libx264":
+        cmd.extend(["-profile:v", profile.lower()])
+    # Same timescale as the target so the copied pieces keep consistent timestamps
+    if time_base and extension.lower() in (".mp4", ".m4v", ".mov") and "/" in time_base:
+        cmd.extend(["-video_track_timescale", time_base.split("/")[1]])
+
+    if audio is None:
+        cmd.append("-an")
+    else:
+        audio_codec, sample_rate, channels, _ = audio
+        audio_encoder = _first_encoder(CODEC_AUDIO_ENCODERS.get(audio_codec, ()))
+        if audio_encoder is None:
+            print(f"No encoder available to conform inputs to '{audio_codec}'.")
+            return None
+        cmd.extend(["-map", "0:a:0" if has_audio else "1:a:0", "-c:a", audio_encoder])
+        if sample_rate:
+            cmd.extend(["-ar", str(sample_rate)])
+        if channels:
+            cmd.extend(["-ac", str(channels)])
+        if not has_audio:
+            # The generated silence is endless; stop with the video
+            cmd.append("-shortest")
+
+    cmd.append(str(output_path))
+    return cmd
+
+def convert_video_resolutions(input_file, resolutions, output_dir="output", on_progress=None, ladder_policy=None, journal=None):
     """
     Sequentially transcodes a video into multiple resolutions.
     This is a simpler, non-concurrent alternative to convert_video_resolutions_concurrent.
@@ -235,6 +868,16 @@ def convert_video_resolutions(input_file, resolutions, output_dir="output"):
         input_file (str): Path to the source video.
         resolutions (list): List of target heights (e.g., [360, 480]).
         output_dir (str): Target directory for outputs. Defaults to "output".
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+        ladder_policy (str, optional): 'drop' or 'clamp' renditions taller than the source and
+                                       cap bitrates at the source bitrate. Defaults to None.
+        journal (JobJournal, optional): Records finished renditions so a restarted job
+                                        skips them instead of encoding them again.
+
+    Returns:
+        RenditionResults or None: Maps each target height (int) to its output path, or None
+                      for renditions that failed; its 'skipped' attribute lists the heights
+                      the ladder policy left out. None if nothing could be started.
     """
     if not os.path.exists(input_file):
         print(f"Input file not found: {input_file}")
@@ -250,13 +893,25 @@ def convert_video_resolutions(input_file, resolutions, output_dir="output"):
 
     filename = os.path.splitext(os.path.basename(input_file))[0]
     extension = ".mp4"
+    scheduler = get_scheduler()
+
+    # Drop or clamp renditions the source cannot fill
+    resolutions, bitrates, skipped = _apply_ladder_policy(input_file, resolutions, ladder_policy)
+    results = {}
+    if not resolutions:
+        print("Every requested resolution is taller than the source; nothing to encode.")
 
     # Iterate through resolutions one by one
     for r in resolutions:
         res_str = str(r).replace("p", "")
-        bitrate = bitrate_map.get(res_str, "1500k")
+        bitrate = bitrates[r] if bitrates else bitrate_map.get(res_str, "1500k")
         output_path = os.path.join(output_dir, f"{filename}_{res_str}p{extension}")
 
+        # Renditions finished before an interruption are kept as they are
+        if journal is not None and journal.is_done(f"{res_str}p") and os.path.exists(output_path):
+            results[int(res_str)] = output_path
+            continue
+
         # Build basic ffmpeg command
         command = [
             "ffmpeg",
@@ -276,10 +931,18 @@ def convert_video_resolutions(input_file, resolutions, output_dir="output"):
             command.insert(command.index("-b:v") + 1, "medium")
 
         try:
-            # Execute synchronously
-            subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            # Execute synchronously within this job's share of the CPU budget
+            with scheduler.job() as threads:
+                command[-1:-1] = scheduler.thread_args(encoder, threads)
+                run_ffmpeg(command, on_progress=on_progress)
+            if journal is not None:
+                journal.mark_done(f"{res_str}p")
+            results[int(res_str)] = output_path
         except subprocess.CalledProcessError as e:
             print(f"Conversion failed for {res_str}p: {e.stderr.decode()}")
+            results[int(res_str)] = None
+
+    return RenditionResults(results, skipped)
 
 
 def composite_image_over_video(
@@ -290,11 +953,17 @@ def composite_image_over_video(
     opacity: float = 1.0,         
     vcodec: str = "libopenh264", 
     use_gpu: bool = False,       
-    position: str = "top-left"  
+    position: str = "top-left",
+    on_progress=None,
+    smart_render: bool = False,
+    image_size: tuple | None = None,
+    cache_asset: bool = True
 ) -> bool:
     """
     Overlays a static image onto a video with advanced placement and timing controls.
     Optimized for high-speed processing with optional GPU support.
+    With smart_render and a start/end window, only the keyframe-aligned span covering
+    the window is re-encoded; everything outside it is stream-copied.
 
     Args:
         video_path (str): Path to the source video.
@@ -305,7 +974,17 @@ def composite_image_over_video(
         vcodec (str): Video codec to use for the output. Defaults to "libopenh264".
         use_gpu (bool): If True, attempts to use hardware (VAAPI) acceleration.
         position (str): Positioning preset: 'top-left', 'top-right', 'bottom-left', 
-                        'bottom-right', or 'center'.
+                        'bottom-right', or 'center', or an (x, y) pair of overlay expressions.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+        smart_render (bool): If True and start/end are set, stream-copies the GOPs outside the
+                             overlay window and re-encodes only the span covering it with the
+                             source codec's parameters (H.264/HEVC sources; others are fully
+                             rendered). vcodec and use_gpu do not apply to the copied parts.
+        image_size (tuple, optional): Overlay (width, height) in pixels; either may be None
+                                      to keep the image's aspect ratio.
+        cache_asset (bool): If True, the image is scaled and given its opacity once and
+                            cached on disk (see prepare_overlay_asset), so the graph reads a
+                            ready-made still instead of processing the image on every frame.
 
     Returns:
         bool: True if the operation succeeded, False otherwise.
@@ -318,45 +997,19 @@ def composite_image_over_video(
         input_path = Path(video_path)
         output_path = input_path.with_name(f"{input_path.stem}_overlay.mp4")
 
-        # Setup input streams
-        video = ffmpeg.input(video_path)
-        image = ffmpeg.input(image_path, loop=1) # Loop image to match video duration
-
-        # Apply opacity filter if needed (requires RGBA conversion)
-        if opacity < 1.0:
-            image = image.filter("format", "rgba").filter("colorchannelmixer", aa=opacity)
+        image_path, opacity, still = _resolve_overlay_image(image_path, image_size, opacity, cache_asset)
 
-        # Handle timing logic for when the overlay is visible
-        enable_expr = None
-        s = 0 if start is None else start
-        if start is not None or end is not None:
-            enable_expr = f"between(t,{s},{end})" if end is not None else f"gte(t,{s})"
-
-        # Map position keyword to actual coordinate expressions
-        pos_map = {
-            "top-left":    ("0", "0"),
-            "top-right":   ("main_w-overlay_w", "0"),
-            "bottom-left": ("0", "main_h-overlay_h"),
-            "bottom-right":("main_w-overlay_w", "main_h-overlay_h"),
-            "center":      ("(main_w-overlay_w)/2", "(main_h-overlay_h)/2")
-        }
-        x_expr, y_expr = pos_map.get(position, ("0", "0"))
-
-        # Configure overlay filter parameters
-        overlay_args: dict[str, Any] = {
-            "x": x_expr,
-            "y": y_expr,
-            "enable": enable_expr,
-            "eof_action": "repeat",
-            "shortest": 1,
-        }
+        if smart_render and (start is not None or end is not None):
+            rendered = _smart_render_overlay(video_path, image_path, output_path, start, end, opacity, position, on_progress,
+                                             image_size=None if still else image_size, still=still)
+            # None means the source cannot be smart-rendered; fall back to a full render
+            if rendered is not None:
+                return rendered
 
-        # Combine video and image layers
-        video_out = ffmpeg.overlay(
-            video.video,
-            image,
-            **{k: v for k, v in overlay_args.items() if v is not None}
-        )
+        # Setup input streams
+        video = ffmpeg.input(video_path)
+        video_out = _overlay_graph(video, image_path, start, end, opacity, position,
+                                   image_size=None if still else image_size, still=still)
 
         # Prepare final output encoding settings
         output_args: dict[str, Any] = {
@@ -373,28 +1026,458 @@ def composite_image_over_video(
             if vcodec == "mpeg4":
                 output_args["qscale:v"] = "5" # Constant quality for mpeg4
 
-        # Execute final render
-        (
-            ffmpeg
-            .output(
-                video_out,
-                video.audio, 
-                output_path.as_posix(),
-                **output_args
+        # Execute final render within a share of the CPU budget
+        scheduler = get_scheduler()
+        with scheduler.job() as threads:
+            output_args.update(scheduler.thread_kwargs(output_args["c:v"], threads))
+            command = (
+                ffmpeg
+                .output(
+                    video_out,
+                    video.audio, 
+                    output_path.as_posix(),
+                    **output_args
+                )
+                .overwrite_output()
+                .compile()
             )
-            .overwrite_output()
-            .run()
-        )
+            run_ffmpeg(command, on_progress=on_progress)
 
         return True
 
-    except ffmpeg.Error:
+    except subprocess.CalledProcessError:
         return False
     except Exception:
         return False
+# Source codecs that can be smart-rendered: the encoder that can reproduce their parameters
+# exactly, and the MP4 sample entry that allows the spliced span's in-band parameter sets
+SMART_RENDER_CODECS = {
+    "h264": ("libx264", "avc3"),
+    "hevc": ("libx265", "hev1"),
+}
+
+# ffprobe profile names and the encoder profile that produces them
+SMART_RENDER_PROFILES = {
+    "libx264": {
+        "Constrained Baseline": "baseline",
+        "Baseline": "baseline",
+        "Main": "main",
+        "High": "high",
+        "High 10": "high10",
+        "High 4:2:2": "high422",
+        "High 4:4:4 Predictive": "high444",
+    },
+    "libx265": {
+        "Main": "main",
+        "Main 10": "main10",
+    },
+}
+
+# Overlay coordinate expressions for each position preset
+OVERLAY_POSITIONS = {
+    "top-left":    ("0", "0"),
+    "top-right":   ("main_w-overlay_w", "0"),
+    "bottom-left": ("0", "main_h-overlay_h"),
+    "bottom-right":("main_w-overlay_w", "main_h-overlay_h"),
+    "center":      ("(main_w-overlay_w)/2", "(main_h-overlay_h)/2")
+}
+
+def _resolve_overlay_image(image_path, image_size=None, opacity=1.0, cache_asset=True):
+    """
+    Swaps an overlay image for its cached, preprocessed asset when caching is enabled.
+    Animated images, formats OpenCV cannot decode and an unwritable cache all fall back
+    to the uncached overlay, which ffmpeg filters on every frame.
+
+    Returns:
+        tuple: (image_path, opacity, still) where still is True for a prepared asset,
+               which needs neither looping nor per-frame filters.
+    """
+    if not cache_asset:
+        return image_path, opacity, False
+    try:
+        return prepare_overlay_asset(image_path, image_size, opacity), 1.0, True
+    except (ValueError, OSError) as e:
+        # ffmpeg's own filters still handle whatever cannot be cached
+        print(f"Overlay asset cache skipped: {e}")
+        return image_path, opacity, False
+
+def _overlay_position(position):
+    """The (x, y) overlay expressions of a position preset or a custom (x, y) pair."""
+    if isinstance(position, (tuple, list)):
+        return str(position[0]), str(position[1])
+    return OVERLAY_POSITIONS.get(position, ("0", "0"))
+
+def _filter_value(value):
+    """
+    Escapes an option value for a hand-built filtergraph string: once for the filter's
+    option parser (':' and quotes) and once for the graph parser (',' ';' and brackets),
+    as ffmpeg-python does for the graphs it builds.
+    """
+    text = str(value)
+    for char in "\\':":
+        text = text.replace(char, "\\" + char)
+    for char in "\\'[],;":
+        text = text.replace(char, "\\" + char)
+    return text
+
+def _overlay_graph(video, image_path, start=None, end=None, opacity=1.0, position="top-left", image_size=None, still=False):
+    """Builds the ffmpeg-python overlay of an image on an input's video for composite_image_over_video."""
+    if still:
+        # A prepared asset is decoded once; overlay repeats its only frame until the video ends
+        image = ffmpeg.input(image_path)
+    else:
+        image = ffmpeg.input(image_path, loop=1) # Loop image to match video duration
+
+    if image_size:
+        image = image.filter("scale", image_size[0] or -1, image_size[1] or -1)
+
+    # Apply opacity filter if needed (requires RGBA conversion)
+    if opacity < 1.0:
+        image = image.filter("format", "rgba").filter("colorchannelmixer", aa=opacity)
+
+    # Handle timing logic for when the overlay is visible
+    enable_expr = None
+    s = 0 if start is None else start
+    if start is not None or end is not None:
+        enable_expr = f"between(t,{s},{end})" if end is not None else f"gte(t,{s})"
+
+    # Map position keyword to actual coordinate expressions; ffmpeg-python escapes the
+    # commas and colons of custom expressions when it serialises the graph
+    x_expr, y_expr = _overlay_position(position)
+
+    # Configure overlay filter parameters
+    overlay_args: dict[str, Any] = {
+        "x": x_expr,
+        "y": y_expr,
+        "enable": enable_expr,
+        "eof_action": "repeat",
+        # A looped image never ends, so it must not outlive the video
+        "shortest": None if still else 1,
+    }
+
+    # Combine video and image layers
+    return ffmpeg.overlay(
+        video.video,
+        image,
+        **{k: v for k, v in overlay_args.items() if v is not None}
+    )
+
+def _smart_render_overlay(video_path, image_path, output_path, start, end, opacity, position, on_progress=None,
+                          image_size=None, still=False):
+    """
+    Smart-render path of composite_image_over_video.
+    The span from the last keyframe at or before 'start' to the first keyframe after 'end'
+    is re-encoded with the overlay; the GOPs before and after it are stream-copied. The
+    source is split on those keyframes by the segment muxer, the three video pieces are
+    spliced as MPEG-TS and the original audio is copied alongside.
+
+    The re-encoded span carries its own SPS/PPS in-band, so the MP4 is tagged avc3/hev1,
+    whose sample entries allow parameter sets to change mid-stream.
+
+    Returns:
+        bool or None: True/False for success, or None if the source cannot be smart-rendered.
+    """
+    try:
+        info = probe(video_path)
+    except Exception as e:
+        print(f"Smart render unavailable, source could not be probed: {e}")
+        return None
+
+    source = info.video
+    if source is None or source.codec_name not in SMART_RENDER_CODECS:
+        print("Smart render needs an H.264 or HEVC source; rendering the whole video.")
+        return None
+    encoder, codec_tag = SMART_RENDER_CODECS[source.codec_name]
+    if not get_ffmpeg_capabilities().has_encoder(encoder):
+        print(f"Smart render needs {encoder}; rendering the whole video.")
+        return None
+    encoder_args = _matching_encoder_args(source, encoder, info)
+    if encoder_args is None:
+        print("Source encoding parameters cannot be matched exactly; rendering the whole video.")
+        return None
+
+    # start/end and the keyframe times are both relative to the container start_time
+    window_start = 0.0 if start is None else float(start)
+    window_end = float(end) if end is not None else None
+    try:
+        keyframes = keyframe_times(video_path, window_start, window_end)
+    except Exception as e:
+        print(f"Smart render unavailable, keyframes could not be read: {e}")
+        return None
+
+    # Re-encoded span: [cut_start, cut_end); None means up to the end of the file
+    cut_start = max((k for k in keyframes if k <= window_start), default=0.0)
+    cut_end = None
+    if window_end is not None:
+        cut_end = min((k for k in keyframes if k > window_end), default=None)
+
+    work_dir = tempfile.mkdtemp(prefix="clipmind_smart_")
+    try:
+        pieces = []
+        cuts = [t for t in (cut_start if cut_start > 0 else None, cut_end) if t is not None]
+        if cuts:
+            # The segment muxer only breaks on keyframe packets, so each piece starts with its
+            # keyframe and keeps every frame that depends on it, B-frames included; a -t/-ss
+            # copy cut decides by timestamp and can duplicate or drop frames at the seam
+            run_ffmpeg([
+                "ffmpeg", "-y", "-loglevel", "error",
+                "-i", str(video_path),
+                "-map", "0:v:0", "-c", "copy", "-an",
+                "-f", "segment", "-segment_format", "mpegts",
+                "-segment_times", ",".join(f"{t:.6f}" for t in cuts),
+                "-segment_time_delta", "0.0005",
+                "-reset_timestamps", "1",
+                os.path.join(work_dir, "piece_%03d.ts"),
+            ], on_progress=on_progress)
+            expected = [os.path.join(work_dir, f"piece_{i:03d}.ts") for i in range(len(cuts) + 1)]
+            if not all(os.path.exists(piece) for piece in expected):
+                print("Source did not split on the expected keyframes; rendering the whole video.")
+                return None
+            head = expected[0] if cut_start > 0 else None
+            tail = expected[-1] if cut_end is not None else None
+        else:
+            head = tail = None
+
+        if head:
+            pieces.append(head)
+
+        # Overlay times are relative to the start of the re-encoded span
+        middle = os.path.join(work_dir, "middle.ts")
+        input_kwargs = {"ss": f"{cut_start:.6f}"}
+        if cut_end is not None:
+            input_kwargs["t"] = f"{cut_end - cut_start:.6f}"
+        video = ffmpeg.input(str(video_path), **input_kwargs)
+        video_out = _overlay_graph(
+            video, image_path,
+            round(window_start - cut_start, 6),
+            round(window_end - cut_start, 6) if window_end is not None else None,
+            opacity, position, image_size, still,
+        )
+        scheduler = get_scheduler()
+        with scheduler.job() as threads:
+            output_args = dict(encoder_args)
+            output_args.update(scheduler.thread_kwargs(encoder, threads))
+            command = (
+                ffmpeg
+                .output(video_out, middle, an=None, f="mpegts", **output_args)
+                .overwrite_output()
+                .compile()
+            )
+            run_ffmpeg(command, on_progress=on_progress)
+        pieces.append(middle)
+
+        if tail:
+            pieces.append(tail)
+
+        # Splice the video pieces and copy the untouched audio from the source
+        run_ffmpeg([
+            "ffmpeg", "-y", "-loglevel", "error",
+            *_CONCAT_PIPE_INPUT,
+            "-i", str(video_path),
+            "-map", "0:v:0",
+            "-map", "1:a:0?",
+            "-c", "copy",
+            "-tag:v", codec_tag,
+            "-movflags", "+faststart",
+            Path(output_path).as_posix(),
+        ], on_progress=on_progress, input=_concat_list(pieces))
+        return True
+
+    except subprocess.CalledProcessError as e:
+        print(f"Smart render failed: {e.stderr.decode(errors='replace').strip()}")
+        return False
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def _matching_encoder_args(source, encoder, info):
+    """
+    Encoder options that reproduce the source stream's parameters for a spliced span,
+    or None if the profile, level or pixel format cannot be matched exactly.
+    """
+    profile = SMART_RENDER_PROFILES.get(encoder, {}).get(source.profile)
+    if profile is None or not source.level or not source.pix_fmt:
+        return None
+
+    args: dict[str, Any] = {
+        "c:v": encoder,
+        _fps_mode_option(): "passthrough",  # Keep the exact source frames
+        "pix_fmt": source.pix_fmt,
+        "profile:v": profile,
+    }
+    # Same bitrate as the source so the re-encoded span does not stand out
+    bitrate = source.bit_rate or info.bit_rate
+    if bitrate:
+        args["b:v"] = str(bitrate)
+        args["maxrate"] = str(bitrate * 2)
+        args["bufsize"] = str(bitrate * 2)
+    # ffprobe reports H.264 levels as 40 for 4.0; HEVC levels are 30x the level number
+    level = source.level / 10 if source.codec_name == "h264" else source.level / 30
+    args["level"] = f"{level:g}"
+    return args
+
+def composite_layers(video_path, layers, output_path=None, resolutions=None, output_dir=None, vcodec=None, ladder_policy=None, on_progress=None,
+                     cache_assets=True):
+    """
+    Composites several image layers (watermark, corner logo, lower third, ...) onto a video
+    in one filter graph and one encode, optionally writing a scaled ladder from that same decode.
+
+    Args:
+        video_path (str): Path to the source video.
+        layers (list): Layer dicts, bottom to top, with 'image' (path, required) and optional
+                       'position' (preset name or (x, y) expressions, default 'top-left'),
+                       'opacity' (0.0 to 1.0, default 1.0), 'size' ((width, height), either
+                       may be None), 'start' and 'end' (seconds).
+        output_path (str, optional): Output for the full-size composite. Defaults to
+                                     '<stem>_overlay.mp4' next to the source.
+        resolutions (list, optional): Target heights (e.g., [1080, 720, 360]). If given, the
+                                      composite is split and scaled into one output per height
+                                      instead of a single full-size output.
+        output_dir (str, optional): Directory of the scaled outputs. Defaults to the source's directory.
+        vcodec (str, optional): Video encoder. Defaults to the best available H.264 encoder.
+        ladder_policy (str, optional): 'drop' or 'clamp' heights taller than the source and cap
+                                       bitrates at the source bitrate. Defaults to None.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+        cache_assets (bool): If True, every layer image is read from the preprocessed asset
+                             cache (see prepare_overlay_asset) instead of being looped and
+                             filtered on every frame.
+
+    Returns:
+        bool or RenditionResults: Without resolutions, True if the composite was written. With
+                      resolutions, a mapping of each height to its output path, or None if it
+                      failed; its 'skipped' attribute lists the heights the ladder policy left out.
+    """
+    if not layers:
+        print("composite_layers needs at least one layer.")
+        return RenditionResults() if resolutions else False
+    for layer in layers:
+        if not layer.get("image") or not os.path.exists(layer["image"]):
+            print(f"Overlay image not found: {layer.get('image')}")
+            return RenditionResults() if resolutions else False
+
+    encoder = vcodec or get_available_video_encoder()
+    if not encoder:
+        print("No suitable video encoder found.")
+        return RenditionResults() if resolutions else False
+
+    prepared = []
+    for layer in layers:
+        image, opacity, still = _resolve_overlay_image(layer["image"], layer.get("size"), layer.get("opacity", 1.0), cache_assets)
+        prepared.append(dict(layer, image=image, opacity=opacity, size=None if still else layer.get("size"), still=still))
+    layers = prepared
+
+    input_path = Path(video_path)
+    command = ["ffmpeg", "-y", "-loglevel", "error", "-i", str(video_path)]
+    for layer in layers:
+        if layer["still"]:
+            # Prepared assets are decoded once and repeated by the overlay filter
+            command.extend(["-i", str(layer["image"])])
+        else:
+            # Loop each still so it lasts as long as the video
+            command.extend(["-loop", "1", "-i", str(layer["image"])])
+
+    graph, composite = _layer_graph(layers)
+
+    bitrates = {}
+    skipped = []
+    if resolutions:
+        heights, bitrates, skipped = _apply_ladder_policy(str(video_path), resolutions, ladder_policy)
+        heights = list(dict.fromkeys(int(str(h).replace("p", "")) for h in heights))
+        bitrates = bitrates or {}
+        if not heights:
+            print("Every requested resolution is taller than the source; nothing to composite.")
+            return RenditionResults(skipped=skipped)
+        output_dir = output_dir or str(input_path.parent)
+        os.makedirs(output_dir, exist_ok=True)
+        outputs = {h: os.path.join(output_dir, f"{input_path.stem}_overlay_{h}p.mp4") for h in heights}
+
+        # Split the composited frames into one scaler per rendition
+        split_labels = "".join(f"[s{i}]" for i in range(len(heights)))
+        graph.append(f"{composite}split={len(heights)}{split_labels}")
+        for i, h in enumerate(heights):
+            graph.append(f"[s{i}]scale=-2:{h}[v{i}]")
+        branches = [(f"[v{i}]", h, outputs[h]) for i, h in enumerate(heights)]
+    else:
+        output_path = str(output_path or input_path.with_name(f"{input_path.stem}_overlay.mp4"))
+        branches = [(composite, None, output_path)]
+
+    command.extend(["-filter_complex", ";".join(graph)])
+
+    scheduler = get_scheduler()
+    try:
+        # One process runs every encoder, so it reserves one slot per output
+        with scheduler.job(slots=len(branches)) as threads:
+            encoder_threads = max(1, threads // len(branches))
+            for label, h, path in branches:
+                command.extend(["-map", label, "-map", "0:a:0?", "-c:v", encoder, "-pix_fmt", "yuv420p"])
+                if h is not None:
+                    command.extend(["-b:v", bitrates.get(h) or bitrate_map.get(h, "1500k")])
+                    if encoder == "libx264":
+                        command.extend(["-preset", get_preset_for_resolution(h)])
+                command.extend([
+                    *scheduler.thread_args(encoder, encoder_threads),
+                    "-movflags", "+faststart",
+                    "-c:a", "copy",         # Fast audio pass-through
+                    path,
+                ])
+            run_ffmpeg(command, on_progress=on_progress)
+    except subprocess.CalledProcessError as e:
+        print(f"Layer compositing failed: {e.stderr.decode(errors='replace').strip()}")
+        return RenditionResults({h: None for _, h, _ in branches}, skipped) if resolutions else False
+    except Exception as e:
+        print(f"Layer compositing failed: {e}")
+        return RenditionResults({h: None for _, h, _ in branches}, skipped) if resolutions else False
+
+    if not resolutions:
+        return True
+    return RenditionResults(
+        {h: path if os.path.exists(path) and os.path.getsize(path) > 0 else None for _, h, path in branches},
+        skipped,
+    )
+
+def _layer_graph(layers):
+    """
+    Chains one overlay per layer onto the first video stream of input 0 (layer i is input i+1).
+
+    Returns:
+        tuple[list, str]: The filter chains and the label of the composited video.
+    """
+    graph = []
+    current = "[0:v:0]"
+    for i, layer in enumerate(layers, start=1):
+        filters = []
+        if layer.get("size"):
+            width, height = layer["size"]
+            filters.append(f"scale={width or -1}:{height or -1}")
+        opacity = layer.get("opacity", 1.0)
+        if opacity < 1.0:
+            # Opacity needs an alpha channel to scale
+            filters.append(f"format=rgba,colorchannelmixer=aa={opacity}")
+
+        image = f"[{i}:v]"
+        if filters:
+            graph.append(f"{image}{','.join(filters)}[l{i}]")
+            image = f"[l{i}]"
+
+        # Custom expressions such as 'min(W-w,40)' would otherwise end the filter at the comma
+        x_expr, y_expr = _overlay_position(layer.get("position", "top-left"))
+        overlay = f"overlay=x={_filter_value(x_expr)}:y={_filter_value(y_expr)}:eof_action=repeat"
+        if not layer.get("still"):
+            # A looped image never ends, so it must not outlive the video
+            overlay += ":shortest=1"
+
+        start, end = layer.get("start"), layer.get("end")
+        if start is not None or end is not None:
+            s = 0 if start is None else start
+            enable = f"between(t,{s},{end})" if end is not None else f"gte(t,{s})"
+            overlay += f":enable={_filter_value(enable)}"
+
+        graph.append(f"{current}{image}{overlay}[c{i}]")
+        current = f"[c{i}]"
+    return graph, current
+
 def get_video_duration(video_path: str) -> float:
     """
-    Retrieves the total duration of a video file in seconds using ffprobe.
+    Retrieves the total duration of a video file in seconds using the shared probe cache.
     
     Args:
         video_path (str): Path to the video file.
@@ -402,17 +1485,9 @@ def get_video_duration(video_path: str) -> float:
     Returns:
         float: Duration in seconds, or 0.0 if the duration couldn't be determined.
     """
-    cmd = [
-        'ffprobe',
-        '-v', 'error',
-        '-show_entries', 'format=duration',
-        '-of', 'default=noprint_wrappers=1:nokey=1',
-        video_path
-    ]
     try:
-        # Run ffprobe and parse the numeric output
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-        return float(result.stdout.strip())
+        # Reuses the cached MediaInfo if this asset was already probed
+        return probe(video_path).duration
     except Exception:
         # Handle cases where ffprobe fails or output is malformed
         return 0.0
@@ -422,18 +1497,24 @@ def get_video_thumbnail(
     shot_at= None, 
     output_path: str = "", 
     resolution= None, 
-    quality: int = 2
+    quality: int = 2,
+    on_progress=None,
+    smart: bool = False
 ) -> str:
     """
     Captures a single frame from a video to use as a thumbnail.
     
     Args:
         video_path (str): The video source file.
-        shot_at (float, optional): The time offset (seconds). If None, a random frame is picked.
+        shot_at (float, optional): The time offset (seconds). If None, a random frame is picked
+                                   (or the best-scoring keyframe with smart=True).
         output_path (str, optional): Target image path. Defaults to [video_name]_thumb.jpg.
         resolution (str, optional): Scaling constraint. e.g. '320' or '320:240'.
         quality (int, optional): JPEG quality level (1 to 31, lower is better quality). 
                                 Default is 2.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+        smart (bool): If True and shot_at is None, scores every keyframe for sharpness, exposure
+                      and colourfulness (see select_thumbnail_time) instead of picking at random.
     
     Returns:
         str: Absolute path to the generated thumbnail, or empty string on failure.
@@ -441,18 +1522,184 @@ def get_video_thumbnail(
     
     # Auto-generate output path if not provided
     if not output_path:
-        base_name, _ = os.path.splitext(video_path)
-        output_path = f"{base_name}_thumb.jpg"
+        output_path = _default_thumbnail_path(video_path)
+
+    # Let the keyframe scorer choose, falling back to a random frame if it finds nothing
+    if shot_at is None and smart:
+        try:
+            shot_at = select_thumbnail_time(video_path)
+        except subprocess.CalledProcessError as e:
+            print(f"Smart thumbnail analysis failed: {e.stderr.decode(errors='replace').strip()}")
 
     # Pick a random timestamp if none specified
     if shot_at is None:
-        duration = get_video_duration(video_path)
-        if duration > 0:
-            # Avoid the first/last few seconds if possible
-            shot_at = random.uniform(1, max(1, duration - 1))
-        else:
-            shot_at = 0
+        shot_at = _random_shot_time(get_video_duration(video_path))
+    
+    cmd = _thumbnail_command(video_path, shot_at, output_path, resolution, quality)
+
+    try:
+        # Run ffmpeg process
+        run_ffmpeg(cmd, on_progress=on_progress)
+        return output_path
+    except subprocess.CalledProcessError:
+        return ""
+
+# Width of the low-resolution frames scored by select_thumbnail_time
+THUMBNAIL_ANALYSIS_WIDTH = 160
+# Keyframes scored together in one vectorised batch
+THUMBNAIL_SCORE_BATCH = 64
+
+def select_thumbnail_time(video_path, analysis_width=THUMBNAIL_ANALYSIS_WIDTH):
+    """
+    Picks the best-looking keyframe of a video as a thumbnail timestamp.
+    Only keyframes are decoded ('-skip_frame nokey'), at low resolution, straight into
+    NumPy; they are scored in batches for sharpness (Laplacian variance), exposure and
+    colourfulness, so the cost follows the number of keyframes rather than the duration.
+    
+    Args:
+        video_path (str): The video source file.
+        analysis_width (int): Width the keyframes are scaled to for scoring. Defaults to 160.
+    
+    Returns:
+        float or None: Timestamp of the winning keyframe in seconds, or None if no keyframe
+                       could be decoded or the frames could not be matched to their timestamps.
+
+    Raises:
+        subprocess.CalledProcessError: If the analysis ffmpeg exits with an error.
+    """
+    try:
+        info = probe(video_path)
+    except Exception as e:
+        print(f"Smart thumbnail unavailable, video could not be probed: {e}")
+        return None
+    if info.video is None or not info.width or not info.height:
+        return None
+
+    width = analysis_width - analysis_width % 2
+    height = max(2, round(info.height * width / info.width / 2) * 2)
+    frame_bytes = width * height * 3
+
+    scheduler = get_scheduler()
+    with scheduler.job() as threads:
+        cmd = [
+            'ffmpeg', '-nostdin', '-loglevel', 'info',
+            '-skip_frame', 'nokey',             # The decoder drops every non-key frame
+            '-i', video_path,
+            '-map', '0:v:0',
+            '-vf', f'scale={width}:{height},showinfo',
+            f'-{_fps_mode_option()}', 'passthrough',    # Exactly one output frame per keyframe
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+            *scheduler.thread_args(threads=threads),
+            'pipe:1',
+        ]
+        process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        # showinfo reports each frame's timestamp on stderr, in output order
+        times = []
+        errors = []
+        def collect_times():
+            for line in process.stderr:
+                match = re.search(rb"pts_time:\s*(-?[\d.]+)", line)
+                if match and b"showinfo" in line:
+                    times.append(float(match.group(1)))
+                else:
+                    errors.append(line)
+        reader = threading.Thread(target=collect_times, daemon=True)
+        reader.start()
+
+        # Frames are read into one preallocated batch and reduced to three numbers each
+        batch = np.empty((THUMBNAIL_SCORE_BATCH, height, width, 3), dtype=np.uint8)
+        view = memoryview(batch).cast("B")
+        metrics = []
+        frame_count = 0
+        try:
+            while True:
+                filled = 0
+                while filled < len(view):
+                    count = process.stdout.readinto(view[filled:])
+                    if not count:
+                        break
+                    filled += count
+                frames = filled // frame_bytes
+                if frames:
+                    metrics.append(_score_frames(batch[:frames]))
+                    frame_count += frames
+                if filled < len(view):
+                    break
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+            reader.join()
+
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, stderr=b"".join(errors[-20:]))
+
+    if not metrics:
+        print(f"Smart thumbnail found no decodable keyframes in {video_path}")
+        return None
+    # Scores and timestamps are paired by position, so they must describe the same frames
+    if len(times) != frame_count:
+        print(f"Smart thumbnail read {frame_count} keyframes but {len(times)} timestamps from {video_path}")
+        return None
+
+    sharpness, exposure, colourfulness = (np.concatenate(m) for m in zip(*metrics))
+    candidates = np.array(times)
+
+    # Normalise sharpness and colour against the best keyframe of this video
+    score = (
+        0.5 * sharpness / max(sharpness.max(), 1e-6)
+        + 0.2 * colourfulness / max(colourfulness.max(), 1e-6)
+        + 0.3 * exposure
+    )
+    # Intros often open on black; skip the first second when there is a choice
+    if info.duration > 2 and (candidates >= 1).any():
+        score[candidates < 1] = -1
+
+    return float(candidates[int(np.argmax(score))])
+
+def _score_frames(frames):
+    """
+    Scores a batch of RGB frames (N x H x W x 3, uint8) in one vectorised pass.
     
+    Returns:
+        tuple: (sharpness, exposure, colourfulness) arrays of length N. Exposure is in [0, 1].
+    """
+    rgb = frames.astype(np.float32)
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    luma = 0.299 * r + 0.587 * g + 0.114 * b
+
+    # Variance of the 4-neighbour Laplacian: blur and fades have little high-frequency energy
+    laplacian = (
+        luma[:, :-2, 1:-1] + luma[:, 2:, 1:-1] + luma[:, 1:-1, :-2] + luma[:, 1:-1, 2:]
+        - 4 * luma[:, 1:-1, 1:-1]
+    )
+    sharpness = laplacian.reshape(len(frames), -1).var(axis=1)
+
+    # Mid-grey mean with few crushed or blown pixels scores highest
+    mean = luma.reshape(len(frames), -1).mean(axis=1)
+    clipped = ((luma < 16) | (luma > 240)).reshape(len(frames), -1).mean(axis=1)
+    exposure = np.clip(1 - np.abs(mean - 128) / 128, 0, 1) * (1 - clipped)
+
+    # Hasler-Suesstrunk colourfulness on the opponent colour axes
+    rg = (r - g).reshape(len(frames), -1)
+    yb = (0.5 * (r + g) - b).reshape(len(frames), -1)
+    colourfulness = np.sqrt(rg.std(axis=1) ** 2 + yb.std(axis=1) ** 2) + 0.3 * np.sqrt(rg.mean(axis=1) ** 2 + yb.mean(axis=1) ** 2)
+
+    return sharpness, exposure, colourfulness
+
+def _default_thumbnail_path(video_path):
+    """Default thumbnail destination: [video_name]_thumb.jpg next to the video."""
+    base_name, _ = os.path.splitext(video_path)
+    return f"{base_name}_thumb.jpg"
+
+def _random_shot_time(duration):
+    """Picks a random timestamp, avoiding the first/last second when the video is long enough."""
+    if duration > 0:
+        return random.uniform(1, max(1, duration - 1))
+    return 0
+
+def _thumbnail_command(video_path, shot_at, output_path, resolution=None, quality=2):
+    """Builds the ffmpeg command that grabs a single frame at shot_at seconds."""
     # Prepare basic extraction command
     cmd = [
         'ffmpeg',
@@ -473,13 +1720,176 @@ def get_video_thumbnail(
     cmd.extend(['-q:v', str(safe_quality)])
 
     cmd.append(output_path)
+    return cmd
+
+# Longest sprite filtergraph passed inline; longer ones are read from a script file
+SPRITE_INLINE_FILTER_LIMIT = 32768
+
+def generate_sprite_sheets(
+    video_path: str,
+    output_dir: str = "",
+    interval: float = 10,
+    timestamps=None,
+    thumb_width: int = 160,
+    columns: int = 10,
+    rows: int = 10,
+    keyframes_only: bool = False,
+    quality: int = 5,
+    on_progress=None
+) -> dict:
+    """
+    Captures preview frames with a single ffmpeg process and tiles them into sprite sheets,
+    plus a WebVTT thumbnail track whose cues point at each tile ('sprite_001.jpg#xywh=...').
+    Frames are picked by the 'fps' filter at a regular interval, or by a 'select' expression
+    at given timestamps whose cost per frame barely grows with their number, and packed by
+    the 'tile' filter.
+    
+    Args:
+        video_path (str): The video source file.
+        output_dir (str, optional): Directory for the sheets and 'thumbnails.vtt'.
+                                    Defaults to [video_name]_sprites next to the video.
+        interval (float): Seconds between frames when no timestamps are given. Defaults to 10.
+        timestamps (list, optional): Explicit capture times in seconds (the first frame at or after each).
+        thumb_width (int): Width of each thumbnail in pixels; the height keeps the aspect ratio.
+        columns (int): Thumbnails per sheet row. Defaults to 10.
+        rows (int): Thumbnail rows per sheet. Use columns=rows=1 for one image per frame.
+        keyframes_only (bool): If True, only keyframes are decoded ('-skip_frame nokey'), which is
+                               much faster; each thumbnail then shows the nearest keyframe.
+        quality (int, optional): JPEG quality level (1 to 31, lower is better quality). Default is 5.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
+    
+    Returns:
+        dict: 'sprites' (sheet paths in order), 'vtt' (track path) and 'count' (number of
+              thumbnails), or an empty dict on failure.
+    """
+    try:
+        info = probe(video_path)
+    except Exception as e:
+        print(f"Sprite generation failed, video could not be probed: {e}")
+        return {}
+    if info.video is None or not info.width or not info.height:
+        print(f"Sprite generation failed, no video stream in {video_path}")
+        return {}
+
+    duration = info.duration
+    if timestamps:
+        times = sorted({float(t) for t in timestamps if 0 <= float(t) < duration or not duration})
+        if keyframes_only:
+            # Each timestamp resolves to the first keyframe at or after it; timestamps that
+            # share a keyframe would share a tile, so keep one thumbnail per keyframe
+            try:
+                keyframes = keyframe_times(video_path)
+            except Exception as e:
+                print(f"Sprite generation failed, keyframes could not be read: {e}")
+                return {}
+            times = sorted({next((k for k in keyframes if k >= t), None) for t in times} - {None})
+        else:
+            # One decoded frame can only fill one tile, so drop timestamps closer than a frame
+            frame_gap = 1 / (info.video.frame_rate or 30)
+            kept = []
+            for t in times:
+                if not kept or t - kept[-1] >= frame_gap:
+                    kept.append(t)
+            times = kept
+    else:
+        if interval <= 0:
+            print("Sprite interval must be positive.")
+            return {}
+        count = max(1, math.ceil(duration / interval)) if duration else 1
+        times = [i * interval for i in range(count)]
+    if not times:
+        print("No thumbnail timestamps fall inside the video.")
+        return {}
+
+    # Explicit even height, so the VTT coordinates match the tiles exactly
+    thumb_height = max(2, round(info.height * thumb_width / info.width / 2) * 2)
+
+    if not output_dir:
+        output_dir = f"{os.path.splitext(video_path)[0]}_sprites"
+    os.makedirs(output_dir, exist_ok=True)
+    pattern = os.path.join(output_dir, "sprite_%03d.jpg")
+
+    cmd = ['ffmpeg', '-y', '-loglevel', 'error']
+    if keyframes_only:
+        cmd.extend(['-skip_frame', 'nokey'])    # The decoder drops every non-key frame
+    cmd.extend(['-i', video_path, '-map', '0:v:0'])
+
+    if timestamps:
+        picker = f"select='{_timestamp_select_expr(times)}'"
+    else:
+        picker = f"fps=1/{interval}"
+    graph = f"{picker},scale={thumb_width}:{thumb_height},tile={columns}x{rows}"
+
+    script_path = None
+    if len(graph) > SPRITE_INLINE_FILTER_LIMIT:
+        # Long timestamp lists would overflow a single command-line argument
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
+            f.write(graph)
+            script_path = f.name
+        cmd.extend(['-filter_script:v', script_path])
+    else:
+        cmd.extend(['-vf', graph])
+    cmd.extend([
+        f'-{_fps_mode_option()}', 'passthrough',    # One sheet per full tile, no duplicates
+        '-q:v', str(max(1, min(31, quality))),
+        pattern,
+    ])
 
     try:
-        # Run ffmpeg process
-        subprocess.run(cmd, check=True, capture_output=True)
-        return output_path
-    except subprocess.CalledProcessError:
-        return ""
+        with get_scheduler().job() as threads:
+            cmd[-1:-1] = get_scheduler().thread_args(None, threads)
+            run_ffmpeg(cmd, on_progress=on_progress)
+    except subprocess.CalledProcessError as e:
+        print(f"Sprite generation failed: {e.stderr.decode(errors='replace').strip()}")
+        return {}
+    finally:
+        if script_path and os.path.exists(script_path):
+            os.remove(script_path)
+
+    per_sheet = columns * rows
+    sprites = [os.path.join(output_dir, f"sprite_{n:03d}.jpg") for n in range(1, math.ceil(len(times) / per_sheet) + 1)]
+    vtt_path = os.path.join(output_dir, "thumbnails.vtt")
+    _write_thumbnail_vtt(vtt_path, times, duration, sprites, thumb_width, thumb_height, columns, per_sheet)
+
+    return {'sprites': [p for p in sprites if os.path.exists(p)], 'vtt': vtt_path, 'count': len(times)}
+
+def _timestamp_select_expr(times):
+    """
+    Builds a 'select' expression that passes the first frame at or after each of the sorted
+    timestamps. selected_n (frames picked so far) says which timestamp is pending, and a
+    balanced if() tree over it finds that timestamp's threshold; if() only evaluates the
+    branch it takes, so each frame costs log2(len(times)) comparisons instead of one term
+    per timestamp. Thresholds sit half a millisecond early so rounded keyframe times still match.
+    """
+    def branch(lo, hi):
+        if hi - lo == 1:
+            return f"gte(t,{times[lo] - 0.0005:.6f})"
+        mid = (lo + hi) // 2
+        return f"if(lt(selected_n,{mid}),{branch(lo, mid)},{branch(mid, hi)})"
+    # Once every timestamp has its frame, nothing else is selected
+    return f"if(lt(selected_n,{len(times)}),{branch(0, len(times))},0)"
+
+def _vtt_time(seconds):
+    """Formats seconds as a WebVTT timestamp (HH:MM:SS.mmm)."""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
+
+def _write_thumbnail_vtt(vtt_path, times, duration, sprites, width, height, columns, per_sheet):
+    """Writes a WebVTT track with one '#xywh' cue per thumbnail, lasting until the next one."""
+    lines = ["WEBVTT", ""]
+    for i, start in enumerate(times):
+        end = times[i + 1] if i + 1 < len(times) else max(duration, start + 1)
+        sheet, cell = divmod(i, per_sheet)
+        row, column = divmod(cell, columns)
+        lines.append(f"{_vtt_time(start)} --> {_vtt_time(end)}")
+        # Cue payloads are relative to the track, which sits next to the sheets
+        lines.append(f"{os.path.basename(sprites[sheet])}#xywh={column * width},{row * height},{width},{height}")
+        lines.append("")
+    with open(vtt_path, "w") as f:
+        f.write("\n".join(lines))
 
 def crop_video(
     video_path: str,
@@ -487,7 +1897,8 @@ def crop_video(
     y: int = 0,
     width: int = 640,
     height: int = 480,
-    output_path: str = ""
+    output_path: str = "",
+    on_progress=None
 ):
     """
     Spatially crops a video to a specific rectangular region.
@@ -499,22 +1910,44 @@ def crop_video(
         width (int): Target width of the cropped area.
         height (int): Target height of the cropped area.
         output_path (str, optional): Path for the resulting file.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
         
     Returns:
         str: Path to the cropped video file.
     """
 
+    output_path = _prepare_crop(video_path, width, height, output_path)
+
+    scheduler = get_scheduler()
+    with scheduler.job() as threads:
+        cmd = _crop_command(video_path, x, y, width, height, output_path, threads)
+
+        # Run the processing pipeline
+        try:
+            run_ffmpeg(cmd, on_progress=on_progress)
+        except subprocess.CalledProcessError as e:
+            # Keep surfacing failures as ffmpeg.Error for existing callers
+            raise ffmpeg.Error("ffmpeg", e.stdout, e.stderr)
+
+    return output_path
+
+def _prepare_crop(video_path, width, height, output_path):
+    """Validates crop arguments and resolves the default output path."""
     if not video_path or not os.path.exists(video_path):
         raise ValueError("Invalid video path: file does not exist")
 
     if width <= 0 or height <= 0:
         raise ValueError(f"Invalid crop dimensions: {width}x{height}")
 
-    # Determine best encoder to use for the render
-    encoder = get_available_video_encoder()
-    
     if not output_path:
         output_path = f"cropped_{os.path.basename(video_path)}"
+    return output_path
+
+def _crop_command(video_path, x, y, width, height, output_path, threads):
+    """Builds the ffmpeg command for crop_video using the best available encoder."""
+    # Determine best encoder to use for the render
+    encoder = get_available_video_encoder()
+    scheduler = get_scheduler()
 
     # Initialize the video stream and apply the crop filter
     stream = (
@@ -528,15 +1961,13 @@ def crop_video(
         stream = stream.output(
             output_path,
             vcodec=encoder,
-            acodec="aac" # Re-encode audio to ensure compatibility
+            acodec="aac", # Re-encode audio to ensure compatibility
+            **scheduler.thread_kwargs(encoder, threads)
         )
     else:
-        stream = stream.output(output_path)
+        stream = stream.output(output_path, **scheduler.thread_kwargs(None, threads))
 
-    # Run the processing pipeline
-    stream.overwrite_output().run()
-
-    return output_path
+    return stream.overwrite_output().compile()
 
 def detect_video_vulnerability(message_tool, video_path, prompt=None):
     """
@@ -782,12 +2213,7 @@ def video_phash(video_path, hash_size=16, num_frames=5):
 
     # Resolve video duration for smart sampling
     try:
-        duration = float(subprocess.check_output([
-            "ffprobe", "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            video_path
-        ]).decode().strip())
+        duration = probe(video_path).duration
     except Exception:
         # Return zero-hash if metadata cannot be read
         return np.zeros(hash_size * hash_size * num_frames, dtype=np.uint8)
@@ -795,27 +2221,13 @@ def video_phash(video_path, hash_size=16, num_frames=5):
     if duration <= 0:
         return np.zeros(hash_size * hash_size * num_frames, dtype=np.uint8)
 
-    # Spread sampling points across the video (skipping first/last 10% for stability)
-    start = max(duration * 0.1, 0)
-    end = max(duration * 0.9, start + 0.1)
-    timestamps = np.linspace(start, end, num_frames)
-
     hashes = []
+    frame_size = hash_size * (hash_size + 1)
 
-    for t in timestamps:
+    for t in _phash_timestamps(duration, num_frames):
         # Use FFmpeg to pipe a specific grayscale frame directly into memory
-        cmd = [
-            "ffmpeg",
-            "-ss", str(t),
-            "-i", video_path,
-            "-frames:v", "1",
-            "-vf", f"scale={hash_size}:{hash_size+1},format=gray",
-            "-f", "image2pipe",
-            "-vcodec", "rawvideo",
-            "-"
-        ]
+        cmd = _phash_frame_command(video_path, t, hash_size)
 
-        frame_size = hash_size * (hash_size + 1)
         pipe = subprocess.Popen(
             cmd,
             stdout=subprocess.PIPE,
@@ -834,21 +2246,7 @@ def video_phash(video_path, hash_size=16, num_frames=5):
         if len(raw) != frame_size:
             continue
 
-        # Convert raw bits to numpy array and reshape
-        img = np.frombuffer(raw, dtype=np.uint8).reshape((hash_size + 1, hash_size))
-        img = np.ascontiguousarray(img, dtype=np.float32)
-
-        # Apply Discrete Cosine Transform (DCT) for frequency analysis
-        dct = cv2.dct(img)
-
-        # Focus on the low-frequency components (most stable features)
-        dct_low = dct[:hash_size, 1:hash_size + 1]
-
-        # Calculate binary hash based on whether frequency is above/below mean
-        avg = dct_low.mean()
-        binary_hash = (dct_low > avg).astype(np.uint8).flatten()
-
-        hashes.append(binary_hash)
+        hashes.append(_phash_frame_bits(raw, hash_size))
 
     # Final result is the sequence of hashes from all sampled frames
     if not hashes:
@@ -856,16 +2254,83 @@ def video_phash(video_path, hash_size=16, num_frames=5):
 
     return np.concatenate(hashes)
 
-def convert_video_format(input_path: str, output_path: str, video_codec= None, audio_codec= None) -> bool:
+def _phash_timestamps(duration, num_frames):
+    """Spreads sampling points across the video (skipping first/last 10% for stability)."""
+    start = max(duration * 0.1, 0)
+    end = max(duration * 0.9, start + 0.1)
+    return np.linspace(start, end, num_frames)
+
+def _phash_frame_command(video_path, t, hash_size):
+    """Builds the ffmpeg command that pipes one grayscale frame at t seconds to stdout."""
+    return [
+        "ffmpeg",
+        "-ss", str(t),
+        "-i", video_path,
+        "-frames:v", "1",
+        "-vf", f"scale={hash_size}:{hash_size+1},format=gray",
+        "-f", "image2pipe",
+        "-vcodec", "rawvideo",
+        "-"
+    ]
+
+def _phash_frame_bits(raw, hash_size):
+    """Turns one raw grayscale frame into its binary DCT hash."""
+    # Convert raw bits to numpy array and reshape
+    img = np.frombuffer(raw, dtype=np.uint8).reshape((hash_size + 1, hash_size))
+    img = np.ascontiguousarray(img, dtype=np.float32)
+
+    # Apply Discrete Cosine Transform (DCT) for frequency analysis
+    dct = cv2.dct(img)
+
+    # Focus on the low-frequency components (most stable features)
+    dct_low = dct[:hash_size, 1:hash_size + 1]
+
+    # Calculate binary hash based on whether frequency is above/below mean
+    avg = dct_low.mean()
+    return (dct_low > avg).astype(np.uint8).flatten()
+
+# Source codecs (ffprobe names) each output container can hold as-is, i.e. without re-encoding
+CONTAINER_VIDEO_CODECS = {
+    ".mp4": {"h264", "hevc", "av1", "vp9", "mpeg4"},
+    ".m4v": {"h264", "hevc", "mpeg4"},
+    ".mov": {"h264", "hevc", "mpeg4", "prores", "mjpeg"},
+    ".mkv": {"h264", "hevc", "av1", "vp8", "vp9", "mpeg4", "mpeg2video", "theora", "prores", "mjpeg"},
+    ".webm": {"vp8", "vp9", "av1"},
+    ".avi": {"mpeg4", "h264", "mjpeg", "msmpeg4v3"},
+    ".ts": {"h264", "hevc", "mpeg2video"},
+    ".flv": {"h264"},
+    ".mpg": {"mpeg1video", "mpeg2video"},
+    ".mpeg": {"mpeg1video", "mpeg2video"},
+    ".vob": {"mpeg2video"},
+}
+CONTAINER_AUDIO_CODECS = {
+    ".mp4": {"aac", "mp3", "ac3", "eac3", "alac", "opus", "flac"},
+    ".m4v": {"aac", "ac3", "eac3"},
+    ".mov": {"aac", "mp3", "ac3", "alac", "pcm_s16le", "pcm_s24le"},
+    ".mkv": {"aac", "mp3", "ac3", "eac3", "opus", "vorbis", "flac", "alac", "dts", "truehd", "pcm_s16le", "pcm_s24le"},
+    ".webm": {"opus", "vorbis"},
+    ".avi": {"mp3", "mp2", "ac3", "pcm_s16le"},
+    ".ts": {"aac", "mp3", "mp2", "ac3", "eac3"},
+    ".flv": {"aac", "mp3"},
+    ".mpg": {"mp2", "mp3", "ac3"},
+    ".mpeg": {"mp2", "mp3", "ac3"},
+    ".vob": {"mp2", "ac3"},
+}
+
+def convert_video_format(input_path: str, output_path: str, video_codec= None, audio_codec= None, on_progress=None) -> bool:
     """
     Robustly converts a video from one container/codec to another.
-    Automatically detects and falls back to optimal encoders based on system capabilities.
+    Streams the target container already accepts are remuxed with '-c copy'; only
+    incompatible streams are re-encoded, with encoders chosen from system capabilities.
     
     Args:
         input_path (str): The source file path.
         output_path (str): The target file path with the desired extension (e.g., .webm, .mkv).
-        video_codec (str, optional): Specific video encoder name.
-        audio_codec (str, optional): Specific audio encoder name.
+        video_codec (str, optional): Specific video encoder name. If None, the video stream
+                                     is copied when compatible, otherwise re-encoded.
+        audio_codec (str, optional): Specific audio encoder name. If None, the audio stream
+                                     is copied when compatible, otherwise re-encoded.
+        on_progress (callable, optional): Called with a ProgressEvent for each ffmpeg progress report.
         
     Returns:
         bool: True if conversion was successful, False otherwise.
@@ -884,116 +2349,149 @@ def convert_video_format(input_path: str, output_path: str, video_codec= None, a
         # Create output directory if it doesn't exist
         os.makedirs(os.path.dirname(os.path.abspath(output_path)) or ".", exist_ok=True)
         
-        # Query system encoders for intelligent selection
-        encoders_list = subprocess.run(
-            ["ffmpeg", "-encoders"], 
-            capture_output=True, text=True
-        ).stdout
-        
-        def has_encoder(name):
-            # Utility to check if an encoder is supported
-            return name in encoders_list
-        
-        ext = os.path.splitext(output_path)[1].lower()
-        
-        # Intelligent Video Codec Resolution
-        if video_codec is None:
-            if ext in [".mpg", ".mpeg", ".vob"]:
-                video_codec = "mpeg2video"
-            elif ext == ".webm":
-                video_codec = "libvpx-vp9"
-            else:
-                # Default to H.264 family
-                if has_encoder("libopenh264"):
-                    video_codec = "libopenh264"
-                elif has_encoder("libx264"):
-                    video_codec = "libx264"
-                elif has_encoder("mpeg4"):
-                    video_codec = "mpeg4"
-                else:
-                    video_codec = "copy"
-        
-        # Fallback logic for unsupported video encoders
-        if video_codec != "copy" and not has_encoder(video_codec):
-            print(f"Warning: Video encoder '{video_codec}' unavailable. Falling back.")
-            video_codec = "mpeg4" if has_encoder("mpeg4") else "copy"
-        
-        # Intelligent Audio Codec Resolution
-        if audio_codec is None:
-            if ext in [".mpg", ".mpeg", ".vob"]:
-                # Classic formats
-                audio_codec = "mp2" if has_encoder("mp2") else "copy"
-            elif ext == ".avi":
-                audio_codec = "libmp3lame" if has_encoder("libmp3lame") else "ac3"
-            elif ext == ".webm":
-                audio_codec = "libopus" if has_encoder("libopus") else "libvorbis"
-            else:
-                # Modern formats
-                if has_encoder("aac"):
-                    audio_codec = "aac"
-                elif has_encoder("libmp3lame"):
-                    audio_codec = "libmp3lame"
-                else:
-                    audio_codec = "copy"
-        
-        # Fallback for unsupported audio encoders
-        if audio_codec != "copy" and not has_encoder(audio_codec):
-            audio_codec = "copy"
-        
-        # Build the conversion command
-        cmd = [
-            "ffmpeg", "-y", "-i", input_path,
-            "-map", "0:v:0?",   # Map first video stream if available
-            "-map", "0:a:0?",   # Map first audio stream if available
-            "-c:v", video_codec,
-            "-c:a", audio_codec,
-            "-map_metadata", "0" # Preserve metadata (tags, dates, etc.)
-        ]
-        
-        # Apply specific tuning for chosen encoders
-        if video_codec in ["libx264", "libopenh264"]:
-            cmd.extend(["-preset", "medium", "-crf", "23", "-pix_fmt", "yuv420p"])
-        elif video_codec == "mpeg2video":
-            cmd.extend(["-b:v", "3000k", "-maxrate", "3500k", "-bufsize", "4000k", "-g", "15"])
-        elif video_codec == "mpeg4":
-            cmd.extend(["-q:v", "3", "-pix_fmt", "yuv420p"])
-        elif video_codec == "libvpx-vp9":
-            cmd.extend(["-b:v", "0", "-crf", "31", "-deadline", "good"])
-        
-        # Audio tuning
-        if audio_codec in ["mp2", "ac3", "aac"]:
-            cmd.extend(["-b:a", "192k"])
-        elif audio_codec == "libmp3lame":
-            cmd.extend(["-q:a", "2"])
-        
-        # MP4-family optimization (faststart)
-        if ext in [".mp4", ".m4v", ".mov"]:
-            cmd.extend(["-movflags", "+faststart"])
+        cmd, video_codec = _convert_format_command(input_path, output_path, video_codec, audio_codec)
         
-        # Handling for subtitles based on container support
-        if ext in [".mp4", ".m4v", ".mov"]:
-            cmd.extend(["-c:s", "mov_text"]) # QuickTime format
-        elif ext == ".mkv":
-            cmd.extend(["-c:s", "copy"])     # Keep existing subtitles
-        else:
-            cmd.extend(["-sn"])              # No subtitles for other formats
-        
-        cmd.append(output_path)
-        
-        # Execute the process
-        subprocess.run(cmd, check=True, capture_output=True)
+        # Execute the process within a share of the CPU budget
+        scheduler = get_scheduler()
+        with scheduler.job() as threads:
+            if video_codec != "copy":
+                cmd.extend(scheduler.thread_args(video_codec, threads))
+            cmd.append(output_path)
+            run_ffmpeg(cmd, on_progress=on_progress)
         return True
         
     except subprocess.CalledProcessError as e:
-        # Parse and log specific ffmpeg error messages
-        err = e.stderr.decode()
-        for line in err.split('\n'):
-            if "Error" in line:
-                print(f"FFmpeg conversion error: {line.strip()}")
-        # Cleanup incomplete output files
-        if os.path.exists(output_path):
-            os.remove(output_path)
+        _report_conversion_failure(e.stderr, output_path)
         return False
     except Exception as e:
         print(f"General conversion failure: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def _report_conversion_failure(stderr, output_path):
+    """Logs the ffmpeg error lines of a failed conversion and removes the partial output."""
+    # Parse and log specific ffmpeg error messages
+    err = stderr.decode()
+    for line in err.split('\n'):
+        if "Error" in line:
+            print(f"FFmpeg conversion error: {line.strip()}")
+    # Cleanup incomplete output files
+    if os.path.exists(output_path):
+        os.remove(output_path)
+
+def _convert_format_command(input_path, output_path, video_codec=None, audio_codec=None, info=None):
+    """
+    Resolves the codecs for convert_video_format and builds its ffmpeg command.
+    
+    Args:
+        info (MediaInfo, optional): Already-probed source. If None and a codec is left on auto,
+                                    the source is probed here (blocking), so async callers
+                                    should pass the result of probe_async.
+    
+    Returns:
+        tuple[list, str]: The command (without thread flags or output path) and the chosen video codec.
+    """
+    # Query system encoders (cached per ffmpeg binary) for intelligent selection
+    has_encoder = get_ffmpeg_capabilities().has_encoder
+    
+    ext = os.path.splitext(output_path)[1].lower()
+    
+    # Remux fast path: codecs left on auto are copied if the target container accepts them
+    source = info
+    if source is None and (video_codec is None or audio_codec is None):
+        try:
+            source = probe(input_path)
+        except Exception:
+            source = None
+    
+    if source is not None:
+        if video_codec is None and source.video and source.video.codec_name in CONTAINER_VIDEO_CODECS.get(ext, ()):
+            video_codec = "copy"
+        if audio_codec is None and source.audio and source.audio.codec_name in CONTAINER_AUDIO_CODECS.get(ext, ()):
+            audio_codec = "copy"
+    
+    # Intelligent Video Codec Resolution
+    if video_codec is None:
+        if ext in [".mpg", ".mpeg", ".vob"]:
+            video_codec = "mpeg2video"
+        elif ext == ".webm":
+            video_codec = "libvpx-vp9"
+        else:
+            # Default to H.264 family
+            if has_encoder("libopenh264"):
+                video_codec = "libopenh264"
+            elif has_encoder("libx264"):
+                video_codec = "libx264"
+            elif has_encoder("mpeg4"):
+                video_codec = "mpeg4"
+            else:
+                video_codec = "copy"
+    
+    # Fallback logic for unsupported video encoders
+    if video_codec != "copy" and not has_encoder(video_codec):
+        print(f"Warning: Video encoder '{video_codec}' unavailable. Falling back.")
+        video_codec = "mpeg4" if has_encoder("mpeg4") else "copy"
+    
+    # Intelligent Audio Codec Resolution
+    if audio_codec is None:
+        if ext in [".mpg", ".mpeg", ".vob"]:
+            # Classic formats
+            audio_codec = "mp2" if has_encoder("mp2") else "copy"
+        elif ext == ".avi":
+            audio_codec = "libmp3lame" if has_encoder("libmp3lame") else "ac3"
+        elif ext == ".webm":
+            audio_codec = "libopus" if has_encoder("libopus") else "libvorbis"
+        else:
+            # Modern formats
+            if has_encoder("aac"):
+                audio_codec = "aac"
+            elif has_encoder("libmp3lame"):
+                audio_codec = "libmp3lame"
+            else:
+                audio_codec = "copy"
+    
+    # Fallback for unsupported audio encoders
+    if audio_codec != "copy" and not has_encoder(audio_codec):
+        audio_codec = "copy"
+    
+    # Build the conversion command
+    cmd = [
+        "ffmpeg", "-y", "-i", input_path,
+        "-map", "0:v:0?",   # Map first video stream if available
+        "-map", "0:a:0?",   # Map first audio stream if available
+        "-c:v", video_codec,
+        "-c:a", audio_codec,
+        "-map_metadata", "0" # Preserve metadata (tags, dates, etc.)
+    ]
+    
+    # Apply specific tuning for chosen encoders
+    if video_codec in ["libx264", "libopenh264"]:
+        cmd.extend(["-preset", "medium", "-crf", "23", "-pix_fmt", "yuv420p"])
+    elif video_codec == "mpeg2video":
+        cmd.extend(["-b:v", "3000k", "-maxrate", "3500k", "-bufsize", "4000k", "-g", "15"])
+    elif video_codec == "mpeg4":
+        cmd.extend(["-q:v", "3", "-pix_fmt", "yuv420p"])
+    elif video_codec == "libvpx-vp9":
+        cmd.extend(["-b:v", "0", "-crf", "31", "-deadline", "good"])
+    
+    # Audio tuning
+    if audio_codec in ["mp2", "ac3", "aac"]:
+        cmd.extend(["-b:a", "192k"])
+    elif audio_codec == "libmp3lame":
+        cmd.extend(["-q:a", "2"])
+    
+    # MP4-family optimization (faststart)
+    if ext in [".mp4", ".m4v", ".mov"]:
+        cmd.extend(["-movflags", "+faststart"])
+        # Copied HEVC needs the 'hvc1' tag to play in Apple players
+        if video_codec == "copy" and source is not None and source.video and source.video.codec_name == "hevc":
+            cmd.extend(["-tag:v", "hvc1"])
+    
+    # Handling for subtitles based on container support
+    if ext in [".mp4", ".m4v", ".mov"]:
+        cmd.extend(["-c:s", "mov_text"]) # QuickTime format
+    elif ext == ".mkv":
+        cmd.extend(["-c:s", "copy"])     # Keep existing subtitles
+    else:
+        cmd.extend(["-sn"])              # No subtitles for other formats
+    
+    return cmd, video_codec
@@ -4,5 +4,9 @@ Includes shared validation logic, performance decorators, and constant definitio
 """
 from .validation import validate_video_file, validate_ffmpeg
 from .decorators import redis_store_process
+from .scheduler import FFmpegScheduler, get_scheduler, configure_scheduler
+from .capabilities import FFmpegCapabilities, get_ffmpeg_capabilities
+from .progress import ProgressEvent, run_ffmpeg, iter_ffmpeg_progress
+from .journal import JobJournal
 
-__all__ = ["validate_video_file", "validate_ffmpeg", "redis_store_process"]
\ No newline at end of file
+__all__ = ["validate_video_file", "validate_ffmpeg", "redis_store_process", "FFmpegScheduler", "get_scheduler", "configure_scheduler", "FFmpegCapabilities", "get_ffmpeg_capabilities", "ProgressEvent", "run_ffmpeg", "iter_ffmpeg_progress", "JobJournal"]
\ No newline at end of file
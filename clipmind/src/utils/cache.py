@@ -0,0 +1,30 @@
+"""
+Shared on-disk cache location for clipmind.
+Probe results and other derived artefacts are stored under a single directory
+so they survive between processes and can be wiped in one place.
+"""
+import os
+from pathlib import Path
+
+
+def get_cache_dir(*parts):
+    """
+    Resolves (and creates) a directory inside the clipmind cache root.
+
+    The root is taken from CLIPMIND_CACHE_DIR if set, otherwise from
+    XDG_CACHE_HOME/clipmind, falling back to ~/.cache/clipmind.
+
+    Args:
+        *parts (str): Optional sub-directory names below the cache root.
+
+    Returns:
+        Path: The existing cache directory.
+    """
+    root = os.environ.get("CLIPMIND_CACHE_DIR")
+    if not root:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        root = os.path.join(base, "clipmind")
+
+    path = Path(root, *parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -0,0 +1,271 @@
+"""
+Cached registry of what the installed ffmpeg binary supports.
+Encoders, decoders, filters, muxers, hardware accelerators and command-line options
+are probed once per
+binary and reused from memory and disk, so callers never have to spawn
+'ffmpeg -encoders' (or similar) just to make a decision.
+"""
+import json
+import os
+import shutil
+import subprocess
+import threading
+
+from .cache import get_cache_dir
+
+CACHE_FILENAME = "ffmpeg_capabilities.json"
+
+# In-memory registry keyed by binary identity (path, mtime, size)
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class FFmpegCapabilities:
+    """
+    Snapshot of the features supported by one ffmpeg binary.
+    """
+    __slots__ = ("binary", "version", "encoders", "decoders", "filters", "muxers", "hwaccels", "options")
+
+    def __init__(self, binary=None, version=None, encoders=(), decoders=(), filters=(), muxers=(), hwaccels=(), options=()):
+        self.binary = binary
+        self.version = version
+        self.encoders = frozenset(encoders)
+        self.decoders = frozenset(decoders)
+        self.filters = frozenset(filters)
+        self.muxers = frozenset(muxers)
+        self.hwaccels = frozenset(hwaccels)
+        self.options = frozenset(options)
+
+    @property
+    def available(self):
+        """True if the binary was found and answered '-version'."""
+        return self.version is not None
+
+    def has_encoder(self, name):
+        """Checks if an encoder (e.g. 'libx264') is compiled into the binary."""
+        return name in self.encoders
+
+    def has_decoder(self, name):
+        """Checks if a decoder (e.g. 'h264') is compiled into the binary."""
+        return name in self.decoders
+
+    def has_filter(self, name):
+        """Checks if a filter (e.g. 'scale') is compiled into the binary."""
+        return name in self.filters
+
+    def has_muxer(self, name):
+        """Checks if a muxer (e.g. 'hls') is compiled into the binary."""
+        return name in self.muxers
+
+    def has_hwaccel(self, name):
+        """Checks if a hardware acceleration method (e.g. 'vaapi') is supported."""
+        return name in self.hwaccels
+
+    def has_option(self, name):
+        """Checks if the command line accepts an option (e.g. 'fps_mode', without the dash)."""
+        return name in self.options
+
+    def to_dict(self):
+        """Serialises the snapshot into a JSON-friendly dictionary."""
+        return {
+            "binary": self.binary,
+            "version": self.version,
+            "encoders": sorted(self.encoders),
+            "decoders": sorted(self.decoders),
+            "filters": sorted(self.filters),
+            "muxers": sorted(self.muxers),
+            "hwaccels": sorted(self.hwaccels),
+            "options": sorted(self.options),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuilds a snapshot from the output of to_dict."""
+        return cls(
+            binary=data.get("binary"),
+            version=data.get("version"),
+            encoders=data.get("encoders", ()),
+            decoders=data.get("decoders", ()),
+            filters=data.get("filters", ()),
+            muxers=data.get("muxers", ()),
+            hwaccels=data.get("hwaccels", ()),
+            options=data.get("options", ()),
+        )
+
+
+def _run_listing(binary, *flags):
+    """Runs one ffmpeg listing command (e.g. '-encoders') and returns its stdout."""
+    result = subprocess.run(
+        [binary, "-hide_banner", *flags],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    return result.stdout
+
+
+def _parse_codec_listing(output):
+    """
+    Extracts names from '-encoders' / '-decoders' / '-muxers' style listings.
+    Entries follow a dashed separator line and look like ' V....D libx264  description'.
+    """
+    names = set()
+    in_body = False
+    for line in output.splitlines():
+        stripped = line.strip()
+        if not in_body:
+            # The legend ends with a line made only of dashes
+            if stripped and set(stripped) == {"-"}:
+                in_body = True
+            continue
+        tokens = stripped.split()
+        if len(tokens) >= 2:
+            # Format listings may group several names, e.g. 'mov,mp4,m4a'
+            names.update(tokens[1].split(","))
+    return names
+
+
+def _parse_filter_listing(output):
+    """
+    Extracts names from the '-filters' listing.
+    Entries look like ' T.C scale  V->V  Scale the input video size...'.
+    """
+    names = set()
+    for line in output.splitlines():
+        tokens = line.split()
+        if len(tokens) >= 3 and "->" in tokens[2]:
+            names.add(tokens[1])
+    return names
+
+
+def _parse_hwaccel_listing(output):
+    """Extracts names from the '-hwaccels' listing (one method per line after the header)."""
+    return {line.strip() for line in output.splitlines()[1:] if line.strip()}
+
+
+def _parse_option_listing(output):
+    """
+    Extracts option names from '-h long'.
+    Entries look like '-fps_mode            set framerate mode for matching video streams'.
+    """
+    names = set()
+    for line in output.splitlines():
+        tokens = line.split()
+        if tokens and tokens[0].startswith("-") and len(tokens[0]) > 1:
+            names.add(tokens[0][1:])
+    return names
+
+
+def _probe_binary(binary):
+    """
+    Spawns ffmpeg once per listing to build a fresh capability snapshot.
+
+    Returns:
+        FFmpegCapabilities: The snapshot, with version None if ffmpeg is unusable.
+    """
+    result = subprocess.run(
+        [binary, "-version"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    if result.returncode != 0:
+        return FFmpegCapabilities(binary=binary)
+
+    # First line reads 'ffmpeg version <version> Copyright ...'
+    first_line = result.stdout.splitlines()[0] if result.stdout else ""
+    tokens = first_line.split()
+    version = tokens[2] if len(tokens) > 2 else "unknown"
+
+    return FFmpegCapabilities(
+        binary=binary,
+        version=version,
+        encoders=_parse_codec_listing(_run_listing(binary, "-encoders")),
+        decoders=_parse_codec_listing(_run_listing(binary, "-decoders")),
+        filters=_parse_filter_listing(_run_listing(binary, "-filters")),
+        muxers=_parse_codec_listing(_run_listing(binary, "-muxers")),
+        hwaccels=_parse_hwaccel_listing(_run_listing(binary, "-hwaccels")),
+        options=_parse_option_listing(_run_listing(binary, "-h", "long")),
+    )
+
+
+def _binary_key(path):
+    """Builds a cache key that changes whenever the binary is replaced or upgraded."""
+    stat = os.stat(path)
+    return f"{path}|{stat.st_mtime_ns}|{stat.st_size}"
+
+
+def _load_disk_cache():
+    """Reads the on-disk registry, returning an empty dict if it is missing or unreadable."""
+    try:
+        with open(get_cache_dir() / CACHE_FILENAME, "r") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _store_disk_cache(key, caps):
+    """Atomically records a snapshot in the on-disk registry. Failures are ignored."""
+    try:
+        cache_path = get_cache_dir() / CACHE_FILENAME
+        data = _load_disk_cache()
+        data[key] = caps.to_dict()
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+
+def get_ffmpeg_capabilities(binary="ffmpeg", refresh=False):
+    """
+    Returns the capability snapshot for an ffmpeg binary, probing it at most once.
+
+    Lookups go memory -> disk -> probe. Entries are keyed by the resolved binary path,
+    its mtime and size, and store the reported version, so upgrading or replacing
+    ffmpeg invalidates the cache automatically.
+
+    Args:
+        binary (str): Name or path of the ffmpeg executable. Defaults to "ffmpeg".
+        refresh (bool): If True, ignores cached entries and probes again.
+
+    Returns:
+        FFmpegCapabilities: The snapshot. Its 'available' flag is False if ffmpeg
+                            is missing or broken.
+    """
+    path = shutil.which(binary)
+    if path is None:
+        # Missing binaries are not cached so a later install is picked up
+        return FFmpegCapabilities(binary=binary)
+
+    path = os.path.realpath(path)
+
+    try:
+        key = _binary_key(path)
+    except OSError:
+        return FFmpegCapabilities(binary=binary)
+
+    with _registry_lock:
+        if not refresh and key in _registry:
+            return _registry[key]
+
+        if not refresh:
+            cached = _load_disk_cache().get(key)
+            # Entries written before options were recorded are probed again
+            if cached and "options" in cached:
+                caps = FFmpegCapabilities.from_dict(cached)
+                _registry[key] = caps
+                return caps
+
+        try:
+            caps = _probe_binary(path)
+        except Exception:
+            return FFmpegCapabilities(binary=binary)
+
+        # Only persist snapshots from a working binary
+        if caps.available:
+            _registry[key] = caps
+            _store_disk_cache(key, caps)
+        return caps
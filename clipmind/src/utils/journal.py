@@ -0,0 +1,138 @@
+"""
+Job journals for resumable transcoding and packaging.
+A journal records which units of a job (renditions, variants, segments) are finished,
+either in a JSON file under the clipmind cache directory or in a RedisStore, so a job
+restarted after a crash or preemption can skip work that is already done.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from .cache import get_cache_dir
+
+
+class JobJournal:
+    """
+    Persistent record of the finished units of one job.
+    Every update is written through immediately, so the journal is never behind the outputs.
+    """
+
+    def __init__(self, job_id, store=None, directory=None):
+        """
+        Opens (or creates) the journal of a job.
+
+        Args:
+            job_id (str): Stable identifier of the job, e.g. from JobJournal.for_inputs.
+            store (RedisStore, optional): Keeps the journal in Redis so any node can resume
+                                          the job. Defaults to a JSON file on local disk.
+            directory (str, optional): Directory for the JSON file. Defaults to the
+                                       'journals' folder of the clipmind cache.
+        """
+        self.job_id = str(job_id)
+        self.store = store
+        self._lock = threading.Lock()
+
+        if store is None:
+            directory = directory or get_cache_dir("journals")
+            os.makedirs(directory, exist_ok=True)
+            self.path = os.path.join(directory, f"{self.job_id}.json")
+        else:
+            self.path = None
+
+        self._units = self._load()
+
+    @classmethod
+    def for_inputs(cls, *parts, store=None, directory=None):
+        """
+        Opens the journal of a job identified by its inputs and parameters.
+        Existing files are identified by path, size and mtime, so replacing the source
+        starts a fresh journal instead of resuming stale work.
+
+        Args:
+            *parts: Input paths and any parameters that change the output.
+            store (RedisStore, optional): See __init__.
+            directory (str, optional): See __init__.
+
+        Returns:
+            JobJournal: The journal for these inputs.
+        """
+        identity = []
+        for part in parts:
+            part = str(part)
+            if os.path.isfile(part):
+                stat = os.stat(part)
+                part = f"{os.path.realpath(part)}|{stat.st_size}|{stat.st_mtime_ns}"
+            identity.append(part)
+        job_id = hashlib.sha1("\n".join(identity).encode("utf-8")).hexdigest()
+        return cls(job_id, store=store, directory=directory)
+
+    def _store_key(self):
+        """Redis key of the journal."""
+        return f"journal:{self.job_id}"
+
+    def _load(self):
+        """Reads the journal, returning an empty one if it is missing or unreadable."""
+        try:
+            if self.store is not None:
+                data = self.store.get(self._store_key())
+            else:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        except Exception:
+            # Redis being unreachable only costs the ability to resume
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _save(self):
+        """Writes the journal through (atomically on disk)."""
+        if self.store is not None:
+            self.store.set(self._store_key(), self._units)
+            return
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._units, f)
+        os.replace(tmp_path, self.path)
+
+    def is_done(self, unit):
+        """Checks if a unit (e.g. '720p') was recorded as finished."""
+        with self._lock:
+            return unit in self._units
+
+    def get(self, unit, default=None):
+        """Returns the data recorded for a unit, or default if it has none."""
+        with self._lock:
+            return self._units.get(unit, default)
+
+    def mark_done(self, unit, data=True):
+        """
+        Records a unit as finished.
+
+        Args:
+            unit (str): Name of the unit.
+            data (optional): JSON-serialisable details kept with it (e.g. segment durations).
+        """
+        with self._lock:
+            self._units[unit] = data
+            self._save()
+
+    def discard(self, unit):
+        """Forgets a unit, e.g. when its output turned out to be missing."""
+        with self._lock:
+            if self._units.pop(unit, None) is not None:
+                self._save()
+
+    def clear(self):
+        """Removes the whole journal."""
+        with self._lock:
+            self._units = {}
+            if self.store is not None:
+                self.store.delete(self._store_key())
+            elif os.path.exists(self.path):
+                os.remove(self.path)
+
+    def __repr__(self):
+        return f"JobJournal(job_id={self.job_id!r}, units={len(self._units)})"
@@ -0,0 +1,226 @@
+"""
+Structured progress telemetry for ffmpeg processes.
+Commands are started with '-progress pipe:1' and the key=value blocks ffmpeg emits
+are parsed into ProgressEvent objects, delivered to a callback or an iterator while
+the encode is still running.
+"""
+import subprocess
+import threading
+from typing import Callable, Iterator, List, Optional
+
+# Global flags that make ffmpeg write machine-readable progress to stdout
+PROGRESS_ARGS = ["-progress", "pipe:1", "-nostats"]
+
+
+class ProgressEvent:
+    """
+    One progress report from a running ffmpeg process.
+    Numeric fields are None when ffmpeg reports 'N/A' (e.g. before the first frame).
+    """
+    __slots__ = ("frame", "fps", "speed", "out_time", "bitrate", "total_size", "done")
+
+    def __init__(self, frame=None, fps=None, speed=None, out_time=None, bitrate=None, total_size=None, done=False):
+        self.frame: Optional[int] = frame            # Frames written so far
+        self.fps: Optional[float] = fps              # Current encoding frames per second
+        self.speed: Optional[float] = speed          # Encoding speed as a multiple of realtime
+        self.out_time: Optional[float] = out_time    # Output position in seconds
+        self.bitrate: Optional[float] = bitrate      # Current output bitrate in kbit/s
+        self.total_size: Optional[int] = total_size  # Bytes written so far
+        self.done: bool = done                       # True for the final report
+
+    @property
+    def is_realtime(self) -> bool:
+        """True if the job is encoding at least as fast as playback."""
+        return self.speed is not None and self.speed >= 1.0
+
+    def as_dict(self) -> dict:
+        """Returns the event as a plain dictionary (e.g. for logging or metrics)."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return (f"ProgressEvent(frame={self.frame}, fps={self.fps}, speed={self.speed}, "
+                f"out_time={self.out_time}, bitrate={self.bitrate}, total_size={self.total_size}, done={self.done})")
+
+
+def _to_float(value) -> Optional[float]:
+    """Parses ffmpeg numbers, stripping unit suffixes such as 'x' or 'kbits/s'."""
+    if value is None:
+        return None
+    value = value.strip().rstrip("x").replace("kbits/s", "")
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _to_int(value) -> Optional[int]:
+    """Parses ffmpeg integers, tolerating 'N/A'."""
+    number = _to_float(value)
+    return int(number) if number is not None else None
+
+
+def _build_event(fields: dict) -> ProgressEvent:
+    """Converts one key=value block into a ProgressEvent."""
+    # out_time_us is the precise value; out_time_ms is (despite its name) also microseconds
+    micros = _to_int(fields.get("out_time_us")) or _to_int(fields.get("out_time_ms"))
+    out_time = micros / 1_000_000 if micros is not None and micros >= 0 else None
+
+    return ProgressEvent(
+        frame=_to_int(fields.get("frame")),
+        fps=_to_float(fields.get("fps")),
+        speed=_to_float(fields.get("speed")),
+        out_time=out_time,
+        bitrate=_to_float(fields.get("bitrate")),
+        total_size=_to_int(fields.get("total_size")),
+        done=fields.get("progress") == "end",
+    )
+
+
+def parse_progress(lines) -> Iterator[ProgressEvent]:
+    """
+    Parses the '-progress' stream into events.
+
+    Args:
+        lines (iterable): Lines (str or bytes) written by ffmpeg to its progress pipe.
+
+    Yields:
+        ProgressEvent: One event per 'progress=continue|end' block.
+    """
+    fields = {}
+    for line in lines:
+        event = feed_progress_line(fields, line)
+        if event is not None:
+            yield event
+
+
+def feed_progress_line(fields: dict, line) -> Optional[ProgressEvent]:
+    """
+    Incremental form of parse_progress for callers that read lines themselves
+    (e.g. from an asyncio stream).
+
+    Args:
+        fields (dict): Scratch dictionary holding the block being assembled. Pass
+                       the same dict for every line of one process.
+        line (str/bytes): One line of progress output.
+
+    Returns:
+        ProgressEvent or None: An event when the line completes a block.
+    """
+    if isinstance(line, bytes):
+        line = line.decode("utf-8", "replace")
+    key, sep, value = line.strip().partition("=")
+    if not sep:
+        return None
+    fields[key] = value
+    # Every block is terminated by a 'progress' line
+    if key == "progress":
+        event = _build_event(fields)
+        fields.clear()
+        return event
+    return None
+
+
+def with_progress_args(cmd: List[str]) -> List[str]:
+    """Inserts the progress flags right after the ffmpeg executable."""
+    return [cmd[0], *PROGRESS_ARGS, *cmd[1:]]
+
+
+def _spawn(cmd: List[str], input: Optional[bytes] = None):
+    """
+    Starts ffmpeg with progress reporting and drains stderr on a background thread
+    so a chatty process can never block on a full pipe. If input is given, it is
+    written to ffmpeg's stdin (e.g. a concat list read from 'pipe:0') from another thread.
+
+    Returns:
+        tuple: (process, stderr_chunks, stderr_thread)
+    """
+    process = subprocess.Popen(
+        with_progress_args(cmd),
+        stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    stderr_chunks = []
+
+    def feed():
+        try:
+            process.stdin.write(input)
+            process.stdin.close()
+        except OSError:
+            # ffmpeg exited before reading everything; its stderr explains why
+            pass
+
+    def drain():
+        stderr_chunks.append(process.stderr.read())
+
+    if input is not None:
+        threading.Thread(target=feed, daemon=True).start()
+
+    thread = threading.Thread(target=drain, daemon=True)
+    thread.start()
+    return process, stderr_chunks, thread
+
+
+def _finish(cmd, process, stderr_chunks, thread, check):
+    """Waits for ffmpeg to exit and builds the CompletedProcess (raising on failure if asked)."""
+    returncode = process.wait()
+    thread.join()
+    stderr = b"".join(stderr_chunks)
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, output=b"", stderr=stderr)
+    return subprocess.CompletedProcess(cmd, returncode, b"", stderr)
+
+
+def run_ffmpeg(cmd: List[str], on_progress: Optional[Callable[[ProgressEvent], None]] = None, check: bool = True,
+               input: Optional[bytes] = None):
+    """
+    Runs an ffmpeg command with '-progress pipe:1', reporting progress while it runs.
+    Drop-in replacement for subprocess.run(cmd, check=True, stdout=PIPE, stderr=PIPE).
+
+    Args:
+        cmd (list): Full ffmpeg command line, starting with the executable.
+                    Must not write its own output to stdout.
+        on_progress (callable, optional): Called with each ProgressEvent. If it raises,
+                                          ffmpeg is killed and the error propagates.
+        check (bool): If True, raises CalledProcessError on a non-zero exit code.
+        input (bytes, optional): Data written to ffmpeg's stdin, for commands reading 'pipe:0'.
+
+    Returns:
+        subprocess.CompletedProcess: With stderr captured as bytes.
+    """
+    process, stderr_chunks, thread = _spawn(cmd, input)
+    try:
+        for event in parse_progress(process.stdout):
+            if on_progress is not None:
+                on_progress(event)
+    except BaseException:
+        process.kill()
+        process.wait()
+        thread.join()
+        raise
+    return _finish(cmd, process, stderr_chunks, thread, check)
+
+
+def iter_ffmpeg_progress(cmd: List[str], check: bool = True) -> Iterator[ProgressEvent]:
+    """
+    Runs an ffmpeg command and yields its progress events as they arrive.
+    Closing the iterator early kills the ffmpeg process.
+
+    Args:
+        cmd (list): Full ffmpeg command line, starting with the executable.
+        check (bool): If True, raises CalledProcessError after the last event on failure.
+
+    Yields:
+        ProgressEvent: Progress reports until ffmpeg exits.
+    """
+    process, stderr_chunks, thread = _spawn(cmd)
+    finished = False
+    try:
+        yield from parse_progress(process.stdout)
+        finished = True
+    finally:
+        if not finished:
+            process.kill()
+            process.wait()
+            thread.join()
+    _finish(cmd, process, stderr_chunks, thread, check)
@@ -0,0 +1,181 @@
+"""
+CPU-budget-aware scheduling for concurrent ffmpeg jobs.
+Encoders such as libx264 are already multithreaded, so running one job per CPU
+oversubscribes the machine. The scheduler splits a fixed core budget across a
+bounded number of concurrent jobs and tells each job how many threads to use.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+# Threads handed to each job when neither max_jobs nor threads_per_job is given.
+# libx264 scales well up to a handful of threads per stream at these resolutions.
+DEFAULT_THREADS_PER_JOB = 4
+
+# Encoders that accept a thread count through '-x264-params'. The generic 'h264' name
+# may resolve to nvenc, videotoolbox or openh264, which reject it, so only libx264 counts.
+X264_ENCODERS = {"libx264"}
+
+
+class FFmpegScheduler:
+    """
+    Shares a fixed CPU core budget between concurrently running ffmpeg jobs.
+    Limits how many jobs run at once and assigns each one a thread count so that
+    the total never exceeds the budget.
+    """
+    def __init__(self, cpu_budget=None, max_jobs=None, threads_per_job=None):
+        """
+        Args:
+            cpu_budget (int, optional): Total number of cores ffmpeg jobs may use.
+                                        Defaults to os.cpu_count().
+            max_jobs (int, optional): Maximum number of jobs running at once.
+                                      Derived from the budget if omitted.
+            threads_per_job (int, optional): Threads assigned to each job.
+                                             Derived from the budget if omitted.
+        """
+        cpu_budget = max(1, int(cpu_budget or os.cpu_count() or 1))
+
+        # Derive whichever of the two knobs was not provided from the budget
+        if threads_per_job is None:
+            if max_jobs is None:
+                threads_per_job = min(cpu_budget, DEFAULT_THREADS_PER_JOB)
+            else:
+                threads_per_job = cpu_budget // max(1, int(max_jobs))
+        threads_per_job = max(1, int(threads_per_job))
+
+        if max_jobs is None:
+            max_jobs = cpu_budget // threads_per_job
+        max_jobs = max(1, int(max_jobs))
+
+        self.cpu_budget = cpu_budget
+        self.max_jobs = max_jobs
+        self.threads_per_job = threads_per_job
+
+        # Condition-guarded counter so weighted jobs can take several slots atomically
+        self._cond = threading.Condition()
+        self._active = 0
+
+    def acquire(self, slots=1):
+        """
+        Blocks until enough job slots are free and reserves them.
+        Every call must be paired with release() using the same slot count;
+        prefer job() unless the reservation cannot be scoped to a with-block
+        (e.g. when it is taken from an executor thread on behalf of a coroutine).
+
+        Args:
+            slots (int): Number of job slots to reserve. Clamped to max_jobs.
+
+        Returns:
+            int: The number of threads the job may use.
+        """
+        slots = self._clamp(slots)
+        with self._cond:
+            # Wait until the reservation fits inside the concurrency limit
+            while self._active + slots > self.max_jobs:
+                self._cond.wait()
+            self._active += slots
+        return self.threads_per_job * slots
+
+    def release(self, slots=1):
+        """
+        Returns slots reserved with acquire() and wakes up waiting jobs.
+
+        Args:
+            slots (int): Number of job slots to return, as passed to acquire().
+        """
+        slots = self._clamp(slots)
+        with self._cond:
+            self._active -= slots
+            self._cond.notify_all()
+
+    def _clamp(self, slots):
+        """Keeps a slot request between one and max_jobs so it can always be granted."""
+        return max(1, min(int(slots), self.max_jobs))
+
+    @contextmanager
+    def job(self, slots=1):
+        """
+        Reserves capacity for one ffmpeg job, blocking until enough slots are free.
+
+        Args:
+            slots (int): Number of job slots to reserve. Processes that run several
+                         encoders at once (e.g. a single-decode ladder) can take more
+                         than one. Clamped to max_jobs.
+
+        Yields:
+            int: The number of threads the job may use.
+        """
+        threads = self.acquire(slots)
+        try:
+            yield threads
+        finally:
+            self.release(slots)
+
+    def thread_args(self, encoder=None, threads=None):
+        """
+        Builds the ffmpeg command-line flags that pin a job to its thread share.
+
+        Args:
+            encoder (str, optional): Video encoder of the job. '-x264-params' is only added
+                                     for an explicit 'libx264'; other encoders get '-threads'.
+            threads (int, optional): Thread count to apply. Defaults to threads_per_job.
+
+        Returns:
+            list: Flags such as ['-threads', '4', '-x264-params', 'threads=4'].
+        """
+        threads = threads or self.threads_per_job
+        args = ["-threads", str(threads)]
+        if encoder in X264_ENCODERS:
+            args.extend(["-x264-params", f"threads={threads}"])
+        return args
+
+    def thread_kwargs(self, encoder=None, threads=None):
+        """
+        Same as thread_args, but as keyword arguments for ffmpeg-python outputs.
+
+        Returns:
+            dict: Output options such as {'threads': 4, 'x264-params': 'threads=4'}.
+        """
+        threads = threads or self.threads_per_job
+        kwargs = {"threads": threads}
+        if encoder in X264_ENCODERS:
+            kwargs["x264-params"] = f"threads={threads}"
+        return kwargs
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler():
+    """
+    Returns the process-wide scheduler shared by all clipmind transcode paths,
+    creating one sized to the machine on first use.
+
+    Returns:
+        FFmpegScheduler: The shared scheduler instance.
+    """
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = FFmpegScheduler()
+        return _default_scheduler
+
+
+def configure_scheduler(cpu_budget=None, max_jobs=None, threads_per_job=None):
+    """
+    Replaces the shared scheduler with one using the given core budget.
+
+    Args:
+        cpu_budget (int, optional): Total cores available to ffmpeg jobs.
+        max_jobs (int, optional): Maximum number of concurrent jobs.
+        threads_per_job (int, optional): Threads assigned to each job.
+
+    Returns:
+        FFmpegScheduler: The newly configured shared scheduler.
+    """
+    global _default_scheduler
+    scheduler = FFmpegScheduler(cpu_budget, max_jobs, threads_per_job)
+    with _default_lock:
+        _default_scheduler = scheduler
+    return scheduler
@@ -1,7 +1,8 @@
 import os
-import subprocess
 from pathlib import Path
 
+from .capabilities import get_ffmpeg_capabilities
+
 
 def validate_video_file(video_path):
     """
@@ -42,23 +43,19 @@ def validate_video_file(video_path):
 def validate_ffmpeg():
     """
     Checks if the 'ffmpeg' command-line tool is installed and accessible in the system PATH.
+    Reads the cached capability registry, so no process is spawned once ffmpeg has been probed.
     
     Returns:
         bool: True if ffmpeg is available and functional, False otherwise.
     """
     try:
-        # Attempt to run ffmpeg with the -version flag to verify installation
-        result = subprocess.run(['ffmpeg', '-version'],
-                              stdout=subprocess.PIPE,
-                              stderr=subprocess.PIPE,
-                              text=True)
-        return result.returncode == 0
-    except FileNotFoundError:
-        # Specifically handle the case where the command is missing from the system
+        if get_ffmpeg_capabilities().available:
+            return True
+        # Either the command is missing from the system or it failed to run
         print("Error: ffmpeg is not installed or not found in system PATH.")
         print("Please install ffmpeg before running this script.")
         return False
     except Exception as e:
-        # Catch unexpected errors during the process check
+        # Catch unexpected errors during the capability lookup
         print(f"Error checking ffmpeg state: {e}")
         return False
@@ -0,0 +1,61 @@
+from clipmind.src.utils.capabilities import FFmpegCapabilities, _parse_codec_listing, _parse_option_listing
+
+ENCODERS = """Encoders:
+ V..... = Video
+ A..... = Audio
+ .F.... = Frame-level multithreading
+ ------
+ V....D libx264              libx264 H.264 / AVC / MPEG-4 AVC / MPEG-4 part 10 (codec h264)
+ V....D h264_nvenc           NVIDIA NVENC H.264 encoder (codec h264)
+ A....D aac                  AAC (Advanced Audio Coding)
+"""
+
+HELP_LONG = """Hyper fast Audio and Video encoder
+usage: ffmpeg [options] [[infile options] -i infile]... {[outfile options] outfile}...
+
+Advanced Video options:
+-vsync              set video sync method globally; deprecated, use -fps_mode
+-fps_mode           set framerate mode for matching video streams; overrides vsync
+-force_key_frames timestamps  force key frames at specified timestamps
+"""
+
+MUXERS = """File formats:
+ D. = Demuxing supported
+ .E = Muxing supported
+ --
+  E mov,mp4,m4a,3gp,3g2,mj2 QuickTime / MOV
+  E hls             Apple HTTP Live Streaming
+"""
+
+
+def test_encoder_listing():
+    assert _parse_codec_listing(ENCODERS) == {"libx264", "h264_nvenc", "aac"}
+
+
+def test_legend_is_skipped():
+    names = _parse_codec_listing(ENCODERS)
+
+    assert "V....." not in names
+    assert "=" not in names
+
+
+def test_grouped_format_names_are_split():
+    assert _parse_codec_listing(MUXERS) == {"mov", "mp4", "m4a", "3gp", "3g2", "mj2", "hls"}
+
+
+def test_listing_without_separator_is_empty():
+    assert _parse_codec_listing("ffmpeg version n6.0\n") == set()
+
+
+def test_option_listing():
+    options = _parse_option_listing(HELP_LONG)
+
+    assert options == {"vsync", "fps_mode", "force_key_frames"}
+
+
+def test_snapshots_without_options_know_none():
+    caps = FFmpegCapabilities.from_dict({"version": "4.4", "encoders": ["libx264"]})
+
+    assert caps.has_encoder("libx264")
+    assert not caps.has_option("fps_mode")
+    assert FFmpegCapabilities.from_dict(caps.to_dict()).options == caps.options
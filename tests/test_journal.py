@@ -0,0 +1,78 @@
+from clipmind.src.utils.journal import JobJournal
+
+
+def test_round_trip(tmp_path):
+    journal = JobJournal("job", directory=tmp_path)
+    journal.mark_done("720p")
+    journal.mark_done("360p", {"segments": [["segment_000.m4s", 10.0]]})
+
+    reopened = JobJournal("job", directory=tmp_path)
+
+    assert reopened.is_done("720p")
+    assert reopened.get("360p") == {"segments": [["segment_000.m4s", 10.0]]}
+    assert not reopened.is_done("1080p")
+    assert reopened.get("1080p", "missing") == "missing"
+
+
+def test_discard(tmp_path):
+    journal = JobJournal("job", directory=tmp_path)
+    journal.mark_done("720p")
+    journal.mark_done("360p")
+
+    journal.discard("720p")
+    journal.discard("1080p")
+
+    reopened = JobJournal("job", directory=tmp_path)
+    assert not reopened.is_done("720p")
+    assert reopened.is_done("360p")
+
+
+def test_clear(tmp_path):
+    journal = JobJournal("job", directory=tmp_path)
+    journal.mark_done("720p")
+
+    journal.clear()
+
+    assert not (tmp_path / "job.json").exists()
+    assert not JobJournal("job", directory=tmp_path).is_done("720p")
+
+
+def test_unreadable_journal_starts_empty(tmp_path):
+    (tmp_path / "job.json").write_text("{not json")
+
+    assert not JobJournal("job", directory=tmp_path).is_done("720p")
+
+
+def test_for_inputs_tracks_source_changes(tmp_path):
+    source = tmp_path / "source.mp4"
+    source.write_bytes(b"a")
+    first = JobJournal.for_inputs(source, "720p", directory=tmp_path)
+
+    assert JobJournal.for_inputs(source, "720p", directory=tmp_path).job_id == first.job_id
+    assert JobJournal.for_inputs(source, "1080p", directory=tmp_path).job_id != first.job_id
+
+    source.write_bytes(b"longer")
+    assert JobJournal.for_inputs(source, "720p", directory=tmp_path).job_id != first.job_id
+
+
+class FakeStore:
+    """In-memory stand-in for RedisStore."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def test_store_round_trip():
+    store = FakeStore()
+    JobJournal("job", store=store).mark_done("720p", 3)
+
+    assert JobJournal("job", store=store).get("720p") == 3
@@ -0,0 +1,110 @@
+import importlib
+
+import pytest
+
+from clipmind.src.core.ladder import cap_bitrate, parse_kbps, plan_ladder
+from clipmind.src.core.probe import MediaInfo
+
+ladder = importlib.import_module("clipmind.src.core.ladder")
+
+RUNGS = [("360p", 360, "800k"), ("720p", 720, "2800k"), ("1080p", 1080, "5000k")]
+
+
+def _source(height, bit_rate="3000000", frame_rate="30/1"):
+    """MediaInfo of a 16:9 source with one video stream."""
+    return MediaInfo("source.mp4", {
+        "format": {"duration": "60.0"},
+        "streams": [{
+            "codec_type": "video",
+            "width": height * 16 // 9,
+            "height": height,
+            "bit_rate": bit_rate,
+            "avg_frame_rate": frame_rate,
+        }],
+    })
+
+
+@pytest.fixture
+def source(monkeypatch):
+    """Makes plan_ladder see the MediaInfo returned by the fixture's setter."""
+    def use(info):
+        monkeypatch.setattr(ladder, "probe", lambda path: info)
+    return use
+
+
+def test_parse_kbps():
+    assert parse_kbps("2500k") == 2500
+    assert parse_kbps("5M") == 5000
+    assert parse_kbps(800000) == 800
+
+
+def test_cap_bitrate():
+    assert cap_bitrate("5000k", source_kbps=3000) == "3000k"
+    assert cap_bitrate("800k", source_kbps=3000) == "800k"
+    assert cap_bitrate("800k") == "800k"
+    # Frame-rate scaling only applies when a frame rate is passed
+    assert cap_bitrate("3000k", source_fps=15) == "1500k"
+    assert cap_bitrate("3000k", source_fps=5) == "1500k"
+
+
+def test_drop_removes_rungs_above_source(source):
+    source(_source(720))
+
+    plan = plan_ladder("source.mp4", RUNGS, policy="drop")
+
+    assert plan.rungs == [("360p", 360, "800k"), ("720p", 720, "2800k")]
+    assert plan.skipped == ["1080p"]
+
+
+def test_bitrates_are_capped_at_source(source):
+    source(_source(1080, bit_rate="2000000"))
+
+    plan = plan_ladder("source.mp4", RUNGS)
+
+    assert plan.rungs == [("360p", 360, "800k"), ("720p", 720, "2000k"), ("1080p", 1080, "2000k")]
+    assert plan.skipped == []
+
+
+def test_clamp_adds_source_height_rung(source):
+    # Odd heights are rounded down to what encoders accept
+    source(_source(541))
+
+    plan = plan_ladder("source.mp4", RUNGS, policy="clamp")
+
+    assert plan.rungs == [("360p", 360, "800k"), (None, 540, "2800k")]
+    assert plan.skipped == ["720p", "1080p"]
+
+
+def test_clamp_keeps_existing_source_height_rung(source):
+    source(_source(720))
+
+    plan = plan_ladder("source.mp4", RUNGS, policy="clamp")
+
+    assert plan.rungs == [("360p", 360, "800k"), ("720p", 720, "2800k")]
+    assert plan.skipped == ["1080p"]
+
+
+def test_fps_scaling_is_opt_in(source):
+    source(_source(1080, bit_rate="10000000", frame_rate="24/1"))
+
+    default = plan_ladder("source.mp4", RUNGS)
+    scaled = plan_ladder("source.mp4", RUNGS, scale_for_fps=True)
+
+    assert [bitrate for _, _, bitrate in default.rungs] == ["800k", "2800k", "5000k"]
+    assert [bitrate for _, _, bitrate in scaled.rungs] == ["640k", "2240k", "4000k"]
+
+
+def test_unprobeable_source_keeps_ladder(monkeypatch):
+    def fail(path):
+        raise OSError("no such file")
+    monkeypatch.setattr(ladder, "probe", fail)
+
+    plan = plan_ladder("missing.mp4", RUNGS)
+
+    assert plan.rungs == RUNGS
+    assert plan.skipped == []
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        plan_ladder("source.mp4", RUNGS, policy="stretch")
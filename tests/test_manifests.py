@@ -0,0 +1,116 @@
+from clipmind.src.core.manifests import parse_media_playlist, read_media_playlist, write_dash_manifest
+
+
+SEGMENTED_PLAYLIST = """#EXTM3U
+#EXT-X-VERSION:7
+#EXT-X-TARGETDURATION:10
+#EXT-X-MAP:URI="init_360p.mp4"
+#EXTINF:10.010000,
+segment_000.m4s
+#EXTINF:4.500000,
+segment_001.m4s
+#EXT-X-ENDLIST
+"""
+
+SINGLE_FILE_PLAYLIST = """#EXTM3U
+#EXT-X-VERSION:7
+#EXT-X-MAP:URI="media.m4s",BYTERANGE="812@0"
+#EXTINF:10.000000,
+#EXT-X-BYTERANGE:75232@812
+media.m4s
+#EXTINF:10.000000,
+#EXT-X-BYTERANGE:60000
+media.m4s
+#EXTINF:2.000000,
+#EXT-X-BYTERANGE:1000
+media.m4s
+"""
+
+
+def test_parse_segmented_playlist():
+    playlist = parse_media_playlist(SEGMENTED_PLAYLIST)
+
+    assert playlist['init'] == "init_360p.mp4"
+    assert playlist['init_range'] is None
+    assert playlist['segments'] == [
+        ("segment_000.m4s", 10.01, None),
+        ("segment_001.m4s", 4.5, None),
+    ]
+    assert playlist['ended'] is True
+
+
+def test_parse_byte_ranges_continue_without_offset():
+    playlist = parse_media_playlist(SINGLE_FILE_PLAYLIST)
+
+    assert playlist['init'] == "media.m4s"
+    assert playlist['init_range'] == (0, 812)
+    # Ranges without '@' start right after the previous segment's range
+    assert [segment[2] for segment in playlist['segments']] == [
+        (812, 75232),
+        (76044, 60000),
+        (136044, 1000),
+    ]
+    assert playlist['ended'] is False
+
+
+def test_read_ignores_unterminated_last_line(tmp_path):
+    path = tmp_path / "playlist.m3u8"
+    # ffmpeg is still writing the second URI
+    path.write_text(SEGMENTED_PLAYLIST.split("segment_001")[0] + "segment_0")
+
+    playlist = read_media_playlist(path)
+
+    assert [segment[0] for segment in playlist['segments']] == ["segment_000.m4s"]
+
+
+def test_read_missing_playlist_returns_none(tmp_path):
+    assert read_media_playlist(tmp_path / "missing.m3u8") is None
+
+
+def _write_variant(output_dir, name, text):
+    variant_dir = output_dir / name
+    variant_dir.mkdir()
+    (variant_dir / "playlist.m3u8").write_text(text)
+
+
+def test_dash_manifest_segment_list(tmp_path, monkeypatch):
+    # Codec detection probes the init segment; it is optional for the MPD
+    monkeypatch.setattr("clipmind.src.core.manifests.probe", _unreadable)
+    _write_variant(tmp_path, "360p", SEGMENTED_PLAYLIST)
+    profiles = {"360p": {"width": 640, "height": 360, "bandwidth": 800000}}
+
+    mpd_path = write_dash_manifest(tmp_path / "manifest.mpd", tmp_path, ["360p"], profiles)
+
+    mpd = mpd_path.read_text()
+    assert 'mediaPresentationDuration="PT14.510S"' in mpd
+    assert '<Initialization sourceURL="360p/init_360p.mp4"/>' in mpd
+    assert '<S d="10010"/>' in mpd
+    assert '<S d="4500"/>' in mpd
+    assert '<SegmentURL media="360p/segment_000.m4s"/>' in mpd
+    assert '<SegmentURL media="360p/segment_001.m4s"/>' in mpd
+    assert "codecs=" not in mpd
+
+
+def test_dash_manifest_byte_ranges(tmp_path, monkeypatch):
+    monkeypatch.setattr("clipmind.src.core.manifests.probe", _unreadable)
+    _write_variant(tmp_path, "720p", SINGLE_FILE_PLAYLIST)
+    profiles = {"720p": {"width": 1280, "height": 720, "bandwidth": 2800000}}
+
+    mpd = write_dash_manifest(tmp_path / "manifest.mpd", tmp_path, ["720p"], profiles).read_text()
+
+    # DASH ranges are inclusive at both ends
+    assert '<Initialization sourceURL="720p/media.m4s" range="0-811"/>' in mpd
+    assert '<SegmentURL media="720p/media.m4s" mediaRange="812-76043"/>' in mpd
+    assert '<SegmentURL media="720p/media.m4s" mediaRange="76044-136043"/>' in mpd
+    assert '<SegmentURL media="720p/media.m4s" mediaRange="136044-137043"/>' in mpd
+
+
+def test_dash_manifest_requires_fmp4(tmp_path):
+    _write_variant(tmp_path, "360p", "#EXTM3U\n#EXTINF:10.0,\nsegment_000.ts\n#EXT-X-ENDLIST\n")
+    profiles = {"360p": {"width": 640, "height": 360, "bandwidth": 800000}}
+
+    assert write_dash_manifest(tmp_path / "manifest.mpd", tmp_path, ["360p"], profiles) is None
+
+
+def _unreadable(path):
+    raise OSError(f"cannot probe {path}")
@@ -0,0 +1,61 @@
+from clipmind.src.utils.progress import feed_progress_line, parse_progress
+
+BLOCK = [
+    "frame=120\n",
+    "fps=59.94\n",
+    "bitrate=1843.2kbits/s\n",
+    "total_size=1048576\n",
+    "out_time_us=4004000\n",
+    "out_time_ms=4004000\n",
+    "speed=1.98x\n",
+    "progress=continue\n",
+]
+
+
+def test_event_is_emitted_on_progress_line():
+    fields = {}
+
+    events = [feed_progress_line(fields, line) for line in BLOCK]
+
+    assert events[:-1] == [None] * (len(BLOCK) - 1)
+    event = events[-1]
+    assert event.frame == 120
+    assert event.fps == 59.94
+    assert event.bitrate == 1843.2
+    assert event.total_size == 1048576
+    assert event.out_time == 4.004
+    assert event.speed == 1.98
+    assert event.is_realtime
+    assert not event.done
+    # The scratch dict is reset for the next block
+    assert fields == {}
+
+
+def test_bytes_and_not_available_values():
+    fields = {}
+    for line in [b"frame=0\n", b"fps=0.00\n", b"bitrate=N/A\n", b"out_time_us=N/A\n", b"speed=N/A\n"]:
+        assert feed_progress_line(fields, line) is None
+
+    event = feed_progress_line(fields, b"progress=end\n")
+
+    assert event.frame == 0
+    assert event.bitrate is None
+    assert event.out_time is None
+    assert event.speed is None
+    assert not event.is_realtime
+    assert event.done
+
+
+def test_lines_without_separator_are_ignored():
+    fields = {}
+
+    assert feed_progress_line(fields, "\n") is None
+    assert feed_progress_line(fields, "garbage") is None
+    assert fields == {}
+
+
+def test_parse_progress_yields_one_event_per_block():
+    events = list(parse_progress(BLOCK + ["frame=240\n", "progress=end\n"]))
+
+    assert [event.frame for event in events] == [120, 240]
+    assert [event.done for event in events] == [False, True]
@@ -0,0 +1,69 @@
+import re
+
+from clipmind.src.core.video_tools import _timestamp_select_expr
+
+
+def _select(expr, frame_times):
+    """Evaluates a select expression the way ffmpeg does, returning the picked frame times."""
+    # Python spelling of the expression: if() becomes a function, thresholds stay as numbers
+    code = re.sub(r"\bif\(", "if_(", expr)
+    picked = []
+    for t in frame_times:
+        scope = {
+            "if_": lambda cond, then, otherwise: then if cond else otherwise,
+            "lt": lambda a, b: int(a < b),
+            "gte": lambda a, b: int(a >= b),
+            "t": t,
+            "selected_n": len(picked),
+        }
+        if eval(code, scope):
+            picked.append(t)
+    return picked
+
+
+def _if_depth(expr):
+    """Deepest nesting of if() calls in an expression."""
+    depth, deepest, stack = 0, 0, []
+    for i, char in enumerate(expr):
+        if char == "(":
+            is_if = expr[max(0, i - 2):i] == "if"
+            stack.append(is_if)
+            depth += is_if
+            deepest = max(deepest, depth)
+        elif char == ")":
+            depth -= stack.pop()
+    return deepest
+
+
+FRAMES = [i / 10 for i in range(100)]
+
+
+def test_single_timestamp():
+    expr = _timestamp_select_expr([2.0])
+
+    assert expr == "if(lt(selected_n,1),gte(t,1.999500),0)"
+    assert _select(expr, FRAMES) == [2.0]
+
+
+def test_two_timestamps():
+    expr = _timestamp_select_expr([1.0, 3.0])
+
+    assert expr == "if(lt(selected_n,2),if(lt(selected_n,1),gte(t,0.999500),gte(t,2.999500)),0)"
+    assert _select(expr, FRAMES) == [1.0, 3.0]
+
+
+def test_many_timestamps_use_a_balanced_tree():
+    times = [0.5, 1.25, 2.0, 4.0, 4.05, 6.0, 9.0]
+    expr = _timestamp_select_expr(times)
+
+    # One comparison per timestamp, behind the outer guard and ceil(log2(7)) branches
+    assert expr.count("gte(t,") == len(times)
+    assert _if_depth(expr) == 1 + 3
+    # Timestamps between frames pick the next frame; two close timestamps get two frames
+    assert _select(expr, FRAMES) == [0.5, 1.3, 2.0, 4.0, 4.1, 6.0, 9.0]
+
+
+def test_rounded_keyframe_times_still_match():
+    expr = _timestamp_select_expr([1.0])
+
+    assert _select(expr, [0.9, 0.9996, 1.1]) == [0.9996]